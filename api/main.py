@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from api.routes import intake, insight, report, email
 import logging
 import os
+import threading
 
 # ---------- App Setup ----------
 app = FastAPI(
@@ -50,6 +51,21 @@ def health_check():
         "environment": "docker" if os.getenv("DOCKER_ENV") else "local"
     }
 
+# ---------- Startup ----------
+@app.on_event("startup")
+def warm_up_retrieval_cache():
+    """Precompute retrieval for the fixed CARE questions without delaying startup"""
+    from llm_engine.rag_engine import warm_up_retrieval
+    threading.Thread(target=warm_up_retrieval, name="retrieval-warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+def warm_up_scraper_drivers():
+    """Launch SCRAPER_PREWARM_DRIVERS Chrome drivers in the background so the first scrape skips the cold start"""
+    from scraper.driver_pool import SCRAPER_PREWARM_DRIVERS, driver_pool
+    if SCRAPER_PREWARM_DRIVERS > 0:
+        threading.Thread(target=driver_pool.warm_up, name="scraper-warm-up", daemon=True).start()
+
 # ---------- Register Routes ----------
 app.include_router(intake.router, prefix="/intake", tags=["Intake"])
 app.include_router(insight.router, prefix="/insight", tags=["Insight"])
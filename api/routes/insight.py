@@ -3,6 +3,8 @@ from api.schemas.insight_schema import InsightRequest, InsightResponse
 from llm_engine.prompt_template import build_prompt
 from llm_engine.llama_client import generate_llama_response
 from llm_engine.rag_engine import retrieve_context  # ✅ NEW
+from llm_engine.response_cache import response_cache
+from vector_store.embedding_cache import embedding_cache
 import logging
 
 router = APIRouter()
@@ -40,3 +42,17 @@ def generate_insight(data: InsightRequest):
     except Exception as e:
         logger.error(f"[INSIGHT ERROR] {e}")
         raise HTTPException(status_code=500, detail="Insight generation failed.")
+
+@router.get("/cache/stats")
+def get_llm_cache_stats():
+    """Hit/miss counters and size of the persistent LLM response cache"""
+    if not response_cache:
+        return {"enabled": False}
+    return response_cache.stats()
+
+@router.get("/cache/embeddings/stats")
+def get_embedding_cache_stats():
+    """Hit/miss counters and size of the persistent chunk embedding cache"""
+    if not embedding_cache:
+        return {"enabled": False}
+    return embedding_cache.stats()
@@ -1,17 +1,21 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse
-from api.schemas.report_schema import ReportRequest, ReportResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from api.schemas.report_schema import ReportRequest, ReportResponse, ReportJobResponse, ReportJobStatus
+from api.utils.report_pipeline import run_report_pipeline, stream_report_pipeline, REPORT_STAGES
+from api.utils.job_queue import report_job_queue, QueueFullError
 from reporting.pdf_builder import generate_pdf_report, generate_pdf_to_buffer
-from llm_engine.rag_engine import generate_solution_section, retrieve_context
-from llm_engine.prompt_template import build_prompt
-from llm_engine.llama_client import generate_llama_response
-from care.question_bank import CARE_QUESTIONS
-from scraper.selenium_scraper import scrape_company_website
+from llm_engine.rag_engine import generate_solution_section
+from llm_engine.insight_generator import generate_care_insights
+from scraper.crawler import crawl_company_website
+from scraper.page_readiness import readiness_stats
+from scraper.scrape_cache import scrape_cache
 from email_service.mailgun_client import MailgunClient
 from google_sheets.sheets_client import sheets_client
 import logging
 import os
 import base64
+import json
+from datetime import datetime
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -23,154 +27,109 @@ def generate_report(data: ReportRequest, request: Request):
     Includes web-scraped company context and a BeaconAI solution section.
     """
     try:
-        logger.info(f"[REPORT] Generating report for: {data.company_name} ({data.persona})")
-
-        # Step 0: Scrape Company Website Content
-        logger.info(f"[SCRAPER] Extracting content from: {data.company_website}")
-        company_context_text = scrape_company_website(data.company_website)
-
-        formatted_insights = {}
-
-        # Step 1: Generate insights for each CARE question
-        for qid, answer in data.insights.items():
-            question_text = CARE_QUESTIONS[qid]["question"]
-            category = qid[0]  # C, A, R, or E
-
-            # Retrieve RAG chunks from knowledge base
-            retrieved_chunks = retrieve_context(question_text)
-            rag_context = f"{company_context_text}\n" + "\n".join(retrieved_chunks)
-
-            # Build and send prompt to LLM
-            prompt = build_prompt(
-                persona=data.persona,
-                company_name=data.company_name,
-                category=category,
-                question=question_text,
-                answer=answer,
-                company_summary="",
-                rag_context=rag_context
-            )
-
-            insight = generate_llama_response(prompt)
-
-            formatted_insights[qid] = {
-                "question": question_text,
-                "answer": answer,
-                "insight": insight
-            }
+        return run_report_pipeline(
+            data,
+            client_host=request.client.host if request.client else 'unknown',
+            user_agent=request.headers.get('user-agent', 'unknown')
+        )
 
-        # Step 2: Generate final BeaconAI Solution Summary
-        all_insight_texts = [v["insight"] for v in formatted_insights.values()]
-        solution_summary = generate_solution_section(all_insight_texts, company_context_text)
+    except Exception as e:
+        logger.error(f"[REPORT ERROR] {e}")
+        raise HTTPException(status_code=500, detail="Failed to generate report.")
 
-        # Step 3: Generate PDF Report in Memory
-        from io import BytesIO
-        pdf_buffer = BytesIO()
-        
-        # Generate PDF directly to buffer
-        pdf_content = generate_pdf_to_buffer(
-            user_name=data.user_name,
-            company_name=data.company_name,
-            persona=data.persona,
-            insights=formatted_insights,
-            solution_section=solution_summary
-        )
-        
-        # Create filename
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{data.company_name.replace(' ', '_')}_{data.persona}_{timestamp}.pdf"
+@router.post("/generate/stream")
+def generate_report_stream(data: ReportRequest, request: Request):
+    """
+    Streaming variant of /report/generate using Server-Sent Events.
+    Emits "stage", one "insight" per CARE question as it completes, "solution",
+    and finally "report" with a /report/download link (or "error" on failure).
+    """
+    client_host = request.client.host if request.client else 'unknown'
+    user_agent = request.headers.get('user-agent', 'unknown')
 
-        # Step 4: Store Lead Information in Google Sheets (Optional)
+    def event_stream():
         try:
-            lead_data = {
-                'user_name': data.user_name,
-                'email': data.user_email,
-                'company_name': data.company_name,
-                'company_website': data.company_website,
-                'persona': data.persona,
-                'report_filename': filename,
-                'insights': data.insights,
-                'ip_address': request.client.host if request.client else 'unknown',
-                'user_agent': request.headers.get('user-agent', 'unknown')
-            }
-            
-            # Save to Google Sheets (don't fail if this doesn't work)
-            sheets_success = sheets_client.add_lead(lead_data)
-            if sheets_success:
-                logger.info(f"[SHEETS] Lead saved to Google Sheets: {data.user_email}")
-            else:
-                logger.warning(f"[SHEETS] Failed to save lead to Google Sheets: {data.user_email}")
-        except Exception as sheets_error:
-            logger.warning(f"[SHEETS] Google Sheets error: {str(sheets_error)}")
+            for event, payload in stream_report_pipeline(data, client_host=client_host, user_agent=user_agent):
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except Exception as e:
+            logger.error(f"[REPORT STREAM ERROR] {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Failed to generate report.'})}\n\n"
 
-        # Step 5: Email Sending (Optional - graceful fallback if not configured)
-        email_sent = False
-        email_status = "Download available"
-        mailgun_id = None
-        
-        # Try to send email if Mailgun is configured
-        try:
-            # Check if Mailgun is configured
-            mailgun_api_key = os.getenv("MAILGUN_API_KEY")
-            mailgun_domain = os.getenv("MAILGUN_DOMAIN")
-            
-            # Debug logging
-            logger.info(f"[REPORT] Mailgun config check:")
-            logger.info(f"  API Key: {'SET' if mailgun_api_key else 'NOT SET'} (length: {len(mailgun_api_key) if mailgun_api_key else 0})")
-            logger.info(f"  Domain: {mailgun_domain}")
-            logger.info(f"  API Key is placeholder: {mailgun_api_key == 'your_mailgun_api_key_here'}")
-            
-            if mailgun_api_key and mailgun_domain and mailgun_api_key != "your_mailgun_api_key_here":
-                logger.info(f"[REPORT] Attempting to send email to: {data.user_email}")
-                try:
-                    mailgun_client = MailgunClient()
-                except ValueError as config_error:
-                    logger.error(f"[REPORT] Mailgun configuration error: {str(config_error)}")
-                    email_status = f"Email configuration error: {str(config_error)} - Download available"
-                    mailgun_client = None
-                
-                if mailgun_client:
-                    email_result = mailgun_client.send_report_email(
-                        recipient_email=data.user_email,
-                        recipient_name=data.user_name,
-                        company_name=data.company_name,
-                        persona=data.persona,
-                        pdf_content=pdf_content,
-                        pdf_filename=filename
-                    )
-                    
-                    if email_result["success"]:
-                        email_sent = True
-                        email_status = f"Report sent successfully to {data.user_email}"
-                        mailgun_id = email_result.get("mailgun_id")
-                        logger.info(f"[REPORT] Email sent successfully to {data.user_email}")
-                    else:
-                        email_status = f"Email sending failed: {email_result['message']} - Download available"
-                        logger.warning(f"[REPORT] Email sending failed: {email_result['message']}")
-                else:
-                    email_status = "Email configuration error - Download available"
-            else:
-                email_status = "Email not configured - Download available"
-                logger.info(f"[REPORT] Mailgun not configured, email capture only: {data.user_email}")
-                
-        except Exception as email_error:
-            email_status = f"Email sending error: {str(email_error)} - Download available"
-            logger.error(f"[REPORT] Email sending error: {str(email_error)}")
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-        # Return response with PDF content for direct download        
-        return ReportResponse(
-            status="success",
-            pdf_content=base64.b64encode(pdf_content).decode('utf-8'),
-            filename=filename,
-            email_sent=email_sent,
-            email_status=email_status,
-            mailgun_id=mailgun_id
+@router.post("/jobs", response_model=ReportJobResponse, status_code=202)
+def create_report_job(data: ReportRequest, request: Request):
+    """
+    Queues a report for background generation and returns a job id immediately.
+    Poll GET /report/jobs/{job_id} for stage-level progress and the finished PDF.
+    """
+    try:
+        job_id = report_job_queue.submit(
+            data,
+            client_host=request.client.host if request.client else 'unknown',
+            user_agent=request.headers.get('user-agent', 'unknown')
         )
+        return ReportJobResponse(job_id=job_id, status="queued", status_url=f"/report/jobs/{job_id}")
 
+    except QueueFullError as e:
+        logger.warning(f"[JOBS] Rejecting report job: {e}")
+        raise HTTPException(status_code=503, detail="Report queue is full, please retry shortly.")
     except Exception as e:
-        logger.error(f"[REPORT ERROR] {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate report.")
+        logger.error(f"[JOBS ERROR] {e}")
+        raise HTTPException(status_code=500, detail="Failed to queue report.")
+
+@router.get("/jobs/{job_id}", response_model=ReportJobStatus)
+def get_report_job(job_id: str):
+    """
+    Returns the status and current pipeline stage of a queued report job.
+    Once completed, the result contains the same payload as /report/generate.
+    """
+    job = report_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Report job not found: {job_id}")
+
+    if job["status"] == "completed":
+        progress = 1.0
+    elif job["stage"] in REPORT_STAGES:
+        progress = REPORT_STAGES.index(job["stage"]) / len(REPORT_STAGES)
+    else:
+        progress = 0.0
+
+    return ReportJobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        stage=job["stage"],
+        stages=REPORT_STAGES,
+        progress=round(progress, 2),
+        queue_position=job["queue_position"],
+        error=job["error"],
+        created_at=datetime.fromtimestamp(job["created_at"]),
+        started_at=datetime.fromtimestamp(job["started_at"]) if job["started_at"] else None,
+        finished_at=datetime.fromtimestamp(job["finished_at"]) if job["finished_at"] else None,
+        result=job["result"]
+    )
+
+@router.get("/jobs/{job_id}/pdf")
+def download_report_job_pdf(job_id: str):
+    """
+    Downloads the finished PDF of a completed report job.
+    """
+    job = report_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Report job not found: {job_id}")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job['status']}")
+
+    filename = job["result"]["filename"]
+    return Response(
+        content=base64.b64decode(job["result"]["pdf_content"]),
+        media_type='application/pdf',
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 @router.post("/generate-and-email", response_model=ReportResponse)
 def generate_and_email_report(data: ReportRequest):
@@ -190,40 +149,18 @@ def generate_and_email_report(data: ReportRequest):
 
         # Step 0: Scrape Company Website Content
         logger.info(f"[SCRAPER] Extracting content from: {data.company_website}")
-        company_context_text = scrape_company_website(data.company_website)
-
-        formatted_insights = {}
-
-        # Step 1: Generate insights for each CARE question
-        for qid, answer in data.insights.items():
-            question_text = CARE_QUESTIONS[qid]["question"]
-            category = qid[0]  # C, A, R, or E
-
-            # Retrieve RAG chunks from knowledge base
-            retrieved_chunks = retrieve_context(question_text)
-            rag_context = f"{company_context_text}\n" + "\n".join(retrieved_chunks)
-
-            # Build and send prompt to LLM
-            prompt = build_prompt(
-                persona=data.persona,
-                company_name=data.company_name,
-                category=category,
-                question=question_text,
-                answer=answer,
-                company_summary="",
-                rag_context=rag_context
-            )
+        company_context_text = crawl_company_website(data.company_website)
 
-            insight = generate_llama_response(prompt)
-
-            formatted_insights[qid] = {
-                "question": question_text,
-                "answer": answer,
-                "insight": insight
-            }
+        # Step 1: Generate insights for all CARE questions as one concurrent batch
+        formatted_insights = generate_care_insights(
+            persona=data.persona,
+            company_name=data.company_name,
+            answers=data.insights,
+            company_context=company_context_text
+        )
 
         # Step 2: Generate final BeaconAI Solution Summary
-        all_insight_texts = [v["insight"] for v in formatted_insights.values()]
+        all_insight_texts = [v["insight"] for v in formatted_insights.values() if not v["error"]]
         solution_summary = generate_solution_section(all_insight_texts, company_context_text)
 
         # Step 3: Generate PDF Report
@@ -477,6 +414,16 @@ def get_sheets_statistics():
         logger.error(f"[SHEETS STATS ERROR] {e}")
         return {"status": "error", "message": str(e)}
 
+@router.get("/scraper/stats")
+def get_scraper_stats():
+    """Scraper driver pool counters, how long each site took to render and scrape cache counters"""
+    from scraper.driver_pool import driver_pool
+    return {
+        "driver_pool": driver_pool.stats(),
+        "page_wait": readiness_stats.stats(),
+        "cache": scrape_cache.stats() if scrape_cache else {"enabled": False}
+    }
+
 @router.get("/system/status")
 def get_system_status():
     """Get overall system status"""
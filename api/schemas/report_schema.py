@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 class ReportRequest(BaseModel):
     user_name: str  # User's full name
@@ -17,3 +18,21 @@ class ReportResponse(BaseModel):
     email_sent: Optional[bool] = None  # Whether email was sent
     email_status: Optional[str] = None  # Email sending status message
     mailgun_id: Optional[str] = None  # Mailgun message ID if email sent
+
+class ReportJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    status_url: str  # Poll this URL for progress
+
+class ReportJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    stage: Optional[str] = None  # Current (or failing) pipeline stage
+    stages: List[str]  # All pipeline stages in order
+    progress: float  # Fraction of stages finished, 0.0 – 1.0
+    queue_position: Optional[int] = None  # Jobs ahead of this one while queued
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[ReportResponse] = None  # Finished report including base64 PDF
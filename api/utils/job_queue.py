@@ -0,0 +1,293 @@
+"""
+SQLite-backed report job queue with a bounded in-process worker pool.
+
+Jobs are persisted in a local SQLite file so the queue needs no outside services
+and survives restarts. A running job is leased by the process running it, which
+renews the lease with a heartbeat; jobs whose lease expired (their process died)
+are put back in the queue, while jobs of other live processes sharing the file
+are left alone.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from api.schemas.report_schema import ReportRequest, ReportResponse
+from api.utils.report_pipeline import run_report_pipeline
+
+logger = logging.getLogger(__name__)
+
+REPORT_JOBS_DB_PATH = os.getenv(
+    "REPORT_JOBS_DB_PATH",
+    "/app/generated_reports/report_jobs.sqlite3" if os.getenv("DOCKER_ENV") else "generated_reports/report_jobs.sqlite3"
+)
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_PENDING = int(os.getenv("REPORT_JOB_MAX_PENDING", "100"))
+REPORT_JOB_RETENTION_SECONDS = int(os.getenv("REPORT_JOB_RETENTION_SECONDS", str(24 * 3600)))
+# A running job whose lease has not been renewed for this long is considered abandoned
+REPORT_JOB_LEASE_SECONDS = float(os.getenv("REPORT_JOB_LEASE_SECONDS", "60"))
+
+
+class QueueFullError(Exception):
+    """Raised when the number of queued jobs has reached REPORT_JOB_MAX_PENDING"""
+
+
+class ReportJobQueue:
+    """
+    Persistent FIFO of report jobs processed by a fixed number of worker threads.
+    """
+
+    def __init__(
+        self,
+        db_path: str = REPORT_JOBS_DB_PATH,
+        num_workers: int = REPORT_JOB_WORKERS,
+        max_pending: int = REPORT_JOB_MAX_PENDING,
+        runner: Callable[..., ReportResponse] = run_report_pipeline,
+        lease_seconds: float = REPORT_JOB_LEASE_SECONDS
+    ):
+        self.db_path = db_path
+        self.num_workers = max(1, num_workers)
+        self.max_pending = max_pending
+        self.runner = runner
+        self.lease_seconds = lease_seconds
+        # Owner recorded on the jobs this process runs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._workers: list[threading.Thread] = []
+        self._heartbeat: Optional[threading.Thread] = None
+        self._submissions = 0  # Bumped on every submit so idle workers never miss a wakeup
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Resume jobs left over from a previous run without waiting for a new submission
+        if self._init_db():
+            self._ensure_workers()
+
+    # ---------- Storage ----------
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> int:
+        """Creates the jobs table, re-queues jobs with expired leases and returns the queued job count."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS report_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    lease_expires_at REAL
+                )
+            """)
+            # Queues created before jobs were leased
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(report_jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE report_jobs ADD COLUMN owner TEXT")
+            if "lease_expires_at" not in columns:
+                conn.execute("ALTER TABLE report_jobs ADD COLUMN lease_expires_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs (status, created_at)")
+
+            self._requeue_expired(conn)
+            return conn.execute("SELECT COUNT(*) FROM report_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def _requeue_expired(self, conn: sqlite3.Connection):
+        """Puts running jobs whose owner stopped renewing their lease back in the queue."""
+        recovered = conn.execute(
+            "UPDATE report_jobs SET status = 'queued', stage = NULL, started_at = NULL, owner = NULL, lease_expires_at = NULL "
+            "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+            (time.time(),)
+        ).rowcount
+        if recovered:
+            logger.warning(f"[JOBS] Re-queued {recovered} report jobs with expired leases")
+
+    def _update(self, job_id: str, **fields):
+        """Updates a job this process owns; a job re-queued after its lease expired is left alone."""
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE report_jobs SET {columns} WHERE id = ? AND owner = ?", (*fields.values(), job_id, self.owner))
+
+    def _renew_leases(self):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE report_jobs SET lease_expires_at = ? WHERE status = 'running' AND owner = ?",
+                (time.time() + self.lease_seconds, self.owner)
+            )
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Atomically moves the oldest queued job to running under this process's lease and returns it."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._requeue_expired(conn)
+                row = conn.execute(
+                    "SELECT * FROM report_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    now = time.time()
+                    conn.execute(
+                        "UPDATE report_jobs SET status = 'running', started_at = ?, owner = ?, lease_expires_at = ? WHERE id = ?",
+                        (now, self.owner, now + self.lease_seconds, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return row
+
+    def _purge_expired(self):
+        cutoff = time.time() - REPORT_JOB_RETENTION_SECONDS
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM report_jobs WHERE status IN ('completed', 'failed') AND finished_at < ?",
+                (cutoff,)
+            )
+
+    # ---------- Public API ----------
+
+    def submit(self, data: ReportRequest, client_host: str = "unknown", user_agent: str = "unknown") -> str:
+        """
+        Persists a new job and wakes a worker. Returns the job id.
+
+        Raises:
+            QueueFullError: if max_pending jobs are already waiting
+        """
+        self._purge_expired()
+        self._ensure_workers()
+
+        payload = json.dumps({
+            "request": data.dict(),
+            "client_host": client_host,
+            "user_agent": user_agent
+        })
+        job_id = uuid.uuid4().hex
+
+        with self._wakeup:
+            with self._connect() as conn:
+                pending = conn.execute("SELECT COUNT(*) FROM report_jobs WHERE status = 'queued'").fetchone()[0]
+                if pending >= self.max_pending:
+                    raise QueueFullError(f"{pending} report jobs already queued")
+                conn.execute(
+                    "INSERT INTO report_jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+                    (job_id, payload, time.time())
+                )
+            self._submissions += 1
+            self._wakeup.notify()
+
+        logger.info(f"[JOBS] Queued report job {job_id} for {data.company_name} ({data.persona})")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Returns the job record as a dict, or None if the job id is unknown.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM report_jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                return None
+
+            job = dict(row)
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            job["queue_position"] = None
+            if job["status"] == "queued":
+                job["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM report_jobs WHERE status = 'queued' AND created_at < ?",
+                    (job["created_at"],)
+                ).fetchone()[0]
+            return job
+
+    # ---------- Workers ----------
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"report-job-worker-{len(self._workers)}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="report-job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        # Renews well before expiry so one slow write does not cost the lease
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                self._renew_leases()
+            except Exception as e:
+                logger.error(f"[JOBS ERROR] Could not renew job leases: {e}")
+
+    def _worker_loop(self):
+        while True:
+            with self._lock:
+                seen = self._submissions
+
+            try:
+                row = self._claim_next()
+            except Exception as e:
+                logger.error(f"[JOBS ERROR] Could not claim job: {e}")
+                row = None
+
+            if not row:
+                with self._wakeup:
+                    self._wakeup.wait_for(lambda: self._submissions != seen, timeout=5)
+                continue
+
+            self._run_job(row)
+
+    def _run_job(self, row: sqlite3.Row):
+        job_id = row["id"]
+        payload = json.loads(row["payload"])
+        logger.info(f"[JOBS] Running report job {job_id}")
+
+        try:
+            response = self.runner(
+                ReportRequest(**payload["request"]),
+                client_host=payload["client_host"],
+                user_agent=payload["user_agent"],
+                on_stage=lambda stage: self._update(job_id, stage=stage)
+            )
+            self._update(
+                job_id,
+                status="completed",
+                stage="completed",
+                result=json.dumps(response.dict()),
+                finished_at=time.time(),
+                lease_expires_at=None
+            )
+            logger.info(f"[JOBS] Report job {job_id} completed")
+        except Exception as e:
+            logger.error(f"[JOBS ERROR] Report job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time(), lease_expires_at=None)
+
+
+# Process-wide queue; workers start on the first submission
+report_job_queue = ReportJobQueue()
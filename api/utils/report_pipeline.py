@@ -0,0 +1,253 @@
+import os
+import base64
+import logging
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+
+from api.schemas.report_schema import ReportRequest, ReportResponse
+from reporting.pdf_builder import generate_pdf_report, generate_pdf_to_buffer
+from llm_engine.rag_engine import generate_solution_section
+from llm_engine.insight_generator import generate_care_insights, iter_care_insights
+from scraper.crawler import crawl_company_website
+from email_service.mailgun_client import MailgunClient
+from google_sheets.sheets_client import sheets_client
+
+logger = logging.getLogger(__name__)
+
+# Ordered pipeline stages reported to progress callbacks
+REPORT_STAGES = ["scraping", "insights", "solution", "pdf", "sheets", "email"]
+
+
+def run_report_pipeline(
+    data: ReportRequest,
+    client_host: str = "unknown",
+    user_agent: str = "unknown",
+    on_stage: Optional[Callable[[str], None]] = None
+) -> ReportResponse:
+    """
+    Runs the full report pipeline: scrape → CARE insights → solution → PDF → Sheets → email.
+
+    Args:
+        data: The report request
+        client_host: Caller IP address recorded with the lead
+        user_agent: Caller user agent recorded with the lead
+        on_stage: Optional callback invoked with each stage name from REPORT_STAGES as it starts
+
+    Returns:
+        ReportResponse with the base64 encoded PDF and email status
+    """
+    def enter_stage(stage: str):
+        if on_stage:
+            on_stage(stage)
+
+    logger.info(f"[REPORT] Generating report for: {data.company_name} ({data.persona})")
+
+    # Step 0: Scrape Company Website Content
+    enter_stage("scraping")
+    logger.info(f"[SCRAPER] Extracting content from: {data.company_website}")
+    company_context_text = crawl_company_website(data.company_website)
+
+    # Step 1: Generate insights for all CARE questions as one concurrent batch
+    enter_stage("insights")
+    formatted_insights = generate_care_insights(
+        persona=data.persona,
+        company_name=data.company_name,
+        answers=data.insights,
+        company_context=company_context_text
+    )
+
+    # Step 2: Generate final BeaconAI Solution Summary
+    enter_stage("solution")
+    all_insight_texts = [v["insight"] for v in formatted_insights.values() if not v["error"]]
+    solution_summary = generate_solution_section(all_insight_texts, company_context_text)
+
+    # Step 3: Generate PDF Report in Memory
+    enter_stage("pdf")
+    pdf_content = generate_pdf_to_buffer(
+        user_name=data.user_name,
+        company_name=data.company_name,
+        persona=data.persona,
+        insights=formatted_insights,
+        solution_section=solution_summary
+    )
+
+    # Create filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{data.company_name.replace(' ', '_')}_{data.persona}_{timestamp}.pdf"
+
+    # Step 4: Store Lead Information in Google Sheets (Optional)
+    enter_stage("sheets")
+    save_lead(data, filename, client_host, user_agent)
+
+    # Step 5: Email Sending (Optional - graceful fallback if not configured)
+    enter_stage("email")
+    email_sent, email_status, mailgun_id = email_report(data, pdf_content, filename)
+
+    # Return response with PDF content for direct download
+    return ReportResponse(
+        status="success",
+        pdf_content=base64.b64encode(pdf_content).decode('utf-8'),
+        filename=filename,
+        email_sent=email_sent,
+        email_status=email_status,
+        mailgun_id=mailgun_id
+    )
+
+
+def stream_report_pipeline(
+    data: ReportRequest,
+    client_host: str = "unknown",
+    user_agent: str = "unknown"
+) -> Iterator[Tuple[str, dict]]:
+    """
+    Runs the report pipeline and yields (event, payload) pairs as results become available:
+    "stage" when a stage starts, one "insight" per CARE question as soon as its LLM call
+    completes, "solution" for the BeaconAI solution section and finally "report" with
+    the download link of the saved PDF.
+    """
+    logger.info(f"[REPORT] Streaming report for: {data.company_name} ({data.persona})")
+
+    # Step 0: Scrape Company Website Content
+    yield "stage", {"stage": "scraping"}
+    company_context_text = crawl_company_website(data.company_website)
+
+    # Step 1: Push each insight the moment it is ready
+    yield "stage", {"stage": "insights", "total": len(data.insights)}
+    completed = {}
+    for qid, entry in iter_care_insights(
+        persona=data.persona,
+        company_name=data.company_name,
+        answers=data.insights,
+        company_context=company_context_text
+    ):
+        completed[qid] = entry
+        yield "insight", {"question_id": qid, **entry}
+
+    formatted_insights = {qid: completed[qid] for qid in data.insights if qid in completed}
+
+    # Step 2: Generate final BeaconAI Solution Summary
+    yield "stage", {"stage": "solution"}
+    all_insight_texts = [v["insight"] for v in formatted_insights.values() if not v["error"]]
+    solution_summary = generate_solution_section(all_insight_texts, company_context_text)
+    yield "solution", {"solution": solution_summary}
+
+    # Step 3: Save the PDF so it can be fetched from /report/download
+    yield "stage", {"stage": "pdf"}
+    filepath = generate_pdf_report(
+        user_name=data.user_name,
+        company_name=data.company_name,
+        persona=data.persona,
+        insights=formatted_insights,
+        solution_section=solution_summary
+    )
+    filename = os.path.basename(filepath)
+
+    # Step 4 & 5: Lead capture and email, same as the blocking endpoint
+    yield "stage", {"stage": "sheets"}
+    save_lead(data, filename, client_host, user_agent)
+
+    yield "stage", {"stage": "email"}
+    with open(filepath, "rb") as pdf_file:
+        pdf_content = pdf_file.read()
+    email_sent, email_status, mailgun_id = email_report(data, pdf_content, filename)
+
+    yield "report", {
+        "status": "success",
+        "filename": filename,
+        "download_url": f"/report/download/{filename}",
+        "email_sent": email_sent,
+        "email_status": email_status,
+        "mailgun_id": mailgun_id
+    }
+
+
+def save_lead(data: ReportRequest, filename: str, client_host: str = "unknown", user_agent: str = "unknown") -> bool:
+    """
+    Stores the lead in Google Sheets. Never raises; returns whether the lead was saved.
+    """
+    try:
+        lead_data = {
+            'user_name': data.user_name,
+            'email': data.user_email,
+            'company_name': data.company_name,
+            'company_website': data.company_website,
+            'persona': data.persona,
+            'report_filename': filename,
+            'insights': data.insights,
+            'ip_address': client_host,
+            'user_agent': user_agent
+        }
+
+        # Save to Google Sheets (don't fail if this doesn't work)
+        sheets_success = sheets_client.add_lead(lead_data)
+        if sheets_success:
+            logger.info(f"[SHEETS] Lead saved to Google Sheets: {data.user_email}")
+        else:
+            logger.warning(f"[SHEETS] Failed to save lead to Google Sheets: {data.user_email}")
+        return sheets_success
+    except Exception as sheets_error:
+        logger.warning(f"[SHEETS] Google Sheets error: {str(sheets_error)}")
+        return False
+
+
+def email_report(data: ReportRequest, pdf_content: bytes, filename: str) -> Tuple[bool, str, Optional[str]]:
+    """
+    Emails the report via Mailgun when configured. Never raises.
+
+    Returns:
+        (email_sent, email_status, mailgun_id)
+    """
+    email_sent = False
+    email_status = "Download available"
+    mailgun_id = None
+
+    # Try to send email if Mailgun is configured
+    try:
+        # Check if Mailgun is configured
+        mailgun_api_key = os.getenv("MAILGUN_API_KEY")
+        mailgun_domain = os.getenv("MAILGUN_DOMAIN")
+
+        # Debug logging
+        logger.info(f"[REPORT] Mailgun config check:")
+        logger.info(f"  API Key: {'SET' if mailgun_api_key else 'NOT SET'} (length: {len(mailgun_api_key) if mailgun_api_key else 0})")
+        logger.info(f"  Domain: {mailgun_domain}")
+        logger.info(f"  API Key is placeholder: {mailgun_api_key == 'your_mailgun_api_key_here'}")
+
+        if mailgun_api_key and mailgun_domain and mailgun_api_key != "your_mailgun_api_key_here":
+            logger.info(f"[REPORT] Attempting to send email to: {data.user_email}")
+            try:
+                mailgun_client = MailgunClient()
+            except ValueError as config_error:
+                logger.error(f"[REPORT] Mailgun configuration error: {str(config_error)}")
+                email_status = f"Email configuration error: {str(config_error)} - Download available"
+                mailgun_client = None
+
+            if mailgun_client:
+                email_result = mailgun_client.send_report_email(
+                    recipient_email=data.user_email,
+                    recipient_name=data.user_name,
+                    company_name=data.company_name,
+                    persona=data.persona,
+                    pdf_content=pdf_content,
+                    pdf_filename=filename
+                )
+
+                if email_result["success"]:
+                    email_sent = True
+                    email_status = f"Report sent successfully to {data.user_email}"
+                    mailgun_id = email_result.get("mailgun_id")
+                    logger.info(f"[REPORT] Email sent successfully to {data.user_email}")
+                else:
+                    email_status = f"Email sending failed: {email_result['message']} - Download available"
+                    logger.warning(f"[REPORT] Email sending failed: {email_result['message']}")
+            else:
+                email_status = "Email configuration error - Download available"
+        else:
+            email_status = "Email not configured - Download available"
+            logger.info(f"[REPORT] Mailgun not configured, email capture only: {data.user_email}")
+
+    except Exception as email_error:
+        email_status = f"Email sending error: {str(email_error)} - Download available"
+        logger.error(f"[REPORT] Email sending error: {str(email_error)}")
+
+    return email_sent, email_status, mailgun_id
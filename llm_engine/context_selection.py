@@ -0,0 +1,143 @@
+"""
+Post-retrieval selection of the chunks that go into a prompt.
+
+Retrieved chunks often repeat each other: the splitter overlaps neighbouring chunks
+and pages share boilerplate. Before prompt assembly, exact and near-duplicate chunks
+are dropped, the remaining candidates are picked by max-marginal relevance, and
+chunks that continue each other are merged back into one span, so the token budget
+is spent on distinct information.
+"""
+import os
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+from vector_store.embedding_cache import embed_queries
+from vector_store.near_duplicates import NearDuplicateFilter, estimated_jaccard, minhash, shingles
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_SELECTION_ENABLED = os.getenv("CONTEXT_SELECTION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Candidates retrieved per selected chunk
+CONTEXT_CANDIDATE_FACTOR = int(os.getenv("CONTEXT_CANDIDATE_FACTOR", "2"))
+# 1.0 ranks by relevance only, 0.0 by novelty only
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+CONTEXT_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+
+# Shortest shared prefix/suffix treated as splitter overlap rather than coincidence
+_MIN_OVERLAP_CHARS = 20
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is a prefix of right."""
+    for size in range(min(len(left), len(right)) - 1, _MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_overlapping(chunks: List[str]) -> List[str]:
+    """
+    Joins chunks whose end overlaps another chunk's start (adjacent splitter chunks)
+    into one span; a merged span takes the position of its best-ranked part.
+    """
+    merged = list(chunks)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(len(merged)):
+                if i == j:
+                    continue
+                size = _overlap(merged[i], merged[j])
+                if size:
+                    span = merged[i] + merged[j][size:]
+                    keep, drop = min(i, j), max(i, j)
+                    merged[keep] = span
+                    del merged[drop]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
+
+
+def _cosine_matrix(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+    return unit @ unit.T
+
+
+def max_marginal_relevance(relevance: np.ndarray, similarity: np.ndarray, k: int, lambda_mult: float = CONTEXT_MMR_LAMBDA) -> List[int]:
+    """
+    Greedy MMR: repeatedly picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * max similarity to the already selected ones.
+    """
+    selected: List[int] = []
+    remaining = list(range(len(relevance)))
+    while remaining and len(selected) < k:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+def select_context(
+    query: str,
+    chunks: List[str],
+    k: int,
+    embedding_model=None,
+    query_vector: Optional[np.ndarray] = None,
+    chunk_vectors: Optional[np.ndarray] = None
+) -> List[str]:
+    """
+    Deduplicates ranked candidate chunks, keeps k by MMR and merges overlapping spans.
+
+    Relevance and similarity come from embeddings — the vectors retrieval already has
+    when given (one row per chunk), otherwise embedded with the model — and from the
+    retrieval rank and shingle overlap when neither is available.
+    """
+    candidates = NearDuplicateFilter(CONTEXT_NEAR_DUPLICATE_THRESHOLD).filter(chunks)
+    dropped = len(chunks) - len(candidates)
+
+    if len(candidates) > k:
+        similarity = relevance = None
+        if query_vector is not None and chunk_vectors is not None and len(chunk_vectors) == len(chunks):
+            rows = {}
+            for i, chunk in enumerate(chunks):
+                rows.setdefault(chunk, i)
+            vectors = np.vstack([np.asarray(query_vector, dtype=np.float32)] + [chunk_vectors[rows[chunk]] for chunk in candidates])
+            cosine = _cosine_matrix(vectors)
+            relevance, similarity = cosine[0, 1:], cosine[1:, 1:]
+        elif embedding_model is not None:
+            try:
+                # Chunks may hit the embedding cache; the query is embedded uncached
+                chunk_vectors = np.asarray(embedding_model.embed_documents(candidates), dtype=np.float32)
+                vectors = np.vstack([embed_queries(embedding_model, [query]), chunk_vectors])
+                cosine = _cosine_matrix(vectors)
+                relevance, similarity = cosine[0, 1:], cosine[1:, 1:]
+            except Exception as e:
+                logger.warning(f"⚠️ Could not embed chunks for MMR, using shingle overlap: {e}")
+
+        if similarity is None:
+            signatures = [minhash(shingles(chunk)) for chunk in candidates]
+            relevance = 1.0 / np.arange(1, len(candidates) + 1)
+            similarity = np.array([[estimated_jaccard(a, b) for b in signatures] for a in signatures])
+
+        candidates = [candidates[i] for i in max_marginal_relevance(relevance, similarity, k)]
+
+    selected = merge_overlapping(candidates)
+    if dropped or len(selected) < len(candidates):
+        logger.info(f"[CONTEXT] {dropped} duplicate chunks dropped, {len(candidates) - len(selected)} overlapping merged")
+    return selected
+
+
+def select_context_many(queries: List[str], chunk_lists: List[List[str]], k: int, embedding_model=None) -> List[List[str]]:
+    return [select_context(query, chunks, k, embedding_model) for query, chunks in zip(queries, chunk_lists)]
@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from care.question_bank import CARE_QUESTIONS
+from llm_engine.prompt_template import build_prompt, build_batch_prompt
+from llm_engine.llama_client import generate_llama_response
+from llm_engine.rag_engine import retrieve_context_many, retrieve_company_context_many
+from llm_engine.prompt_budget import assemble_prompt, PROMPT_MAX_TOKENS, PROMPT_COMPANY_CONTEXT_TOKENS, PROMPT_RETRIEVED_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of CARE insight LLM calls in flight per report
+INSIGHT_MAX_WORKERS = int(os.getenv("INSIGHT_MAX_WORKERS", "6"))
+
+# "per_question" sends one prompt per CARE question; "batch" asks for all insights in one call
+INSIGHT_GENERATION_MODE = os.getenv("INSIGHT_GENERATION_MODE", "per_question")
+
+# Completion budget per question and retrieved chunks per question in batch mode
+BATCH_TOKENS_PER_QUESTION = 200
+BATCH_CHUNKS_PER_QUESTION = 2
+
+# Prefix used by generate_llama_response for its fallback error strings
+LLM_ERROR_PREFIX = "⚠️"
+
+
+def _generate_single_insight(
+    persona: str,
+    company_name: str,
+    qid: str,
+    answer: str,
+    company_context: str,
+    retrieved_chunks: List[str]
+) -> dict:
+    """
+    Builds the prompt from the pre-retrieved context and calls the LLM for one CARE question.
+    """
+    question_text = CARE_QUESTIONS[qid]["question"]
+    category = qid[0]  # C, A, R, or E
+
+    # Retrieved chunks outrank the raw company scrape when trimming to the budget
+    prompt, token_counts = assemble_prompt(
+        lambda retrieved, company: build_prompt(
+            persona=persona,
+            company_name=company_name,
+            category=category,
+            question=question_text,
+            answer=answer,
+            company_summary="",
+            rag_context=f"{company}\n{retrieved}"
+        ),
+        {
+            "retrieved": (retrieved_chunks, PROMPT_RETRIEVED_TOKENS),
+            "company": (company_context, PROMPT_COMPANY_CONTEXT_TOKENS)
+        },
+        label=f"insight {qid}"
+    )
+
+    insight = generate_llama_response(prompt)
+
+    return {
+        "question": question_text,
+        "answer": answer,
+        "insight": insight,
+        "error": insight if insight.startswith(LLM_ERROR_PREFIX) else None,
+        "prompt_tokens": token_counts["total"]
+    }
+
+
+def parse_batch_insights(text: str, expected_ids) -> Dict[str, str]:
+    """
+    Strictly parses a batch completion into question_id → insight.
+
+    The completion must contain a single JSON object. Entries whose id was not requested,
+    or whose value is not a non-empty string, are dropped so the caller can fall back
+    to per-question generation for them.
+    """
+    # Tolerate a wrapping ```json fence but nothing else around the object
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in batch completion")
+
+    parsed = json.loads(cleaned[start:end + 1])
+    if not isinstance(parsed, dict):
+        raise ValueError("Batch completion is not a JSON object")
+
+    insights = {}
+    for qid in expected_ids:
+        value = parsed.get(qid)
+        if isinstance(value, dict):
+            value = value.get("insight")
+        if isinstance(value, str) and value.strip() and not value.strip().startswith(LLM_ERROR_PREFIX):
+            insights[qid] = value.strip()
+    return insights
+
+
+def _generate_batch_insights(
+    persona: str,
+    company_name: str,
+    answers: Dict[str, str],
+    company_context: str,
+    kb_chunks: Dict[str, List[str]]
+) -> Dict[str, dict]:
+    """
+    Generates the insights for all known CARE questions in a single chat completion.
+    Returns only the entries that parsed cleanly.
+    """
+    questions = []
+    chunks = []
+    for qid, answer in answers.items():
+        if qid not in CARE_QUESTIONS:
+            continue
+        question_text = CARE_QUESTIONS[qid]["question"]
+        questions.append({"id": qid, "category": qid[0], "question": question_text, "answer": answer})
+        for chunk in kb_chunks[qid][:BATCH_CHUNKS_PER_QUESTION]:
+            if chunk not in chunks:
+                chunks.append(chunk)
+
+    if not questions:
+        return {}
+
+    # One shared context for all questions, so the retrieved budget scales with the batch
+    prompt, token_counts = assemble_prompt(
+        lambda retrieved, company: build_batch_prompt(
+            persona=persona,
+            company_name=company_name,
+            questions=questions,
+            company_summary="",
+            rag_context=f"{company}\n{retrieved}"
+        ),
+        {
+            "retrieved": (chunks, PROMPT_RETRIEVED_TOKENS * 2),
+            "company": (company_context, PROMPT_COMPANY_CONTEXT_TOKENS)
+        },
+        max_total=PROMPT_MAX_TOKENS * 2,
+        label="batch insights"
+    )
+
+    completion = generate_llama_response(prompt, max_tokens=BATCH_TOKENS_PER_QUESTION * len(questions))
+    if completion.startswith(LLM_ERROR_PREFIX):
+        raise RuntimeError(completion)
+
+    insights = parse_batch_insights(completion, [q["id"] for q in questions])
+    return {
+        q["id"]: {
+            "question": q["question"],
+            "answer": q["answer"],
+            "insight": insights[q["id"]],
+            "error": None,
+            "prompt_tokens": token_counts["total"]
+        }
+        for q in questions if q["id"] in insights
+    }
+
+
+def _kb_chunks_per_question(answers: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Retrieves the knowledge-base chunks for every known CARE question in one batched search.
+    """
+    known = [qid for qid in answers if qid in CARE_QUESTIONS]
+    chunks = retrieve_context_many([CARE_QUESTIONS[qid]["question"] for qid in known]) if known else []
+    return dict(zip(known, chunks))
+
+
+def _company_passages_per_question(company_context: str, answers: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Selects the most relevant passages of the company scrape for every CARE question,
+    searched as one batch. Falls back to the full scrape if retrieval fails.
+    """
+    contexts = {qid: [company_context] if company_context else [] for qid in answers}
+    known = [qid for qid in answers if qid in CARE_QUESTIONS]
+    if not company_context or not known:
+        return contexts
+
+    try:
+        passages = retrieve_company_context_many(company_context, [CARE_QUESTIONS[qid]["question"] for qid in known])
+        for qid, chunks in zip(known, passages):
+            if chunks:
+                contexts[qid] = chunks
+    except Exception as e:
+        logger.warning(f"[INSIGHTS] Company passage retrieval failed, using full scrape: {e}")
+
+    return contexts
+
+
+def iter_care_insights(
+    persona: str,
+    company_name: str,
+    answers: Dict[str, str],
+    company_context: str,
+    max_workers: Optional[int] = None,
+    mode: Optional[str] = None
+) -> Iterator[Tuple[str, dict]]:
+    """
+    Generates the CARE insights and yields (question_id, insight) pairs in completion order.
+
+    In "batch" mode all insights are first requested in one structured completion; any
+    question missing from it (or malformed) falls back to its own prompt. Per-question
+    prompts run concurrently, and a failing question yields an entry with its "error"
+    set instead of aborting the whole batch.
+    """
+    pending = dict(answers)
+    company_passages = _company_passages_per_question(company_context, pending)
+    kb_chunks = _kb_chunks_per_question(pending)
+
+    if (mode or INSIGHT_GENERATION_MODE) == "batch" and pending:
+        # The batch prompt carries the union of every question's passages, once
+        shared_passages = []
+        for qid in pending:
+            for passage in company_passages[qid]:
+                if passage not in shared_passages:
+                    shared_passages.append(passage)
+
+        try:
+            for qid, entry in _generate_batch_insights(persona, company_name, pending, "\n\n".join(shared_passages), kb_chunks).items():
+                del pending[qid]
+                yield qid, entry
+        except Exception as e:
+            logger.error(f"[INSIGHTS ERROR] Batch generation failed: {e}")
+
+        if pending:
+            logger.warning(f"[INSIGHTS] Falling back to per-question prompts for: {', '.join(pending)}")
+
+    if not pending:
+        return
+
+    workers = max(1, min(max_workers or INSIGHT_MAX_WORKERS, len(pending)))
+    logger.info(f"[INSIGHTS] Generating {len(pending)} insights with {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="care-insight") as executor:
+        futures = {
+            executor.submit(
+                _generate_single_insight,
+                persona, company_name, qid, answer,
+                "\n\n".join(company_passages[qid]),
+                kb_chunks.get(qid, [])
+            ): (qid, answer)
+            for qid, answer in pending.items()
+        }
+
+        try:
+            for future in as_completed(futures):
+                qid, answer = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    logger.error(f"[INSIGHTS ERROR] {qid}: {e}")
+                    entry = {
+                        "question": CARE_QUESTIONS.get(qid, {}).get("question", qid),
+                        "answer": answer,
+                        "insight": f"{LLM_ERROR_PREFIX} Insight generation failed: {e}",
+                        "error": str(e),
+                        "prompt_tokens": 0
+                    }
+                yield qid, entry
+        finally:
+            # Consumer stopped early (e.g. a streaming client disconnected): skip queued calls
+            for future in futures:
+                future.cancel()
+
+
+def generate_care_insights(
+    persona: str,
+    company_name: str,
+    answers: Dict[str, str],
+    company_context: str,
+    max_workers: Optional[int] = None,
+    mode: Optional[str] = None
+) -> Dict[str, dict]:
+    """
+    Generates all CARE insights as one batch (see iter_care_insights for the modes).
+
+    Returns:
+        Dict[str, dict]: question_id → {question, answer, insight, error, prompt_tokens}, in the
+        same order as the submitted answers.
+    """
+    results = dict(iter_care_insights(persona, company_name, answers, company_context, max_workers, mode))
+
+    failed = [qid for qid, entry in results.items() if entry["error"]]
+    if failed:
+        logger.warning(f"[INSIGHTS] {len(failed)} of {len(results)} insights failed: {', '.join(failed)}")
+
+    return {qid: results[qid] for qid in answers if qid in results}
@@ -2,6 +2,7 @@ import os
 import logging
 from dotenv import load_dotenv
 from huggingface_hub import InferenceClient
+from llm_engine.response_cache import LLMResponseCache, response_cache
 
 # Load environment variables from .env
 load_dotenv("config/.env.example")
@@ -12,6 +13,8 @@ logger = logging.getLogger(__name__)
 HF_TOKEN = os.getenv("HF_TOKEN")
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "auto")
 LLM_MODEL = os.getenv("LLM_MODEL", "mistralai/Mistral-7B-Instruct-v0.3")
+LLM_TEMPERATURE = 0.7
+LLM_MAX_TOKENS = 300
 
 # Validate token
 if not HF_TOKEN:
@@ -23,10 +26,26 @@ logger.info(f"✅ Using Hugging Face Model: {LLM_MODEL} via {LLM_PROVIDER}")
 # Initialize Hugging Face InferenceClient
 client = InferenceClient(provider=LLM_PROVIDER, api_key=HF_TOKEN)
 
-def generate_llama_response(prompt: str) -> str:
+def generate_llama_response(
+    prompt: str,
+    temperature: float = LLM_TEMPERATURE,
+    max_tokens: int = LLM_MAX_TOKENS,
+    use_cache: bool = True
+) -> str:
     """
     Generates a strategic insight using a chat-compatible LLM (e.g., Mistral via HuggingFace).
+
+    Successful completions are served from / stored in the persistent response cache;
+    pass use_cache=False to always call the model. Error fallbacks are never cached.
     """
+    cache_key = None
+    if use_cache and response_cache:
+        cache_key = LLMResponseCache.make_key(LLM_MODEL, prompt, temperature, max_tokens)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("✅ LLM response served from cache")
+            return cached
+
     try:
         response = client.chat.completions.create(
             model=LLM_MODEL,
@@ -36,10 +55,15 @@ def generate_llama_response(prompt: str) -> str:
                     "content": prompt
                 }
             ],
-            temperature=0.7,
-            max_tokens=300
+            temperature=temperature,
+            max_tokens=max_tokens
         )
-        return response.choices[0].message.content.strip()
+        content = response.choices[0].message.content.strip()
+
+        if cache_key and content:
+            response_cache.set(cache_key, content)
+
+        return content
 
     except Exception as e:
         logger.error(f"❌ LLM call failed: {e}")
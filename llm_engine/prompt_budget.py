@@ -0,0 +1,151 @@
+"""
+Token-budgeted prompt assembly.
+
+Each variable prompt section (company context, retrieved chunks, ...) gets its own token
+budget, and the rendered prompt is held under a total budget by trimming the lowest
+priority sections first. Token counts of every assembled prompt are logged so cost and
+latency regressions show up in the logs.
+"""
+import os
+import logging
+import threading
+from typing import Callable, Dict, List, Tuple, Union
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKEN_ENCODING = os.getenv("PROMPT_TOKEN_ENCODING", "cl100k_base")
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", "3000"))
+PROMPT_COMPANY_CONTEXT_TOKENS = int(os.getenv("PROMPT_COMPANY_CONTEXT_TOKENS", "1500"))
+PROMPT_RETRIEVED_TOKENS = int(os.getenv("PROMPT_RETRIEVED_TOKENS", "800"))
+
+# Rough characters-per-token ratio used when tiktoken is unavailable
+_CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, TIKTOKEN_AVAILABLE
+    if _encoding is None and TIKTOKEN_AVAILABLE:
+        with _encoding_lock:
+            if _encoding is None and TIKTOKEN_AVAILABLE:
+                try:
+                    _encoding = tiktoken.get_encoding(PROMPT_TOKEN_ENCODING)
+                except Exception as e:
+                    logger.warning(f"⚠️ tiktoken encoding unavailable, estimating tokens from length: {e}")
+                    TIKTOKEN_AVAILABLE = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with tiktoken, or estimates them from the text length."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keeps the leading max_tokens of text, cutting back to the last full line when possible.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoding = _get_encoding()
+    if encoding:
+        truncated = encoding.decode(encoding.encode(text)[:max_tokens])
+    else:
+        truncated = text[:max_tokens * _CHARS_PER_TOKEN]
+
+    # Avoid ending mid-sentence if a line break is reasonably close
+    cut = truncated.rfind("\n")
+    if cut > len(truncated) * 0.8:
+        truncated = truncated[:cut]
+    return truncated.rstrip()
+
+
+def select_chunks(chunks: List[str], max_tokens: int) -> List[str]:
+    """
+    Keeps chunks in rank order while they fit in max_tokens; the first chunk that
+    does not fit is truncated into the remaining budget.
+    """
+    selected = []
+    remaining = max_tokens
+    for chunk in chunks:
+        tokens = count_tokens(chunk)
+        if tokens <= remaining:
+            selected.append(chunk)
+            remaining -= tokens
+            continue
+        partial = truncate_to_tokens(chunk, remaining)
+        if partial:
+            selected.append(partial)
+        break
+    return selected
+
+
+def _fit(content: Union[str, List[str]], max_tokens: int) -> str:
+    if isinstance(content, list):
+        return "\n".join(select_chunks(content, max_tokens))
+    return truncate_to_tokens(content, max_tokens)
+
+
+def assemble_prompt(
+    render: Callable[..., str],
+    sections: Dict[str, Tuple[Union[str, List[str]], int]],
+    max_total: int = PROMPT_MAX_TOKENS,
+    label: str = "prompt"
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Fits each section into its budget, renders the prompt and trims sections
+    (lowest priority first) until the whole prompt fits max_total.
+
+    Args:
+        render: Called with one keyword argument per section name, returns the full prompt
+        sections: name → (text or ranked list of chunks, token budget), highest priority first
+        max_total: Token budget for the rendered prompt
+        label: Name used in the token count log line
+
+    Returns:
+        (prompt, token counts per section plus "instructions" and "total")
+    """
+    budgets = {name: budget for name, (_, budget) in sections.items()}
+    fitted = {name: _fit(content, budgets[name]) for name, (content, _) in sections.items()}
+    prompt = render(**fitted)
+    total = count_tokens(prompt)
+
+    # Over the total budget: shrink the lowest-priority sections by the overflow
+    for name in reversed(list(sections)):
+        overflow = total - max_total
+        if overflow <= 0:
+            break
+        used = count_tokens(fitted[name])
+        fitted[name] = _fit(sections[name][0], max(0, used - overflow))
+        prompt = render(**fitted)
+        total = count_tokens(prompt)
+
+    counts = {name: count_tokens(text) for name, text in fitted.items()}
+    counts["instructions"] = max(0, total - sum(counts.values()))
+    counts["total"] = total
+
+    logger.info(
+        f"[PROMPT] {label} tokens: "
+        + ", ".join(f"{name}={value}" for name, value in counts.items())
+        + f" (budget {max_total})"
+    )
+    if total > max_total:
+        logger.warning(f"[PROMPT] {label} exceeds its token budget even with all sections trimmed")
+
+    return prompt, counts
@@ -33,3 +33,45 @@ Keep it professional, direct, and simple. Write only the insight. No introductio
 """.strip()
 
     return prompt
+
+
+def build_batch_prompt(persona, company_name, questions, company_summary="", rag_context="") -> str:
+    """
+    Builds a single prompt asking for the insights of several CARE questions at once,
+    returned as a JSON object keyed by question id. Persona, company and RAG context
+    are included once instead of being repeated for every question.
+
+    Args:
+        questions: list of dicts with "id", "category", "question" and "answer"
+    """
+
+    summary_section = f"Company background:\n{company_summary}\n" if company_summary else ""
+    rag_section = f"Relevant information from their company website or internal documents:\n{rag_context}\n" if rag_context else ""
+
+    question_lines = "\n".join(
+        f'- [{q["id"]}] (CARE Category: {q["category"]}) Question: {q["question"]}\n  Their Answer: {q["answer"]}'
+        for q in questions
+    )
+    example_ids = ", ".join(f'"{q["id"]}": "..."' for q in questions[:2])
+
+    prompt = f"""
+You are an experienced AI consultant. You’re advising a {persona} at {company_name}, who just completed the AI Readiness Diagnostic (CARE framework).
+
+For each question below, analyze what their answer reveals about their organization’s AI maturity and provide an honest, actionable insight.
+
+{summary_section}{rag_section}
+Questions and answers:
+{question_lines}
+
+🎯 For every question, write a short and sharp strategic insight (3–4 sentences max) that:
+- Reflects their current situation based on the answer
+- Highlights potential risks, limitations, or missed opportunities
+- Gives practical advice on what they should prioritize or fix
+- Uses second-person language ("you", "your") — as if speaking directly to them
+- Feels like a real consultant’s human advice — no AI disclaimers, no fluff, no greetings
+
+Respond with ONLY a JSON object mapping each question id to its insight text, e.g. {{{example_ids}}}.
+Include every question id exactly once. No markdown, no code fences, no text outside the JSON.
+""".strip()
+
+    return prompt
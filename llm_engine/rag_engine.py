@@ -1,72 +1,229 @@
-from scraper.selenium_scraper import scrape_company_website
-from vector_store.embedder import split_text_into_documents
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from scraper.crawler import iter_crawled_pages, CRAWL_ENABLED
+from vector_store.embedder import split_text_into_documents, iter_document_batches
 from llm_engine.llama_client import generate_llama_response
+from vector_store.request_index import CompanyContextIndex
+from vector_store.index_registry import IndexRegistry, BEACONAI_NAMESPACE, company_namespace
+from vector_store.near_duplicates import NearDuplicateFilter
+from care.question_bank import CARE_QUESTIONS
+from llm_engine.prompt_budget import assemble_prompt, PROMPT_MAX_TOKENS, PROMPT_COMPANY_CONTEXT_TOKENS, PROMPT_RETRIEVED_TOKENS
+from llm_engine.context_selection import select_context, CONTEXT_SELECTION_ENABLED, CONTEXT_CANDIDATE_FACTOR
 
 # Try to initialize vector store with fallback
 try:
-    from vector_store.faiss_index import VectorStore
-    vector_store = VectorStore()
+    from vector_store.faiss_index import VectorStore, create_embedding_model
+    from vector_store.index_types import index_config_for
+    embedding_model = create_embedding_model()
+
+    def _new_store(index_path: str, namespace: str):
+        # All namespaces share one embedding model; the index type is chosen per namespace
+        return VectorStore(index_path=index_path, embedding_model=embedding_model, index_config=index_config_for(namespace))
+
     print("✅ Vector store initialized successfully")
 except Exception as e:
     print(f"⚠️ Warning: Could not initialize vector store: {e}")
     print("Using simple fallback store...")
     from vector_store.simple_store import SimpleVectorStore
-    vector_store = SimpleVectorStore()
+    embedding_model = None
+
+    def _new_store(index_path: str, namespace: str):
+        return SimpleVectorStore()
+
+# One index per namespace: the BeaconAI knowledge base and each company domain
+index_registry = IndexRegistry(_new_store)
+vector_store = index_registry.get(BEACONAI_NAMESPACE)
+
+# Fixed query used to pull BeaconAI's own offering into the solution section
+SOLUTION_CONTEXT_QUERY = "BeaconAI services and capabilities"
+
+# Every report asks the same CARE questions, so their retrieval (including the candidates
+# over-fetched for context selection) is precomputed per index version
+_STATIC_FETCH_FACTOR = CONTEXT_CANDIDATE_FACTOR if CONTEXT_SELECTION_ENABLED else 1
+if hasattr(vector_store, "register_static_queries"):
+    vector_store.register_static_queries({
+        **{q["question"]: 4 * _STATIC_FETCH_FACTOR for q in CARE_QUESTIONS.values()},
+        SOLUTION_CONTEXT_QUERY: 5 * _STATIC_FETCH_FACTOR
+    })
+
+# "dense" (FAISS only) or "hybrid" (FAISS + BM25 fused by reciprocal rank)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+
+# Ingest-time dedup of repeated headers, banners and CTAs across pages
+INGEST_DEDUP_ENABLED = os.getenv("INGEST_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+INGEST_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("INGEST_NEAR_DUPLICATE_THRESHOLD", "0.85"))
+
+# Passages pulled from the company scrape for each CARE question
+COMPANY_CONTEXT_TOP_K = int(os.getenv("COMPANY_CONTEXT_TOP_K", "4"))
+
+# Recently built company indexes, keyed by a hash of the scraped text
+_COMPANY_INDEX_CACHE_SIZE = 8
+_company_indexes: "OrderedDict[str, CompanyContextIndex]" = OrderedDict()
+_company_indexes_lock = threading.Lock()
 
 def ingest_company_site(company_name: str, url: str) -> int:
     """
-    Scrapes and embeds a company's website content into the FAISS vector store.
+    Crawls a company's website (the given page plus its most relevant same-site pages)
+    and embeds the content into that company's own namespace as pages arrive.
+    Re-ingesting a site only embeds chunks that changed since the last run.
     """
     print(f"🧠 Ingesting content for {company_name} from {url}...")
 
-    text = scrape_company_website(url)
-    if not text or len(text) < 100:
+    batches, dedup = _deduplicated(_iter_page_batches(company_name, iter_crawled_pages(url, discover=CRAWL_ENABLED)))
+    stats = index_registry.upsert_document_stream(company_namespace(url), batches)
+    if not stats["chunks"]:
         raise ValueError("No usable content found.")
 
-    docs = split_text_into_documents(
-        text,
-        metadata={"company": company_name, "source_url": url}
-    )
+    _log_ingest(company_name, stats, dedup)
+    return stats["chunks"]
+
+def _deduplicated(batches):
+    """Wraps a stream of Document batches with the ingest-time duplicate filter."""
+    if not INGEST_DEDUP_ENABLED:
+        return batches, None
+    dedup = NearDuplicateFilter(INGEST_NEAR_DUPLICATE_THRESHOLD)
+    return _content_keyed(dedup.filter_batches(batches)), dedup
+
+def _content_keyed(batches):
+    # A chunk shared by several pages is kept from whichever page the crawler delivers
+    # first; keyed by content alone, it keeps its id when another page wins next time
+    for batch in batches:
+        for doc in batch:
+            doc.metadata["content_keyed"] = True
+        yield batch
+
+def _log_ingest(name: str, stats: dict, dedup):
+    if dedup is not None:
+        stats["dedup"] = dedup.stats()
+    print(f"✅ {name}: {stats}")
 
-    vector_store.build_index(docs)
-    return len(docs)
+def _iter_page_batches(name: str, pages):
+    # Each page is chunked and embedded as soon as the crawler delivers it
+    for page in pages:
+        if len(page["text"]) < 100:
+            continue
+        yield from iter_document_batches(
+            f"From {page['url']}:\n{page['text']}",
+            metadata={"company": name, "source_url": page["url"]},
+            embedding_model=embedding_model
+        )
 
-def ingest_beaconai_context(name: str, urls: list[str]) -> int:
+def ingest_beaconai_context(name: str, urls: list[str], replace: bool = False) -> int:
     """
-    Scrapes multiple BeaconAI pages and stores them as vector context in FAISS.
+    Scrapes multiple BeaconAI pages concurrently and stores them as vector context in FAISS.
+    Pages are upserted by URL, so unchanged pages are not re-embedded; replace=True
+    rebuilds the whole index from these pages instead.
     """
-    all_text = ""
-    for url in urls:
-        text = scrape_company_website(url)
-        all_text += f"\n\nFrom {url}:\n{text}"
+    # Every listed page is wanted, so no time budget: per-page timeouts bound the run
+    pages = iter_crawled_pages(urls=urls, discover=False, max_pages=len(urls), time_budget=None)
+    batches, dedup = _deduplicated(_iter_page_batches(name, pages))
+
+    if replace:
+        docs = [doc for batch in batches for doc in batch]
+        index_registry.build_index(BEACONAI_NAMESPACE, docs)
+        _log_ingest(name, {"chunks": len(docs)}, dedup)
+        return len(docs)
+
+    stats = index_registry.upsert_document_stream(BEACONAI_NAMESPACE, batches)
+    _log_ingest(name, stats, dedup)
+    return stats["chunks"]
+
+# Returned when nothing relevant can be retrieved
+_DEFAULT_CONTEXT = ["BeaconAI provides AI implementation consulting and training services."]
+
+def _to_texts(relevant_docs) -> list[str]:
+    if not relevant_docs:
+        return list(_DEFAULT_CONTEXT)
+    # Simple store returns strings directly
+    return [doc.page_content if hasattr(doc, 'page_content') else doc for doc in relevant_docs]
 
-    docs = split_text_into_documents(all_text, metadata={"company": name})
-    vector_store.build_index(docs)
-    return len(docs)
+def retrieve_context(query: str, k: int = 4, namespace: str = BEACONAI_NAMESPACE, mode: str = None) -> list[str]:
+    """
+    Retrieves top-k relevant chunks from a namespace's index (the BeaconAI knowledge base by default).
+    mode is "dense" or "hybrid" (defaults to RETRIEVAL_MODE).
+    """
+    return retrieve_context_many([query], k=k, namespace=namespace, mode=mode)[0]
 
-def retrieve_context(query: str, k: int = 4) -> list[str]:
+def retrieve_context_many(queries: list[str], k: int = 4, namespace: str = BEACONAI_NAMESPACE, mode: str = None) -> list[list[str]]:
     """
-    Retrieves top-k relevant chunks from FAISS based on a user query.
+    Retrieves top-k relevant chunks for several queries with one batched embedding and search.
+    The context selected for a static query is kept until the index changes.
     """
+    mode = mode or RETRIEVAL_MODE
+    # Over-fetch so deduplication and MMR still leave k distinct chunks
+    fetch_k = k * CONTEXT_CANDIDATE_FACTOR if CONTEXT_SELECTION_ENABLED else k
+    key = (k, mode, CONTEXT_SELECTION_ENABLED)
     try:
-        relevant_docs = vector_store.search(query, k=k)
-        if hasattr(relevant_docs[0], 'page_content'):
-            return [doc.page_content for doc in relevant_docs]
-        else:
-            # Simple store returns strings directly
-            return relevant_docs
+        store = index_registry.get(namespace)
+        version = getattr(store, "index_version", None)
+        cached = getattr(store, "static_selection", lambda query, key: None)
+        contexts = [cached(query, key) for query in queries]
+        missing = [i for i, context in enumerate(contexts) if context is None]
+        hits = index_registry.search_many_with_vectors(namespace, [queries[i] for i in missing], k=fetch_k, hybrid=mode == "hybrid") if missing else []
     except Exception as e:
         print(f"Warning: Could not retrieve context: {e}")
-        return ["BeaconAI provides AI implementation consulting and training services."]
+        return [list(_DEFAULT_CONTEXT) for _ in queries]
+
+    for i, (docs, query_vector, doc_vectors) in zip(missing, hits):
+        texts = _to_texts(docs)
+        if CONTEXT_SELECTION_ENABLED:
+            # Rank with the vectors the search already has; the model only embeds what it lacks
+            texts = select_context(queries[i], texts, k, embedding_model, query_vector, doc_vectors if docs else None)
+        if hasattr(store, "store_static_selection"):
+            store.store_static_selection(queries[i], key, version, texts)
+        contexts[i] = texts
+    return [list(context) for context in contexts]
+
+def warm_up_retrieval():
+    """
+    Loads the knowledge-base index and precomputes the static CARE queries.
+    Meant to run once in the background at startup.
+    """
+    try:
+        if hasattr(vector_store, "warm_up"):
+            vector_store.warm_up()
+    except Exception as e:
+        print(f"Warning: Could not warm up retrieval: {e}")
+
+def retrieve_company_context_many(company_text: str, queries: list[str], k: int = COMPANY_CONTEXT_TOP_K) -> list[list[str]]:
+    """
+    Retrieves the top-k passages of a company's scraped website for each query.
+    The chunked, embedded site is built once and reused for repeat reports on the same text.
+    """
+    if not company_text or not queries:
+        return [[] for _ in queries]
+
+    key = hashlib.sha256(company_text.encode("utf-8")).hexdigest()
+    with _company_indexes_lock:
+        index = _company_indexes.get(key)
+        if index is not None:
+            _company_indexes.move_to_end(key)
+
+    if index is None:
+        docs = split_text_into_documents(company_text, metadata={"source": "company_website"}, embedding_model=embedding_model)
+        index = CompanyContextIndex(docs, embedding_model)
+        with _company_indexes_lock:
+            _company_indexes[key] = index
+            while len(_company_indexes) > _COMPANY_INDEX_CACHE_SIZE:
+                _company_indexes.popitem(last=False)
+
+    try:
+        return index.search_many(queries, k=k)
+    except Exception as e:
+        print(f"Warning: Could not retrieve company context: {e}")
+        return [index.chunks[:k] for _ in queries]
 
 def generate_solution_section(insight_list: list[str], company_context: str) -> str:
     """
     Generates a BeaconAI solution summary based on user's AI readiness insights and the company's website content.
     """
     summary_text = "\n".join(insight_list)
-    beaconai_context = "\n".join(retrieve_context("BeaconAI services and capabilities", k=5))
+    beaconai_chunks = retrieve_context(SOLUTION_CONTEXT_QUERY, k=5)
 
-    prompt = f"""
+    def render(beaconai_context: str, company_context: str) -> str:
+        return f"""
 You are a BeaconAI solutions consultant.
 
 A client has received the following AI readiness insights:
@@ -93,4 +250,15 @@ And here’s an overview of BeaconAI’s actual services and capabilities:
 This will be used in their official PDF report. Begin directly with the core message.
 """.strip()
 
+    # The insights themselves are never trimmed; the budget leaves room for all of them
+    prompt, _ = assemble_prompt(
+        render,
+        {
+            "beaconai_context": (beaconai_chunks, PROMPT_RETRIEVED_TOKENS),
+            "company_context": (company_context, PROMPT_COMPANY_CONTEXT_TOKENS)
+        },
+        max_total=PROMPT_MAX_TOKENS * 2,
+        label="solution section"
+    )
+
     return generate_llama_response(prompt)
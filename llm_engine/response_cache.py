@@ -0,0 +1,147 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+
+Entries are keyed by a SHA-256 of (model, prompt, temperature, max_tokens) and stored
+in a local SQLite file with a TTL and a total-size bound enforced by LRU eviction.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed LRU cache of LLM completions with TTL and hit/miss counters.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_lru ON llm_responses (last_accessed)")
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Hashes the request parameters that determine a completion."""
+        raw = json.dumps([model, prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response, or None on a miss, an expired entry or a storage error."""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row and now - row[1] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    row = None
+
+                if row:
+                    self._conn.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ LLM cache read failed: {e}")
+                row = None
+
+            if not row:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str):
+        """Stores a response and evicts least recently used entries beyond max_bytes."""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now)
+                )
+                self._evict()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ LLM cache write failed: {e}")
+
+    def _evict(self):
+        # Drop expired entries first, then the least recently used until under the size bound
+        self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_accessed"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and current cache size."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Shared cache instance (None when disabled or the cache file cannot be opened)
+response_cache: Optional[LLMResponseCache] = None
+if LLM_CACHE_ENABLED:
+    try:
+        response_cache = LLMResponseCache()
+    except Exception as e:
+        logger.warning(f"⚠️ LLM response cache disabled: {e}")
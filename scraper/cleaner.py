@@ -0,0 +1,44 @@
+"""
+Turns fetched HTML into the plain text the report pipeline and the RAG chunker use,
+and the links the crawler follows. Shared by the static HTTP fetcher and the Selenium
+scraper so both tiers extract identical text.
+"""
+from typing import List, Tuple
+from urllib.parse import urldefrag, urljoin
+
+from bs4 import BeautifulSoup
+
+# Page chrome that carries no company information
+NOISE_TAGS = ["script", "style", "nav", "footer", "header"]
+
+
+def soup_to_text(soup: BeautifulSoup) -> str:
+    """Removes noise tags from soup (in place) and returns its non-empty lines."""
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    text = soup.get_text(separator="\n").strip()
+    return "\n".join([line.strip() for line in text.splitlines() if line.strip()])
+
+
+def extract_links(soup: BeautifulSoup, base_url: str) -> List[str]:
+    """Absolute http(s) targets of the page's <a href> links, without fragments, in page order."""
+    links = []
+    seen = set()
+    for anchor in soup.find_all("a", href=True):
+        link = urldefrag(urljoin(base_url, anchor["href"].strip()))[0]
+        if link.startswith(("http://", "https://")) and link not in seen:
+            seen.add(link)
+            links.append(link)
+    return links
+
+
+def html_to_text(html: str) -> str:
+    return soup_to_text(BeautifulSoup(html, "html.parser"))
+
+
+def html_to_text_and_links(html: str, base_url: str) -> Tuple[str, List[str]]:
+    # Links first: soup_to_text removes the nav/header/footer that hold most of them
+    soup = BeautifulSoup(html, "html.parser")
+    links = extract_links(soup, base_url)
+    return soup_to_text(soup), links
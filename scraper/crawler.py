@@ -0,0 +1,313 @@
+"""
+Concurrent same-domain crawler for company websites.
+
+Starting from the URL a user typed, the crawler discovers the pages that describe a
+company (about, services, solutions, products, ...) from the pages' own links and
+the site's sitemap.xml, and scrapes them concurrently through scrape_page (scrape
+cache, static fetch, browser fallback). Requests to a host are limited in number
+and spaced out, and the whole crawl stops at a page and a time budget. Pages are
+yielded as they arrive so callers can chunk and embed them while others load.
+"""
+import os
+import re
+import time
+import heapq
+import queue
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, Iterator, List
+from urllib.parse import urlsplit
+
+from scraper.scrape_cache import normalize_url
+from scraper.selenium_scraper import fallback_text, scrape_page, with_scheme
+from scraper.static_fetcher import new_client
+
+logger = logging.getLogger(__name__)
+
+CRAWL_ENABLED = os.getenv("CRAWL_ENABLED", "true").lower() in ("1", "true", "yes")
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "6"))
+CRAWL_TIME_BUDGET_SECONDS = float(os.getenv("CRAWL_TIME_BUDGET_SECONDS", "20"))
+# The start page is waited for at least this long even when the time budget is shorter:
+# a slow site should lose its secondary pages, not its only page (about a full browser render)
+CRAWL_START_PAGE_MIN_SECONDS = float(os.getenv("CRAWL_START_PAGE_MIN_SECONDS", "35"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+# Politeness towards each host: parallel requests, and minimum spacing of request starts
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+CRAWL_PER_HOST_DELAY_SECONDS = float(os.getenv("CRAWL_PER_HOST_DELAY_SECONDS", "0.25"))
+
+# Path words of pages worth reading, with their priority
+_PAGE_KEYWORDS = {
+    "about": 10, "about-us": 10, "company": 9, "who-we-are": 9, "our-story": 8,
+    "services": 9, "solutions": 9, "what-we-do": 9, "capabilities": 8, "offerings": 8,
+    "products": 8, "product": 7, "platform": 7, "features": 6,
+    "industries": 5, "customers": 5, "clients": 5, "case-studies": 5,
+    "mission": 5, "values": 4, "team": 4, "leadership": 4
+}
+_SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".mp4", ".xml", ".css", ".js")
+_SITEMAP_LOC_RE = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+# Child sitemaps followed from a sitemap index
+_MAX_CHILD_SITEMAPS = 3
+
+
+def _site(url: str) -> str:
+    """Host without "www." — pages of one company site share it."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def score_link(url: str, site: str) -> float:
+    """
+    Priority of a discovered link: the best keyword among its path segments, less a
+    little per extra path level. 0 for other sites, files and pages without a keyword.
+    """
+    parts = urlsplit(url)
+    path = parts.path.lower().rstrip("/")
+    if _site(url) != site or path.endswith(_SKIPPED_EXTENSIONS):
+        return 0.0
+    segments = [segment for segment in path.split("/") if segment]
+    best = max((_PAGE_KEYWORDS.get(segment, 0) for segment in segments), default=0)
+    if not best:
+        # Also match compound slugs such as "ai-services" or "company-overview"
+        best = max((weight for word, weight in _PAGE_KEYWORDS.items() for segment in segments if word in segment.split("-")), default=0)
+    if not best:
+        return 0.0
+    return best - 0.5 * (len(segments) - 1) - (0.5 if parts.query else 0.0)
+
+
+class HostLimiter:
+    """Per-host concurrency limit and minimum spacing between request starts."""
+
+    def __init__(self, concurrency: int = CRAWL_PER_HOST_CONCURRENCY, delay: float = CRAWL_PER_HOST_DELAY_SECONDS):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    async def _acquire(self, host: str):
+        slots = self._slots.setdefault(host, asyncio.Semaphore(self.concurrency))
+        await slots.acquire()
+        loop = asyncio.get_running_loop()
+        # Reserve the next start time before sleeping so concurrent waiters queue up behind it
+        start = max(loop.time(), self._next_start.get(host, 0.0))
+        self._next_start[host] = start + self.delay
+        await asyncio.sleep(start - loop.time())
+        return slots
+
+    async def run(self, url: str, coroutine_factory):
+        slots = await self._acquire(urlsplit(url).hostname or "")
+        try:
+            return await coroutine_factory()
+        finally:
+            slots.release()
+
+
+async def _sitemap_links(origin: str, client, limiter: HostLimiter) -> List[str]:
+    """Page URLs listed in origin/sitemap.xml (following a sitemap index one level)."""
+    async def fetch(url: str) -> List[str]:
+        try:
+            response = await limiter.run(url, lambda: client.get(url))
+        except Exception:
+            return []
+        if response.status_code != 200:
+            return []
+        return _SITEMAP_LOC_RE.findall(response.text)
+
+    locs = await fetch(f"{origin}/sitemap.xml")
+    children = [loc for loc in locs if loc.lower().endswith(".xml")][:_MAX_CHILD_SITEMAPS]
+    pages = [loc for loc in locs if not loc.lower().endswith(".xml")]
+    for child_pages in await asyncio.gather(*(fetch(child) for child in children)):
+        pages.extend(child_pages)
+    return pages
+
+
+async def crawl_pages(
+    url: str = None,
+    urls: List[str] = None,
+    discover: bool = True,
+    max_pages: int = CRAWL_MAX_PAGES,
+    time_budget: float = CRAWL_TIME_BUDGET_SECONDS,
+    concurrency: int = CRAWL_CONCURRENCY
+) -> AsyncIterator[dict]:
+    """
+    Scrapes url (and, with discover, its most relevant same-site pages) or a fixed
+    list of urls concurrently, yielding scrape_page results as pages complete.
+
+    Args:
+        url: Start page of a company site
+        urls: Pages to scrape instead of (or in addition to) url
+        discover: Follow relevant links and sitemap.xml entries of url's site
+        max_pages: Pages scraped in total, including the start page
+        time_budget: Seconds after which pending pages are abandoned (None: no limit); the
+            start page gets at least CRAWL_START_PAGE_MIN_SECONDS
+        concurrency: Pages scraped at the same time
+    """
+    seeds = []
+    seen = set()
+    for seed in [with_scheme(u) for u in ([url] if url else []) + list(urls or [])]:
+        if normalize_url(seed) not in seen:
+            seen.add(normalize_url(seed))
+            seeds.append(seed)
+    if not seeds:
+        return
+    # The site is that of the start page after redirects, known once it has loaded;
+    # links found before then wait in deferred
+    site = None if discover and url else _site(seeds[0])
+    deferred: List[str] = []
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + time_budget if time_budget else None
+    # The same deadline on the clock the browser tier's threads can read
+    render_deadline = time.monotonic() + time_budget if time_budget else None
+    # The start page has its own, longer minimum
+    start_budget = max(time_budget, CRAWL_START_PAGE_MIN_SECONDS) if time_budget and url else time_budget
+    start_deadline = loop.time() + start_budget if start_budget else None
+    start_render_deadline = time.monotonic() + start_budget if start_budget else None
+    limiter = HostLimiter()
+    # Max-heap of discovered links by score (negated for heapq); seeds go first in order
+    frontier = [(-float("inf"), order, seed) for order, seed in enumerate(seeds)]
+    heapq.heapify(frontier)
+    scheduled = 0
+    pending = set()
+    start_task = None
+
+    def enqueue(links: List[str]):
+        if site is None:
+            deferred.extend(links)
+            return
+        for link in links:
+            key = normalize_url(link)
+            score = score_link(link, site)
+            if key in seen or score <= 0:
+                continue
+            seen.add(key)
+            heapq.heappush(frontier, (-score, len(seen), link))
+
+    def fill(client):
+        nonlocal scheduled, start_task
+        if deadline is not None and loop.time() >= deadline:
+            return
+        while frontier and scheduled < max_pages and len(pending) < concurrency:
+            _, _, page_url = heapq.heappop(frontier)
+            scheduled += 1
+            is_start = bool(url) and page_url == seeds[0]
+            page_deadline = start_render_deadline if is_start else render_deadline
+            task = asyncio.ensure_future(limiter.run(page_url, lambda page_url=page_url, page_deadline=page_deadline: scrape_page(page_url, client, page_deadline)))
+            task.page_url = page_url
+            if is_start:
+                start_task = task
+            pending.add(task)
+
+    async with new_client() as client:
+        sitemap = None
+        if discover and url:
+            parts = urlsplit(seeds[0])
+            sitemap = asyncio.ensure_future(_sitemap_links(f"{parts.scheme}://{parts.netloc}", client, limiter))
+            pending.add(sitemap)
+        fill(client)
+
+        try:
+            while pending:
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    if start_task in pending and start_deadline - loop.time() > 0:
+                        # Over budget: only the start page is still waited for
+                        for task in pending - {start_task}:
+                            task.cancel()
+                        await asyncio.gather(*(pending - {start_task}), return_exceptions=True)
+                        pending.intersection_update({start_task})
+                        remaining = start_deadline - loop.time()
+                    else:
+                        logger.info(f"[CRAWLER] Time budget of {time_budget}s spent, abandoning {len(pending)} pending fetches")
+                        break
+                done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    if task is start_task and site is None:
+                        # Redirects (example.com → www.example.co.uk) decide which links are same-site
+                        failed = task.exception() is not None
+                        site = _site(seeds[0] if failed else task.result()["final_url"])
+                        enqueue(deferred)
+                        deferred.clear()
+                    if task.exception() is not None:
+                        if task is not sitemap:
+                            logger.info(f"[CRAWLER] Skipping {task.page_url}: {task.exception()}")
+                        continue
+                    if task is sitemap:
+                        enqueue(task.result())
+                        continue
+                    page = task.result()
+                    if discover:
+                        enqueue(page["links"])
+                    yield page
+                fill(client)
+        finally:
+            for task in pending:
+                task.cancel()
+            # Cancellation returns at once, also for tasks waiting on a browser thread
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def iter_crawled_pages(url: str = None, urls: List[str] = None, **kwargs) -> Iterator[dict]:
+    """
+    Synchronous view of crawl_pages: the crawl runs on its own event loop in a
+    background thread and pages are yielded here as they complete.
+    """
+    pages: "queue.Queue" = queue.Queue()
+    finished = object()
+
+    async def consume():
+        async for page in crawl_pages(url, urls, **kwargs):
+            pages.put(page)
+
+    def run():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(consume())
+        except Exception as e:
+            pages.put(e)
+        finally:
+            # Signal the end before cleanup: browser renders abandoned at the deadline keep
+            # their executor threads until their own timeouts, and nobody waits for them
+            pages.put(finished)
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()  # Shuts the default executor down without waiting
+
+    threading.Thread(target=run, name="crawler", daemon=True).start()
+    while True:
+        item = pages.get()
+        if item is finished:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def crawl_company_website(url: str, max_pages: int = CRAWL_MAX_PAGES, time_budget: float = CRAWL_TIME_BUDGET_SECONDS) -> str:
+    """
+    Text of a company's start page followed by its most relevant same-site pages, each
+    introduced by its URL. With CRAWL_ENABLED off only the start page is read.
+    """
+    if not CRAWL_ENABLED:
+        max_pages = 1
+
+    start = time.time()
+    url = with_scheme(url)
+    texts = {}
+    try:
+        for page in iter_crawled_pages(url, discover=CRAWL_ENABLED, max_pages=max_pages, time_budget=time_budget):
+            texts[page["url"]] = page["text"]
+    except Exception as e:
+        logger.error(f"[CRAWLER ERROR] Crawl of {url} failed: {e}")
+
+    if not texts:
+        return fallback_text(url)
+
+    logger.info(f"[CRAWLER] Read {len(texts)} pages of {url} in {time.time() - start:.2f}s")
+    if len(texts) == 1:
+        return next(iter(texts.values()))
+    # Start page first, the rest in arrival order
+    ordered = sorted(texts.items(), key=lambda item: item[0] != url)
+    return "\n\n".join(f"From {page_url}:\n{text}" for page_url, text in ordered)
@@ -0,0 +1,250 @@
+"""
+Bounded pool of long-lived headless Chrome drivers for the scraper.
+
+Drivers are leased for one scrape at a time and returned warm instead of being
+launched and quit per URL. Between leases a driver's cookies, storage and extra
+windows are cleared; it is recycled after a number of pages, when its process tree
+grows past an RSS threshold, or when a scrape fails. The pool size bounds both the
+number of concurrent scrapes and the memory Chrome can take.
+"""
+import os
+import time
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from scraper.static_fetcher import USER_AGENT
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_MAX_DRIVERS = int(os.getenv("SCRAPER_MAX_DRIVERS", "2"))
+SCRAPER_PAGES_PER_DRIVER = int(os.getenv("SCRAPER_PAGES_PER_DRIVER", "50"))
+SCRAPER_MAX_DRIVER_RSS_MB = int(os.getenv("SCRAPER_MAX_DRIVER_RSS_MB", "700"))
+SCRAPER_LEASE_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_LEASE_TIMEOUT_SECONDS", "120"))
+SCRAPER_PREWARM_DRIVERS = int(os.getenv("SCRAPER_PREWARM_DRIVERS", "0"))
+SCRAPER_PAGE_LOAD_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_PAGE_LOAD_TIMEOUT_SECONDS", "30"))
+
+
+class DriverPoolTimeout(Exception):
+    """Raised when no driver frees up within the lease timeout."""
+
+
+class PooledDriver:
+    def __init__(self, driver, user_data_dir: str):
+        self.driver = driver
+        self.user_data_dir = user_data_dir
+        self.pages = 0
+        self.created_at = time.time()
+        # Set by the caller when the page left the driver in an unknown state
+        self.broken = False
+        self.page_load_timeout = SCRAPER_PAGE_LOAD_TIMEOUT_SECONDS
+
+    def set_page_load_timeout(self, seconds: float):
+        """Changes the driver's page load timeout (skipping the WebDriver call when unchanged)."""
+        if seconds != self.page_load_timeout:
+            self.driver.set_page_load_timeout(seconds)
+            self.page_load_timeout = seconds
+
+    def rss_bytes(self) -> Optional[int]:
+        """Resident memory of chromedriver and all its Chrome processes (None without psutil)."""
+        if not PSUTIL_AVAILABLE:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            return sum(proc.memory_info().rss for proc in [root, *root.children(recursive=True)])
+        except Exception:
+            return None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class DriverPool:
+    def __init__(
+        self,
+        max_drivers: int = SCRAPER_MAX_DRIVERS,
+        max_pages_per_driver: int = SCRAPER_PAGES_PER_DRIVER,
+        max_rss_bytes: int = SCRAPER_MAX_DRIVER_RSS_MB * 1024 * 1024,
+        lease_timeout: float = SCRAPER_LEASE_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            max_drivers: Upper bound on live drivers, and so on concurrent scrapes
+            max_pages_per_driver: Pages served before a driver is recycled
+            max_rss_bytes: A driver whose process tree exceeds this is recycled
+            lease_timeout: Seconds to wait for a free driver before giving up
+        """
+        self.max_drivers = max_drivers
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_rss_bytes = max_rss_bytes
+        self.lease_timeout = lease_timeout
+
+        self._slots = threading.BoundedSemaphore(max_drivers)
+        self._idle: List[PooledDriver] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.launched = 0
+        self.recycled = 0
+        self.leases = 0
+
+    @staticmethod
+    def _launch() -> PooledDriver:
+        chrome_options = Options()
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-plugins")
+        chrome_options.add_argument("--disable-images")
+        chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
+        # A unique user data directory prevents Chrome session errors between drivers
+        user_data_dir = tempfile.mkdtemp()
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+
+        try:
+            driver = webdriver.Chrome(options=chrome_options)
+        except Exception:
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise
+        driver.set_page_load_timeout(SCRAPER_PAGE_LOAD_TIMEOUT_SECONDS)
+        driver.implicitly_wait(10)
+        return PooledDriver(driver, user_data_dir)
+
+    def _reset(self, pooled: PooledDriver):
+        """Clears per-site state so the next lease starts from a blank page."""
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass  # No storage on error pages / opaque origins
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def _should_recycle(self, pooled: PooledDriver) -> Optional[str]:
+        if pooled.broken:
+            return "error"
+        if pooled.pages >= self.max_pages_per_driver:
+            return f"{pooled.pages} pages"
+        rss = pooled.rss_bytes()
+        if rss is not None and rss > self.max_rss_bytes:
+            return f"RSS {rss // (1024 * 1024)} MB"
+        return None
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        Leases a warm driver for one scrape; blocks while all drivers are busy, for at
+        most timeout seconds (capped by the pool's lease timeout).
+        Exceptions raised inside the block retire the driver.
+        """
+        timeout = self.lease_timeout if timeout is None else max(0.0, min(timeout, self.lease_timeout))
+        if not self._slots.acquire(timeout=timeout):
+            raise DriverPoolTimeout(f"No scraper driver free within {timeout:.1f}s")
+
+        pooled = None
+        try:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                pooled = self._launch()
+                self.launched += 1
+            self.leases += 1
+
+            try:
+                yield pooled
+            except Exception:
+                pooled.broken = True
+                raise
+            finally:
+                pooled.pages += 1
+        finally:
+            if pooled is not None:
+                self._release(pooled)
+            self._slots.release()
+
+    def _release(self, pooled: PooledDriver):
+        reason = "pool closed" if self._closed else self._should_recycle(pooled)
+        if reason is None:
+            try:
+                self._reset(pooled)
+            except Exception as e:
+                reason = f"reset failed: {e}"
+
+        if reason is not None:
+            logger.info(f"[SCRAPER] Recycling driver after {pooled.pages} pages ({reason})")
+            self.recycled += 1
+            pooled.quit()
+            return
+
+        with self._lock:
+            self._idle.append(pooled)
+
+    def warm_up(self, count: int = SCRAPER_PREWARM_DRIVERS):
+        """Launches idle drivers ahead of the first scrapes until count are idle."""
+        target = min(count, self.max_drivers)
+        while True:
+            with self._lock:
+                if len(self._idle) >= target:
+                    return
+            # Holding a slot while launching keeps idle + leased drivers within max_drivers
+            if not self._slots.acquire(blocking=False):
+                return
+            try:
+                pooled = self._launch()
+                self.launched += 1
+                with self._lock:
+                    self._idle.append(pooled)
+            except Exception as e:
+                logger.warning(f"[SCRAPER] Could not prewarm a driver: {e}")
+                return
+            finally:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            "max_drivers": self.max_drivers,
+            "idle": idle,
+            "launched": self.launched,
+            "recycled": self.recycled,
+            "leases": self.leases
+        }
+
+    def close(self):
+        """Quits every idle driver; leased ones are quit when returned."""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.quit()
+
+
+# Shared pool for the process
+driver_pool = DriverPool()
+atexit.register(driver_pool.close)
@@ -0,0 +1,108 @@
+"""
+Adaptive wait for browser-rendered pages.
+
+Instead of sleeping a fixed time after driver.get(), wait_until_ready() polls
+document.readyState and the length of the page's visible text, and returns once the
+document is complete and the text has stopped changing for a short window, or when
+the deadline passes. The time each site needed is recorded per host so slow sites
+can be spotted and the deadline tuned.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_READY_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_READY_TIMEOUT_SECONDS", "8"))
+SCRAPER_READY_POLL_SECONDS = float(os.getenv("SCRAPER_READY_POLL_SECONDS", "0.1"))
+# The text length must stay unchanged this long before the page counts as rendered
+SCRAPER_STABLE_SECONDS = float(os.getenv("SCRAPER_STABLE_SECONDS", "0.5"))
+
+_READINESS_SCRIPT = "return [document.readyState, document.body ? document.body.innerText.length : 0];"
+
+
+class ReadinessStats:
+    """Per-host record of how long pages took to become ready."""
+
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def record(self, url: str, seconds: float, outcome: str):
+        host = urlsplit(url).hostname or url
+        with self._lock:
+            entry = self._hosts.setdefault(host, {"pages": 0, "total_seconds": 0.0, "max_seconds": 0.0, "deadlines": 0})
+            entry["pages"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["last_seconds"] = seconds
+            if outcome == "deadline":
+                entry["deadlines"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                host: {
+                    "pages": entry["pages"],
+                    "avg_seconds": round(entry["total_seconds"] / entry["pages"], 3),
+                    "max_seconds": round(entry["max_seconds"], 3),
+                    "last_seconds": round(entry["last_seconds"], 3),
+                    "deadlines": entry["deadlines"]
+                }
+                for host, entry in self._hosts.items()
+            }
+
+
+# Shared record for the process
+readiness_stats = ReadinessStats()
+
+
+def wait_until_ready(
+    driver,
+    url: str,
+    timeout: float = SCRAPER_READY_TIMEOUT_SECONDS,
+    poll_interval: float = SCRAPER_READY_POLL_SECONDS,
+    stable_for: float = SCRAPER_STABLE_SECONDS
+) -> Tuple[float, str]:
+    """
+    Blocks until the loaded page is complete and its text length is stable, or until
+    timeout seconds have passed.
+
+    Returns:
+        (seconds waited, "stable" or "deadline")
+    """
+    start = time.monotonic()
+    last_length = -1
+    stable_since = start
+    outcome = "deadline"
+
+    while True:
+        now = time.monotonic()
+        try:
+            state, length = driver.execute_script(_READINESS_SCRIPT)
+        except Exception:
+            state, length = "loading", -1  # Navigating / document being replaced
+
+        if state == "complete":
+            if length != last_length:
+                last_length, stable_since = length, now
+            elif length > 0 and now - stable_since >= stable_for:
+                outcome = "stable"
+                break
+        else:
+            last_length = -1
+
+        if now - start >= timeout:
+            break
+        time.sleep(poll_interval)
+
+    waited = time.monotonic() - start
+    readiness_stats.record(url, waited, outcome)
+    if outcome == "deadline":
+        logger.info(f"[SCRAPER] {url} still changing after {waited:.2f}s, reading it anyway")
+    else:
+        logger.info(f"[SCRAPER] {url} ready after {waited:.2f}s")
+    return waited, outcome
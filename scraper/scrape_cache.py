@@ -0,0 +1,198 @@
+"""
+Persistent cache of scraped page text.
+
+Entries are keyed by a normalized URL (scheme, leading "www.", default port, trailing
+slash, fragment and tracking parameters ignored) and stored in a local SQLite file
+together with the page's ETag/Last-Modified validators. Within the TTL an entry is
+served as is; after it, a conditional request revalidates it and a 304 renews it
+without parsing or rendering the page again.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SCRAPE_CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", "cache/scrapes.sqlite3")
+# Entries younger than this are served without contacting the site
+SCRAPE_CACHE_TTL_SECONDS = int(os.getenv("SCRAPE_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Entries older than this are dropped even if the site would still revalidate them
+SCRAPE_CACHE_MAX_AGE_SECONDS = int(os.getenv("SCRAPE_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+
+_TRACKING_PARAMS = {"gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "ref", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of url for cache keys: host lowercased without "www." or default
+    port, no scheme, fragment or trailing slash, tracking parameters removed and the
+    remaining query parameters sorted.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/")
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in _TRACKING_PARAMS
+    )
+    return host + path + (f"?{urlencode(query)}" if query else "")
+
+
+class ScrapeCache:
+    """
+    SQLite-backed cache of extracted page text with TTL, HTTP validators and hit/miss counters.
+    """
+
+    def __init__(self, path: str = SCRAPE_CACHE_PATH, ttl_seconds: int = SCRAPE_CACHE_TTL_SECONDS, max_age_seconds: int = SCRAPE_CACHE_MAX_AGE_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrapes (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                tier TEXT,
+                links TEXT,
+                final_url TEXT,
+                fetched_at REAL NOT NULL,
+                validated_at REAL NOT NULL
+            )
+        """)
+        # Caches created before links (and redirect targets) were stored
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(scrapes)")}
+        if "links" not in columns:
+            self._conn.execute("ALTER TABLE scrapes ADD COLUMN links TEXT")
+        if "final_url" not in columns:
+            self._conn.execute("ALTER TABLE scrapes ADD COLUMN final_url TEXT")
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Returns the entry for url with a "fresh" flag, or None on a miss. Stale entries
+        are returned too so the caller can revalidate them.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT text, etag, last_modified, tier, fetched_at, validated_at, links, final_url FROM scrapes WHERE key = ?",
+                    (self.make_key(url),)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Scrape cache read failed: {e}")
+                row = None
+
+            if row and now - row[4] > self.max_age_seconds:
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+
+            fresh = now - row[5] <= self.ttl_seconds
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale += 1
+            return {
+                "text": row[0],
+                "etag": row[1],
+                "last_modified": row[2],
+                "tier": row[3],
+                "fetched_at": row[4],
+                "validated_at": row[5],
+                "links": json.loads(row[6]) if row[6] else [],
+                "final_url": row[7] or url,
+                "fresh": fresh,
+                # Without validators a stale entry can only be refetched
+                "revalidatable": bool(row[1] or row[2])
+            }
+
+    def set(self, url: str, text: str, etag: str = None, last_modified: str = None, tier: str = None, links: List[str] = None, final_url: str = None):
+        """
+        Stores freshly scraped text (with the page's links and the URL it redirected to)
+        and drops entries past the maximum age.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO scrapes (key, url, text, etag, last_modified, tier, links, final_url, fetched_at, validated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.make_key(url), url, text, etag, last_modified, tier, json.dumps(links or []), final_url or url, now, now)
+                )
+                self._conn.execute("DELETE FROM scrapes WHERE fetched_at < ?", (now - self.max_age_seconds,))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Scrape cache write failed: {e}")
+
+    def mark_revalidated(self, url: str):
+        """Restarts the TTL of an entry the site confirmed unchanged (HTTP 304)."""
+        with self._lock:
+            try:
+                self._conn.execute("UPDATE scrapes SET validated_at = ? WHERE key = ?", (time.time(), self.make_key(url)))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Scrape cache write failed: {e}")
+            self.revalidated += 1
+
+    def stats(self) -> dict:
+        """Returns hit/revalidation/miss counters and current cache size."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM scrapes"
+            ).fetchone()
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "text_chars": total,
+            "ttl_seconds": self.ttl_seconds,
+            "max_age_seconds": self.max_age_seconds
+        }
+
+
+# Shared cache instance (None when disabled or the cache file cannot be opened)
+scrape_cache: Optional[ScrapeCache] = None
+if SCRAPE_CACHE_ENABLED:
+    try:
+        scrape_cache = ScrapeCache()
+    except Exception as e:
+        logger.warning(f"⚠️ Scrape cache disabled: {e}")
@@ -1,77 +1,137 @@
-import logging
 import time
-import tempfile
-import shutil
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+import httpx
+
+from scraper.cleaner import html_to_text_and_links
+from scraper.driver_pool import SCRAPER_PAGE_LOAD_TIMEOUT_SECONDS, driver_pool
+from scraper.page_readiness import SCRAPER_READY_TIMEOUT_SECONDS, wait_until_ready
+from scraper.scrape_cache import scrape_cache
+from scraper.static_fetcher import SCRAPER_STATIC_ENABLED, StaticPage, conditional_headers, fetch_static
 
 logger = logging.getLogger(__name__)
 
-def scrape_company_website(url: str) -> str:
+
+def with_scheme(url: str) -> str:
+    # Both httpx and Chrome need an explicit scheme; users often type a bare domain
+    url = url.strip()
+    return url if "://" in url else f"https://{url}"
+
+
+async def _scrape_static(url: str, client: Optional[httpx.AsyncClient], cached: dict = None) -> Optional[StaticPage]:
+    """Plain HTTP fetch, conditional when a cached copy has validators; None when it failed outright."""
+    headers = conditional_headers(cached["etag"], cached["last_modified"]) if cached else None
+    try:
+        return await fetch_static(url, client, headers)
+    except Exception as e:
+        logger.info(f"[SCRAPER] Static fetch failed for {url}: {e}")
+        return None
+
+
+def render_with_browser(url: str, deadline: Optional[float] = None) -> Tuple[str, str]:
     """
-    Uses Selenium to scrape JS-rendered company websites and extract clean text.
-    
-    Args:
-        url (str): The URL of the company website or About page.
+    Renders url in a pooled Chrome driver; returns (page source, final URL).
+    With a deadline (time.monotonic()), waiting for a driver, loading the page and
+    waiting for it to settle all stop by then.
+    """
+    def remaining(limit: float) -> float:
+        if deadline is None:
+            return limit
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError(f"Scrape budget spent before rendering {url}")
+        return min(limit, left)
 
-    Returns:
-        str: Extracted readable text content from the page.
+    # Lease a warm driver instead of launching Chrome for every URL
+    with driver_pool.lease(timeout=None if deadline is None else remaining(float("inf"))) as pooled:
+        pooled.set_page_load_timeout(remaining(SCRAPER_PAGE_LOAD_TIMEOUT_SECONDS))
+        pooled.driver.get(url)
+        wait_until_ready(pooled.driver, url, timeout=remaining(SCRAPER_READY_TIMEOUT_SECONDS))
+        return pooled.driver.page_source, pooled.driver.current_url
+
+
+def _store(url: str, text: str, links: list, page: Optional[StaticPage], tier: str, final_url: str):
+    if scrape_cache and text:
+        # Validators come from the static response, also for pages that then needed the browser
+        etag, last_modified = (page.etag, page.last_modified) if page is not None else (None, None)
+        scrape_cache.set(url, text, etag, last_modified, tier, links, final_url)
+
+
+def _result(url: str, text: str, links: list, source: str, final_url: str = None) -> dict:
+    return {"url": url, "final_url": final_url or url, "text": text, "links": links, "source": source}
+
+
+async def scrape_page(url: str, client: httpx.AsyncClient = None, deadline: Optional[float] = None) -> dict:
     """
+    Extracts clean text and links from one page: from the scrape cache when fresh (or
+    revalidated by a 304), else a plain HTTP fetch, and Selenium only when that yields
+    too little text or a JavaScript-rendered shell. A deadline (time.monotonic())
+    bounds the browser tier, whose thread cannot be cancelled.
 
-    driver = None
-    user_data_dir = None
+    Returns:
+        dict with url, final_url (after redirects), text, links and source ("cache", "revalidated", "static",
+        "browser", or "stale"/"partial" when scraping failed but some text was known)
+
+    Raises:
+        The scraping error when no text at all could be obtained.
+    """
+    url = with_scheme(url)
+    cached = scrape_cache.get(url) if scrape_cache else None
+    if cached and cached["fresh"]:
+        logger.info(f"[SCRAPER] Cache hit for {url} ({len(cached['text'])} characters).")
+        return _result(url, cached["text"], cached["links"], "cache", cached["final_url"])
 
+    page = None
     try:
         logger.info(f"[SCRAPER] Scraping: {url}")
 
-        # Set up headless browser with additional stability options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-images")
-        chrome_options.add_argument("--disable-javascript")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Linux; x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36")
-
-        # Create a unique user data directory to prevent Chrome session errors
-        user_data_dir = tempfile.mkdtemp()
-        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-
-        # Initialize driver with timeout
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.set_page_load_timeout(30)
-        driver.implicitly_wait(10)
-        
-        driver.get(url)
-        time.sleep(4)  # Wait for JS content to load
-
-        # Parse content with BeautifulSoup
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Remove noise (JS, CSS, Nav, etc.)
-        for tag in soup(["script", "style", "nav", "footer", "header"]):
-            tag.decompose()
-
-        text = soup.get_text(separator="\n").strip()
-        text = "\n".join([line.strip() for line in text.splitlines() if line.strip()])
-
-        logger.info(f"[SCRAPER] Extracted {len(text)} characters.")
-        return text
+        if SCRAPER_STATIC_ENABLED:
+            page = await _scrape_static(url, client, cached if cached and cached["revalidatable"] else None)
+            if page is not None and page.not_modified:
+                logger.info(f"[SCRAPER] {url} not modified, reusing cached text.")
+                scrape_cache.mark_revalidated(url)
+                return _result(url, cached["text"], cached["links"], "revalidated", cached["final_url"])
+            if page is not None and not page.needs_browser:
+                logger.info(f"[SCRAPER] Extracted {len(page.text)} characters (static).")
+                _store(url, page.text, page.links, page, "static", page.url)
+                return _result(url, page.text, page.links, "static", page.url)
+            if page is not None:
+                logger.info(f"[SCRAPER] Escalating {url} to browser: {page.escalate_reason}")
+
+        page_source, final_url = await asyncio.to_thread(render_with_browser, url, deadline)
+        text, links = html_to_text_and_links(page_source, final_url)
+        logger.info(f"[SCRAPER] Extracted {len(text)} characters (browser).")
+        _store(url, text, links, page, "browser", final_url)
+        return _result(url, text, links, "browser", final_url)
 
     except Exception as e:
         logger.error(f"[SCRAPER ERROR] Failed to scrape {url}: {e}")
+        # A stale copy, or whatever the static fetch found, beats having nothing
+        if cached:
+            return _result(url, cached["text"], cached["links"], "stale", cached["final_url"])
+        if page is not None and page.text:
+            return _result(url, page.text, page.links, "partial", page.url)
+        raise
+
+
+def fallback_text(url: str) -> str:
+    return f"Company website: {url}. Unable to extract detailed content due to technical limitations, but this appears to be a legitimate business website."
+
+
+def scrape_company_website(url: str) -> str:
+    """
+    Extracts clean text from a single company web page (see scrape_page for the tiers).
+    
+    Args:
+        url (str): The URL of the company website or About page.
+
+    Returns:
+        str: Extracted readable text content from the page.
+    """
+    try:
+        return asyncio.run(scrape_page(url))["text"]
+    except Exception:
         # Return fallback content instead of empty string
-        return f"Company website: {url}. Unable to extract detailed content due to technical limitations, but this appears to be a legitimate business website."
-
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
-        if user_data_dir:
-            shutil.rmtree(user_data_dir, ignore_errors=True)
+        return fallback_text(url)
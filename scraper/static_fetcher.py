@@ -0,0 +1,143 @@
+"""
+Plain HTTP fast path for the scraper.
+
+Most company pages are server-rendered, so an async httpx GET plus BeautifulSoup
+yields the same text as a browser in a fraction of the time. needs_browser() decides
+when that text cannot be trusted (too short, or a JavaScript app shell) and the
+caller should escalate to Selenium.
+"""
+import os
+import logging
+from typing import List, Optional
+
+import httpx
+from bs4 import BeautifulSoup
+
+from scraper.cleaner import extract_links, soup_to_text
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_STATIC_ENABLED = os.getenv("SCRAPER_STATIC_ENABLED", "true").lower() in ("1", "true", "yes")
+SCRAPER_STATIC_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_STATIC_TIMEOUT_SECONDS", "10"))
+# Less extracted text than this is treated as a page that needs JavaScript
+SCRAPER_MIN_STATIC_TEXT_CHARS = int(os.getenv("SCRAPER_MIN_STATIC_TEXT_CHARS", "400"))
+
+USER_AGENT = "Mozilla/5.0 (Linux; x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+REQUEST_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+# Mount points of client-side rendered apps (React, Vue, Next.js, Nuxt, Gatsby, Angular)
+_APP_ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby"}
+_APP_ROOT_TAGS = ["app-root"]
+
+
+class StaticPage:
+    def __init__(self, url: str, status: int, headers: dict, text: str, escalate_reason: Optional[str], links: List[str] = None):
+        self.url = url  # Final URL after redirects
+        self.status = status
+        self.headers = headers
+        self.text = text
+        self.links = links or []
+        # Why this page should be rendered in a browser instead; None when the text is usable
+        self.escalate_reason = escalate_reason
+
+    @property
+    def needs_browser(self) -> bool:
+        return self.escalate_reason is not None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+
+
+def _has_visible_text(node) -> bool:
+    return any(string.strip() for string in node.find_all(string=True) if string.parent.name not in ("script", "style"))
+
+
+def js_shell_reason(soup: BeautifulSoup) -> Optional[str]:
+    """
+    Looks for an empty SPA mount point or a <noscript> asking for JavaScript.
+    soup must be the unmodified document (before noise tags are removed).
+    """
+    for node in soup.find_all(id=lambda value: value in _APP_ROOT_IDS) + soup.find_all(_APP_ROOT_TAGS):
+        if not _has_visible_text(node):
+            return f"empty app root <{node.name} id={node.get('id')}>"
+    for node in soup.find_all("noscript"):
+        if "javascript" in node.get_text(" ", strip=True).lower():
+            return "noscript asks for JavaScript"
+    return None
+
+
+def needs_browser(text: str, shell_reason: Optional[str] = None, min_chars: int = SCRAPER_MIN_STATIC_TEXT_CHARS) -> Optional[str]:
+    """Returns why statically extracted text should not be trusted, or None."""
+    if len(text) < min_chars:
+        return f"only {len(text)} characters of text"
+    # A shell with some boilerplate text still hides the real content; plenty of text means SSR
+    if shell_reason and len(text) < 4 * min_chars:
+        return shell_reason
+    return None
+
+
+def new_client(**kwargs) -> httpx.AsyncClient:
+    """AsyncClient configured for page fetches (browser-like headers, redirects, timeout)."""
+    return httpx.AsyncClient(
+        headers=REQUEST_HEADERS,
+        follow_redirects=True,
+        timeout=SCRAPER_STATIC_TIMEOUT_SECONDS,
+        **kwargs
+    )
+
+
+def conditional_headers(etag: str = None, last_modified: str = None) -> dict:
+    """If-None-Match / If-Modified-Since headers for revalidating a cached page."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+async def fetch_static(url: str, client: httpx.AsyncClient = None, headers: dict = None) -> StaticPage:
+    """
+    Fetches url without a browser and extracts its text.
+
+    Network errors propagate; HTTP errors, non-HTML responses and pages that look
+    JavaScript-rendered come back with escalate_reason set. With conditional headers
+    an unchanged page comes back as a 304 (not_modified) without text.
+    """
+    if client is None:
+        async with new_client() as own_client:
+            return await fetch_static(url, own_client, headers)
+
+    response = await client.get(url, headers=headers)
+    headers = dict(response.headers)
+    final_url = str(response.url)
+
+    if response.status_code == 304:
+        return StaticPage(final_url, response.status_code, headers, "", None)
+
+    if response.status_code >= 400:
+        # Bot protection often answers plain clients with 403/429 but lets browsers through
+        return StaticPage(final_url, response.status_code, headers, "", f"HTTP {response.status_code}")
+
+    content_type = response.headers.get("content-type", "")
+    if "html" not in content_type:
+        return StaticPage(final_url, response.status_code, headers, "", f"content type {content_type or 'unknown'}")
+
+    soup = BeautifulSoup(response.text, "html.parser")
+    shell_reason = js_shell_reason(soup)
+    links = extract_links(soup, final_url)
+    text = soup_to_text(soup)
+    return StaticPage(final_url, response.status_code, headers, text, needs_browser(text, shell_reason), links)
@@ -0,0 +1,4 @@
+import os
+
+# llm_engine.llama_client refuses to import without a token; tests never call the API
+os.environ.setdefault("HF_TOKEN", "test-token")
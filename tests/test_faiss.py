@@ -0,0 +1,267 @@
+import os
+import hashlib
+import threading
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import vector_store.faiss_index as faiss_index
+from vector_store.embedding_cache import CachedEmbeddings, EmbeddingCache
+from vector_store.faiss_index import PENDING_OPS_FILE, VectorStore
+from vector_store.index_registry import IndexRegistry
+from vector_store.index_storage import embedding_signature, saved_embedding_signature
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic bag-of-words vectors; counts the texts it embeds."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.embedded = 0
+
+    def _vector(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+        return (vector / (np.linalg.norm(vector) or 1)).tolist()
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def _doc(text: str, source: str = "https://example.com/about") -> Document:
+    return Document(page_content=text, metadata={"source_url": source})
+
+
+def _store(path) -> VectorStore:
+    return VectorStore(str(path), FakeEmbeddings())
+
+
+def _texts(docs):
+    return [doc.page_content for doc in docs]
+
+
+def test_add_documents_embeds_only_new_chunks(tmp_path):
+    store = _store(tmp_path)
+    assert store.add_documents([_doc("ai strategy consulting"), _doc("data readiness audit")]) == 2
+    store.embedding_model.embedded = 0
+
+    assert store.add_documents([_doc("ai strategy consulting"), _doc("model governance training")]) == 1
+    assert store.embedding_model.embedded == 1
+    assert _texts(store.search("model governance training", k=1)) == ["model governance training"]
+
+
+def test_upsert_deletes_stale_chunks_of_reingested_sources(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_documents([_doc("old services page"), _doc("shared footer text"), _doc("careers page", "https://example.com/jobs")])
+
+    stats = store.upsert_documents([_doc("new services page"), _doc("shared footer text")])
+
+    assert stats == {"chunks": 2, "added": 1, "removed": 1, "unchanged": 1}
+    texts = _texts(store.search("page text", k=10))
+    assert "old services page" not in texts
+    assert {"new services page", "shared footer text", "careers page"} <= set(texts)
+
+
+def test_deleted_documents_are_hidden_until_added_again(tmp_path):
+    store = _store(tmp_path)
+    store.add_documents([_doc("ai strategy consulting"), _doc("data readiness audit")])
+    doc_id = faiss_index.document_id(_doc("data readiness audit"))
+
+    assert store.delete_documents([doc_id]) == 1
+    assert "data readiness audit" not in _texts(store.search("data readiness audit", k=5))
+
+    # Re-adding before compaction revives the tombstoned vector instead of embedding it again
+    store.embedding_model.embedded = 0
+    assert store.add_documents([_doc("data readiness audit")]) == 1
+    assert store.embedding_model.embedded == 0
+    assert _texts(store.search("data readiness audit", k=1)) == ["data readiness audit"]
+
+
+def test_pending_ops_are_replayed_on_load(tmp_path):
+    store = _store(tmp_path)
+    store.build_index([_doc("ai strategy consulting"), _doc("data readiness audit")])
+    store.add_documents([_doc("model governance training")])
+    store.delete_documents([faiss_index.document_id(_doc("data readiness audit"))])
+    assert os.path.exists(tmp_path / PENDING_OPS_FILE)
+
+    reloaded = _store(tmp_path)
+    reloaded.warm_up()
+    # Logged vectors are replayed, not re-embedded
+    assert reloaded.embedding_model.embedded == 0
+    texts = _texts(reloaded.search("training audit consulting", k=5))
+    assert sorted(texts) == ["ai strategy consulting", "model governance training"]
+
+
+def test_compaction_removes_tombstones_and_clears_the_log(tmp_path):
+    store = _store(tmp_path)
+    store.build_index([_doc(f"chunk number {i}") for i in range(5)])
+    store.delete_documents([faiss_index.document_id(_doc("chunk number 3"))])
+
+    store.compact()
+
+    assert store.vector_db.index.ntotal == 4
+    assert not store._tombstones
+    assert not os.path.exists(tmp_path / PENDING_OPS_FILE)
+    reloaded = _store(tmp_path)
+    assert "chunk number 3" not in _texts(reloaded.search("chunk number 3", k=5))
+
+
+def test_compact_in_background_runs_one_compaction_at_a_time(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def slow_compact():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(store, "compact", slow_compact)
+    store.compact_in_background()
+    assert started.wait(5)
+    store.compact_in_background()
+    assert store.is_compacting()
+    release.set()
+    for _ in range(100):
+        if not store.is_compacting():
+            break
+        time.sleep(0.01)
+    assert runs == [1]
+    assert not store.is_compacting()
+
+
+def test_concurrent_first_searches_load_the_index_once(tmp_path, monkeypatch):
+    _store(tmp_path).build_index([_doc("ai strategy consulting"), _doc("data readiness audit")])
+    store = _store(tmp_path)
+    loads = []
+    load_vector_db = faiss_index.load_vector_db
+
+    def counting_load(*args, **kwargs):
+        loads.append(1)
+        return load_vector_db(*args, **kwargs)
+
+    monkeypatch.setattr(faiss_index, "load_vector_db", counting_load)
+    threads = [threading.Thread(target=store.search, args=("ai strategy",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == [1]
+
+
+def test_registry_does_not_unload_namespaces_in_use(tmp_path):
+    registry = IndexRegistry(lambda path, namespace: _store(path), root=str(tmp_path), memory_budget_bytes=0)
+    registry.build_index("company_a", [_doc("ai strategy consulting")])
+    registry.build_index("company_b", [_doc("data readiness audit")])
+    assert not registry.get("company_a").is_loaded()
+
+    registry.search("company_a", "ai strategy")
+    with registry._using("company_a"):
+        # Over budget, but company_a is being searched
+        registry.search("company_b", "data readiness")
+        assert registry.get("company_a").is_loaded()
+    registry.search("company_b", "data readiness")
+    assert not registry.get("company_a").is_loaded()
+    assert _texts(registry.search("company_a", "ai strategy", k=1)) == ["ai strategy consulting"]
+
+
+def test_reingest_keeps_shared_chunks_whatever_the_page_order(tmp_path):
+    from llm_engine.rag_engine import _deduplicated
+
+    footer = "Contact our team today to start your AI transformation journey with us"
+    pages = {
+        "https://example.com/about": ["We are an AI consultancy founded in 2019", footer],
+        "https://example.com/services": ["We offer readiness audits and strategy workshops", footer]
+    }
+
+    def ingest(store, order):
+        batches = [[_doc(text, url) for text in pages[url]] for url in order]
+        return store.upsert_document_stream(_deduplicated(batches)[0])
+
+    store = _store(tmp_path)
+    assert ingest(store, list(pages))["added"] == 3
+    stats = ingest(store, list(reversed(list(pages))))
+    assert stats["added"] == 0 and stats["removed"] == 0
+
+
+def test_index_embedded_with_another_model_is_re_embedded_on_load(tmp_path):
+    old_model = FakeEmbeddings()
+    old_model.model_name = "old-model"
+    VectorStore(str(tmp_path), old_model).build_index([_doc("ai strategy consulting"), _doc("data readiness audit")])
+    assert saved_embedding_signature(str(tmp_path)) == {"embedding_backend": "pytorch", "embedding_model": "old-model"}
+
+    store = _store(tmp_path)
+    store.warm_up()
+
+    assert store.embedding_model.embedded == 2
+    assert saved_embedding_signature(str(tmp_path))["embedding_model"] == "FakeEmbeddings"
+    assert _texts(store.search("data readiness audit", k=1)) == ["data readiness audit"]
+
+
+class _FakeTokenizer:
+    """Token ids are word lengths; padded batches with an attention mask, like a HF tokenizer."""
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        ids = [[len(word) for word in text.split()][:max_length] for text in texts]
+        width = max(len(row) for row in ids)
+        return {
+            "input_ids": np.array([row + [0] * (width - len(row)) for row in ids]),
+            "attention_mask": np.array([[1] * len(row) + [0] * (width - len(row)) for row in ids]),
+            "token_type_ids": np.zeros((len(ids), width), dtype=np.int64)
+        }
+
+
+class _FakeSession:
+    """Token embedding = (id, 1): padding rows would shift the mean if they were pooled."""
+
+    def __init__(self):
+        self.batches = []
+
+    def run(self, outputs, inputs):
+        self.batches.append(len(inputs["input_ids"]))
+        ids = inputs["input_ids"].astype(np.float32)
+        return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+
+def test_onnx_embeddings_mean_pool_real_tokens_and_keep_input_order():
+    from vector_store.onnx_embeddings import OnnxEmbeddings
+
+    # The tokenizer and inference session are the only parts touching onnxruntime/transformers
+    model = OnnxEmbeddings.__new__(OnnxEmbeddings)
+    model.model_name, model.max_seq_length, model.batch_size = "tiny#onnx-int8", 8, 2
+    model.tokenizer, model.session = _FakeTokenizer(), _FakeSession()
+    model._input_names = {"input_ids", "attention_mask"}
+
+    vectors = model.embed_documents(["abc abc", "a", "abcd ab abcdef"])
+
+    def unit(x, y):
+        return np.array([x, y]) / np.hypot(x, y)
+
+    np.testing.assert_allclose(vectors[0], unit(3, 1), rtol=1e-6)
+    np.testing.assert_allclose(vectors[1], unit(1, 1), rtol=1e-6)
+    np.testing.assert_allclose(vectors[2], unit(4, 1), rtol=1e-6)
+    assert model.session.batches == [2, 1]
+    np.testing.assert_allclose(model.embed_query("abc abc"), vectors[0])
+    assert embedding_signature(model) == {"embedding_backend": "onnx", "embedding_model": "tiny#onnx-int8"}
+
+
+def test_queries_bypass_the_embedding_cache_but_are_rounded_like_chunks(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"))
+    model = CachedEmbeddings(FakeEmbeddings(), cache)
+    store = VectorStore(str(tmp_path / "index"), model)
+    store.build_index([_doc("ai strategy consulting"), _doc("data readiness audit")])
+
+    store.search("governance of ai models", k=1)
+    store.search_many(["strategy", "readiness"], k=1)
+
+    assert cache.stats()["models"]["FakeEmbeddings"]["entries"] == 2
+    vector = np.asarray(model.embed_query("ai strategy consulting"), dtype=np.float32)
+    np.testing.assert_array_equal(vector, vector.astype(np.float16).astype(np.float32))
+    np.testing.assert_array_equal(vector, model.embed_documents(["ai strategy consulting"])[0])
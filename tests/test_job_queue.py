@@ -0,0 +1,111 @@
+import json
+import time
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes import report
+from api.schemas.report_schema import ReportRequest, ReportResponse
+from api.utils.job_queue import ReportJobQueue
+
+REQUEST = {
+    "user_name": "Ada Lovelace",
+    "company_name": "Acme",
+    "company_website": "acme.com",
+    "persona": "CTO",
+    "insights": {"C1": "We run a few pilots."},
+    "user_email": "ada@acme.com"
+}
+
+
+def fake_runner(data, client_host, user_agent, on_stage):
+    on_stage("scraping")
+    return ReportResponse(status="success", filename=f"{data.company_name}.pdf", pdf_content="JVBERg==")
+
+
+def _wait_for(queue, job_id, status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} is {queue.get(job_id)['status']}, expected {status}")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    queue = ReportJobQueue(db_path=str(tmp_path / "jobs.sqlite3"), num_workers=1, runner=fake_runner)
+    monkeypatch.setattr(report, "report_job_queue", queue)
+    app = FastAPI()
+    app.include_router(report.router, prefix="/report")
+    return TestClient(app)
+
+
+def test_submitted_job_runs_to_completion(client):
+    response = client.post("/report/jobs", json=REQUEST)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    _wait_for(report.report_job_queue, job_id, "completed")
+    status = client.get(f"/report/jobs/{job_id}").json()
+    assert status["progress"] == 1.0
+    assert status["result"]["filename"] == "Acme.pdf"
+    assert client.get(f"/report/jobs/{job_id}/pdf").content == b"%PDF"
+
+
+def test_full_queue_answers_503(client):
+    report.report_job_queue.max_pending = 0
+    response = client.post("/report/jobs", json=REQUEST)
+    assert response.status_code == 503
+
+
+def test_unknown_job_ids_answer_404(client):
+    assert client.get("/report/jobs/does-not-exist").status_code == 404
+    assert client.get("/report/jobs/does-not-exist/pdf").status_code == 404
+
+
+def _insert_running_job(db_path, job_id, owner, lease_expires_at):
+    queue = ReportJobQueue(db_path=db_path, num_workers=1, runner=fake_runner)
+    with queue._connect() as conn:
+        conn.execute(
+            "INSERT INTO report_jobs (id, status, payload, created_at, started_at, owner, lease_expires_at) "
+            "VALUES (?, 'running', ?, ?, ?, ?, ?)",
+            (job_id, json.dumps({"request": REQUEST, "client_host": "test", "user_agent": "test"}), time.time(), time.time(), owner, lease_expires_at)
+        )
+
+
+def test_startup_requeues_only_expired_leases(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    _insert_running_job(db_path, "alive", "other-host:1:live", time.time() + 60)
+    _insert_running_job(db_path, "dead", "other-host:2:gone", time.time() - 1)
+
+    queue = ReportJobQueue(db_path=db_path, num_workers=1, runner=fake_runner)
+
+    # The job of the crashed process is taken over, the live process keeps its own
+    assert _wait_for(queue, "dead", "completed")["owner"] == queue.owner
+    alive = queue.get("alive")
+    assert alive["status"] == "running" and alive["owner"] == "other-host:1:live"
+
+
+def test_heartbeat_keeps_long_jobs_leased(tmp_path):
+    release = threading.Event()
+
+    def slow_runner(data, client_host, user_agent, on_stage):
+        release.wait(5)
+        return fake_runner(data, client_host, user_agent, on_stage)
+
+    db_path = str(tmp_path / "jobs.sqlite3")
+    queue = ReportJobQueue(db_path=db_path, num_workers=1, runner=slow_runner, lease_seconds=0.3)
+    job_id = queue.submit(ReportRequest(**REQUEST))
+    _wait_for(queue, job_id, "running")
+    time.sleep(0.6)
+
+    # Another process opening the queue meanwhile must not take the job over
+    ReportJobQueue(db_path=db_path, num_workers=1, runner=fake_runner)
+    job = queue.get(job_id)
+    assert job["status"] == "running" and job["owner"] == queue.owner
+    release.set()
+    _wait_for(queue, job_id, "completed")
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.utils.report_pipeline as report_pipeline
+import llm_engine.insight_generator as insight_generator
+from api.routes import report
+
+REQUEST = {
+    "user_name": "Ada Lovelace",
+    "company_name": "Acme",
+    "company_website": "acme.com",
+    "persona": "CTO",
+    "insights": {"C1": "We run a few pilots.", "A1": "Teams are curious.", "R1": "Data lives in silos."},
+    "user_email": "ada@acme.com"
+}
+
+
+def _events(body: str):
+    """(event, data) pairs of a text/event-stream body."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The report routes with scraping, retrieval, the LLM, PDF, Sheets and email stubbed out."""
+    pdf_path = tmp_path / "Acme_CTO.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+
+    def fake_llm(prompt, **kwargs):
+        if "Data lives in silos." in prompt:
+            raise RuntimeError("model overloaded")
+        return "Start with one governed pilot."
+
+    monkeypatch.setattr(report_pipeline, "crawl_company_website", lambda url: "Acme builds rockets.")
+    monkeypatch.setattr(report_pipeline, "generate_solution_section", lambda insights, context: "BeaconAI can help.")
+    monkeypatch.setattr(report_pipeline, "generate_pdf_report", lambda **kwargs: str(pdf_path))
+    monkeypatch.setattr(report_pipeline, "save_lead", lambda *args, **kwargs: True)
+    monkeypatch.setattr(report_pipeline, "email_report", lambda *args: (False, "Email not configured", None))
+    monkeypatch.setattr(insight_generator, "generate_llama_response", fake_llm)
+    monkeypatch.setattr(insight_generator, "retrieve_context_many", lambda queries: [["CARE framework."] for _ in queries])
+    monkeypatch.setattr(insight_generator, "retrieve_company_context_many", lambda text, queries: [[text] for _ in queries])
+    monkeypatch.setattr(insight_generator, "INSIGHT_GENERATION_MODE", "per_question")
+
+    app = FastAPI()
+    app.include_router(report.router, prefix="/report")
+    return TestClient(app)
+
+
+def test_stream_emits_stages_insights_and_report(client):
+    response = client.post("/report/generate/stream", json=REQUEST)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+
+    stages = [data["stage"] for event, data in events if event == "stage"]
+    assert stages == ["scraping", "insights", "solution", "pdf", "sheets", "email"]
+    assert events[1] == ("stage", {"stage": "insights", "total": 3})
+
+    insights = {data["question_id"]: data for event, data in events if event == "insight"}
+    assert set(insights) == {"C1", "A1", "R1"}
+    assert insights["C1"]["insight"] == "Start with one governed pilot."
+    assert insights["C1"]["error"] is None
+    # A failing question is reported on its own event, the others still complete
+    assert "model overloaded" in insights["R1"]["error"]
+
+    assert ("solution", {"solution": "BeaconAI can help."}) in events
+    assert events[-1][0] == "report"
+    assert events[-1][1]["download_url"] == "/report/download/Acme_CTO.pdf"
+
+
+def test_stream_ends_with_an_error_event_when_the_pipeline_fails(client, monkeypatch):
+    def failing_crawl(url):
+        raise RuntimeError("site unreachable")
+
+    monkeypatch.setattr(report_pipeline, "crawl_company_website", failing_crawl)
+
+    events = _events(client.post("/report/generate/stream", json=REQUEST).text)
+
+    assert events == [
+        ("stage", {"stage": "scraping"}),
+        ("error", {"detail": "Failed to generate report."})
+    ]
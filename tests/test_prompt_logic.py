@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import llm_engine.insight_generator as insight_generator
+from llm_engine.insight_generator import generate_care_insights, parse_batch_insights
+from llm_engine.prompt_template import build_batch_prompt
+
+ANSWERS = {"C1": "We run a few pilots.", "A1": "Teams are curious.", "R1": "Data lives in silos."}
+
+
+def test_parse_batch_insights_accepts_fenced_json_and_nested_entries():
+    text = '```json\n{"C1": "  Start small.  ", "A1": {"insight": "Train champions."}}\n```'
+    assert parse_batch_insights(text, ["C1", "A1"]) == {"C1": "Start small.", "A1": "Train champions."}
+
+
+def test_parse_batch_insights_drops_unrequested_empty_and_error_entries():
+    text = json.dumps({"C1": "Start small.", "A1": "", "R1": "⚠️ LLM unavailable", "E1": "Not asked for.", "A2": 42})
+    assert parse_batch_insights(text, ["C1", "A1", "R1", "A2"]) == {"C1": "Start small."}
+
+
+@pytest.mark.parametrize("text", ["Sorry, I cannot help with that.", '["C1", "Start small."]', '{"C1": "unterminated'])
+def test_parse_batch_insights_rejects_completions_without_a_json_object(text):
+    with pytest.raises(ValueError):
+        parse_batch_insights(text, ["C1"])
+
+
+def test_batch_prompt_lists_every_question_once():
+    questions = [{"id": qid, "category": qid[0], "question": f"Question {qid}?", "answer": answer} for qid, answer in ANSWERS.items()]
+    prompt = build_batch_prompt("CTO", "Acme", questions, rag_context="CARE framework.")
+    for qid, answer in ANSWERS.items():
+        assert prompt.count(f"Question {qid}?") == 1
+        assert answer in prompt
+    assert prompt.count("CARE framework.") == 1
+
+
+class _LLMCalls(list):
+    """Prompts sent to the LLM; batch prompts are answered with batch_completion."""
+    batch_completion = ""
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = _LLMCalls()
+
+    def fake_llm(prompt, **kwargs):
+        calls.append(prompt)
+        if "max_tokens" in kwargs:
+            return calls.batch_completion
+        return "Per-question insight."
+
+    monkeypatch.setattr(insight_generator, "generate_llama_response", fake_llm)
+    monkeypatch.setattr(insight_generator, "retrieve_context_many", lambda queries: [["CARE framework."] for _ in queries])
+    monkeypatch.setattr(insight_generator, "retrieve_company_context_many", lambda text, queries: [[text] for _ in queries])
+    return calls
+
+
+def test_batch_mode_answers_all_questions_in_one_call(llm_calls):
+    llm_calls.batch_completion = json.dumps({qid: f"Batch insight {qid}." for qid in ANSWERS})
+
+    insights = generate_care_insights("CTO", "Acme", ANSWERS, "Acme builds rockets.", mode="batch")
+
+    assert len(llm_calls) == 1
+    assert list(insights) == list(ANSWERS)
+    assert insights["R1"]["insight"] == "Batch insight R1."
+
+
+def test_batch_mode_falls_back_per_question_for_missing_or_malformed_entries(llm_calls):
+    llm_calls.batch_completion = json.dumps({"C1": "Batch insight C1.", "A1": {"text": "wrong shape"}})
+
+    insights = generate_care_insights("CTO", "Acme", ANSWERS, "Acme builds rockets.", mode="batch")
+
+    assert len(llm_calls) == 3  # the batch call plus A1 and R1 on their own
+    assert list(insights) == list(ANSWERS)
+    assert insights["C1"]["insight"] == "Batch insight C1."
+    assert insights["A1"]["insight"] == insights["R1"]["insight"] == "Per-question insight."
+
+
+def test_unparseable_batch_completion_falls_back_for_every_question(llm_calls):
+    llm_calls.batch_completion = "Here are your insights: C1 is great."
+
+    insights = generate_care_insights("CTO", "Acme", ANSWERS, "Acme builds rockets.", mode="batch")
+
+    assert len(llm_calls) == 1 + len(ANSWERS)
+    assert all(entry["insight"] == "Per-question insight." and entry["error"] is None for entry in insights.values())
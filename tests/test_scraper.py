@@ -0,0 +1,155 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+from bs4 import BeautifulSoup
+
+import scraper.crawler as crawler
+import scraper.selenium_scraper as selenium_scraper
+from scraper.crawler import HostLimiter
+from scraper.static_fetcher import fetch_static, js_shell_reason, needs_browser, new_client
+
+FILLER = " ".join(["We help companies plan and deliver their AI programs."] * 12)
+
+
+def _html(body: str = "", links=()) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return f"<html><body><main><p>{FILLER}</p>{body}{anchors}</main></body></html>"
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """
+    Serves pages from a dict (url → html, or (status, location) for redirects) through
+    httpx.MockTransport; the scrape cache is off and host spacing is disabled.
+    """
+    pages = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        page = pages.get(url, pages.get(url.rstrip("/"), pages.get(url.rstrip("/") + "/")))
+        if page is None:
+            return httpx.Response(404, text="not found")
+        if isinstance(page, tuple):
+            return httpx.Response(page[0], headers={"location": page[1]})
+        return httpx.Response(200, text=page, headers={"content-type": "text/html"})
+
+    monkeypatch.setattr(crawler, "new_client", lambda: new_client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(crawler, "HostLimiter", lambda: HostLimiter(delay=0))
+    monkeypatch.setattr(selenium_scraper, "scrape_cache", None)
+    monkeypatch.setattr(selenium_scraper, "SCRAPER_STATIC_ENABLED", True)
+    return pages
+
+
+def _crawl(url, **kwargs):
+    async def collect():
+        return [page async for page in crawler.crawl_pages(url, **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_crawl_reads_relevant_same_site_pages(site):
+    site["https://acme.com/"] = _html(links=["/about", "/services/consulting", "/blog/post-1", "https://other.com/about"])
+    site["https://acme.com/about"] = _html()
+    site["https://acme.com/services/consulting"] = _html()
+    site["https://acme.com/sitemap.xml"] = "<urlset><url><loc>https://acme.com/company</loc></url></urlset>"
+    site["https://acme.com/company"] = _html()
+
+    urls = {page["url"] for page in _crawl("acme.com", max_pages=6, time_budget=5)}
+
+    assert urls == {"https://acme.com", "https://acme.com/about", "https://acme.com/services/consulting", "https://acme.com/company"}
+
+
+def test_crawl_uses_the_site_the_start_page_redirects_to(site):
+    site["https://acme.com"] = (301, "https://www.acme.co.uk/")
+    site["https://acme.com/sitemap.xml"] = (301, "https://www.acme.co.uk/sitemap.xml")
+    site["https://www.acme.co.uk/"] = _html(links=["/about-us"])
+    site["https://www.acme.co.uk/sitemap.xml"] = "<urlset><url><loc>https://www.acme.co.uk/solutions</loc></url></urlset>"
+    site["https://www.acme.co.uk/about-us"] = _html()
+    site["https://www.acme.co.uk/solutions"] = _html()
+
+    pages = _crawl("https://acme.com", max_pages=6, time_budget=5)
+
+    assert pages[0]["final_url"] == "https://www.acme.co.uk/"
+    assert {page["url"] for page in pages[1:]} == {"https://www.acme.co.uk/about-us", "https://www.acme.co.uk/solutions"}
+
+
+def test_start_page_is_waited_for_beyond_the_time_budget(site, monkeypatch):
+    site["https://acme.com/"] = "<html><body><div id='root'></div></body></html>"
+    deadlines = []
+
+    def slow_render(url, deadline=None):
+        deadlines.append(deadline - time.monotonic())
+        time.sleep(0.5)
+        return _html(), url
+
+    monkeypatch.setattr(selenium_scraper, "render_with_browser", slow_render)
+    monkeypatch.setattr(crawler, "CRAWL_START_PAGE_MIN_SECONDS", 3)
+
+    pages = _crawl("https://acme.com/", discover=False, time_budget=0.2)
+
+    assert [page["source"] for page in pages] == ["browser"]
+    assert deadlines[0] > 2
+
+
+def test_time_budget_abandons_slow_secondary_pages(site, monkeypatch):
+    site["https://acme.com/"] = _html(links=["/about", "/services"])
+    site["https://acme.com/about"] = "<html><body><div id='root'></div></body></html>"
+    site["https://acme.com/services"] = "<html><body><div id='root'></div></body></html>"
+
+    def hanging_render(url, deadline=None):
+        time.sleep(2)
+        return _html(), url
+
+    monkeypatch.setattr(selenium_scraper, "render_with_browser", hanging_render)
+
+    start = time.monotonic()
+    pages = list(crawler.iter_crawled_pages("https://acme.com/", max_pages=3, time_budget=0.5))
+
+    assert time.monotonic() - start < 1.5
+    assert [page["url"] for page in pages] == ["https://acme.com/"]
+
+
+def _soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, "html.parser")
+
+
+def test_js_shell_is_detected_on_an_empty_app_root():
+    shell = _soup("<html><body><noscript>You need to enable JavaScript to run this app.</noscript><div id='root'></div><script src='/main.js'></script></body></html>")
+    assert js_shell_reason(shell) == "empty app root <div id=root>"
+    assert needs_browser("Acme", js_shell_reason(shell)) == "only 4 characters of text"
+
+
+def test_noscript_asking_for_javascript_marks_a_shell():
+    shell = _soup("<html><body><noscript>Please enable JavaScript.</noscript><p>Loading</p></body></html>")
+    assert js_shell_reason(shell) == "noscript asks for JavaScript"
+    # Some boilerplate text does not make a shell trustworthy
+    assert needs_browser("x" * 500, js_shell_reason(shell), min_chars=400) == "noscript asks for JavaScript"
+
+
+def test_server_rendered_page_is_not_sent_to_the_browser():
+    page = _soup(f"<html><body><div id='__next'><main><h1>Acme</h1><p>{FILLER}</p></main></div></body></html>")
+    assert js_shell_reason(page) is None
+    assert needs_browser(FILLER, js_shell_reason(page)) is None
+
+
+def test_hydrated_app_root_with_plenty_of_text_is_trusted():
+    # A server-rendered app may still carry a <noscript> fallback
+    page = _soup(f"<html><body><noscript>Enable JavaScript for the best experience</noscript><div id='root'><p>{FILLER * 3}</p></div></body></html>")
+    assert js_shell_reason(page) == "noscript asks for JavaScript"
+    assert needs_browser(FILLER * 3, js_shell_reason(page), min_chars=400) is None
+
+
+def test_fetch_static_escalates_a_js_shell_but_not_a_server_rendered_page():
+    pages = {
+        "https://spa.example/": "<html><body><div id='app'></div><script src='/app.js'></script></body></html>",
+        "https://ssr.example/": _html()
+    }
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=pages[str(request.url)], headers={"content-type": "text/html"}))
+
+    async def fetch(url):
+        async with new_client(transport=transport) as client:
+            return await fetch_static(url, client)
+
+    assert asyncio.run(fetch("https://spa.example/")).needs_browser
+    assert not asyncio.run(fetch("https://ssr.example/")).needs_browser
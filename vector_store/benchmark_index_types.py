@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the FAISS index types in vector_store/index_types.py on synthetic corpora.
+
+For each corpus size and index type it reports build time, index memory, recall@k
+against exact (flat) search and p50/p99 single-query latency, sweeping nprobe
+(IVF types) and efSearch (HNSW).
+
+Usage:
+    python -m vector_store.benchmark_index_types --sizes 10000,100000,1000000 --k 5
+"""
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+from vector_store.index_types import INDEX_TYPES, IndexConfig, apply_search_params, build_faiss_index, index_memory_bytes
+
+# all-MiniLM-L6-v2 output dimension
+DEFAULT_DIM = 384
+
+
+def synthetic_corpus(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered, L2-normalized vectors (about 20 per topic), closer to sentence embeddings than uniform noise."""
+    clusters = max(16, n // 20)
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found[i] = ids[0]
+    return {
+        "recall": recall_at_k(found, truth),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99))
+    }
+
+
+def run(sizes, kinds, k: int, dim: int, num_queries: int, nprobes, ef_searches):
+    faiss.omp_set_num_threads(1)  # per-query latency as a single request would see it
+    print(f"{'n':>9} {'index':>9} {'param':>14} {'build_s':>8} {'mem_MB':>8} {'recall@' + str(k):>9} {'p50_ms':>8} {'p99_ms':>8}")
+
+    for n in sizes:
+        corpus = synthetic_corpus(n, dim)
+        # Queries are perturbed corpus vectors, like questions about indexed passages
+        rng = np.random.default_rng(1)
+        queries = corpus[rng.integers(0, n, num_queries)] + 0.3 * rng.standard_normal((num_queries, dim)).astype(np.float32) / np.sqrt(dim)
+        faiss.normalize_L2(queries)
+
+        exact = faiss.IndexFlatL2(dim)
+        exact.add(corpus)
+        _, truth = exact.search(queries, k)
+
+        for kind in kinds:
+            start = time.perf_counter()
+            index = build_faiss_index(corpus, IndexConfig(kind))
+            build_seconds = time.perf_counter() - start
+            memory_mb = index_memory_bytes(index) / 1024 / 1024
+
+            if kind in ("ivf_flat", "ivf_pq"):
+                settings = [("nprobe", value, IndexConfig(kind, nprobe=value)) for value in nprobes]
+            elif kind == "hnsw":
+                settings = [("efSearch", value, IndexConfig(kind, ef_search=value)) for value in ef_searches]
+            else:
+                settings = [("exact", "-", IndexConfig(kind))]
+
+            for name, value, config in settings:
+                apply_search_params(index, config)
+                result = measure(index, queries, truth, k)
+                print(
+                    f"{n:>9} {kind:>9} {f'{name}={value}':>14} {build_seconds:>8.2f} {memory_mb:>8.1f} "
+                    f"{result['recall']:>9.3f} {result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f}"
+                )
+
+
+def _int_list(value: str):
+    return [int(part) for part in value.split(",") if part]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall/latency/memory benchmark of FAISS index types")
+    parser.add_argument("--sizes", type=_int_list, default=[10_000, 100_000], help="Corpus sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="Index types to compare")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nprobe", type=_int_list, default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=_int_list, default=[32, 64, 128])
+    args = parser.parse_args()
+
+    run(args.sizes, args.types.split(","), args.k, args.dim, args.queries, args.nprobe, args.ef_search)
@@ -0,0 +1,85 @@
+"""
+Tokenized inverted index with Okapi BM25 scoring.
+
+Posting lists map each term to {doc id: term frequency}; documents can be added and
+removed incrementally, and document frequencies are read from the posting lists at
+query time, so scores stay exact without rebuilding.
+"""
+import re
+import math
+import heapq
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Very common words that carry no retrieval signal
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or our that the their this to
+was we were what when which who will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric word tokens without stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[Hashable, int]] = {}
+        self.doc_lengths: Dict[Hashable, int] = {}
+        self._doc_terms: Dict[Hashable, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: Hashable, text: str):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self.doc_lengths[doc_id] = length
+        self._doc_terms[doc_id] = list(counts)
+        self._total_length += length
+
+    def add_many(self, items: Iterable[Tuple[Hashable, str]]):
+        for doc_id, text in items:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        # Only the removed document's own terms need their postings touched
+        for term in self._doc_terms.pop(doc_id):
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Hashable, float]]:
+        """Returns the top-k (doc id, score) pairs, best first; documents sharing no term are skipped."""
+        n = len(self.doc_lengths)
+        if not n or k <= 0:
+            return []
+        avg_length = self._total_length / n or 1.0
+
+        scores: Dict[Hashable, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            df = len(docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -1,32 +1,158 @@
-from typing import List
+import os
+import re
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Union
 from langchain.docstore.document import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-def split_text_into_documents(text: str, metadata: dict = None) -> List[Document]:
+# Chunk size in embedder tokens: all-MiniLM-L6-v2 truncates inputs at 256 word pieces
+EMBED_CHUNK_TOKENS = int(os.getenv("EMBED_CHUNK_TOKENS", "128"))
+EMBED_CHUNK_OVERLAP_TOKENS = int(os.getenv("EMBED_CHUNK_OVERLAP_TOKENS", "16"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+# Rough characters-per-token ratio used when the embedder's tokenizer is unavailable
+_CHARS_PER_TOKEN = 4
+
+# Text is cut into units at line breaks and sentence ends
+_UNIT_SPLIT_RE = re.compile(r"\n+|(?<=[.!?])\s+")
+# Longest stretch buffered while waiting for a unit boundary in streamed input
+_MAX_PENDING_CHARS = 20_000
+
+
+def _model_attribute(embedding_model, name: str):
+    # sentence-transformers keeps tokenizer/max_seq_length on .client, the ONNX backend on itself
+    for holder in (embedding_model, getattr(embedding_model, "client", None)):
+        value = getattr(holder, name, None) if holder is not None else None
+        if value is not None:
+            return value
+    return None
+
+
+def get_token_counter(embedding_model=None) -> Callable[[str], int]:
+    """
+    Counts tokens with the embedding model's own tokenizer, or estimates them from the
+    text length.
+    """
+    tokenizer = _model_attribute(embedding_model, "tokenizer")
+    if tokenizer is not None:
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    return lambda text: (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def _max_chunk_tokens(embedding_model, max_tokens: int) -> int:
+    # Leave room for the [CLS]/[SEP] tokens the model adds
+    limit = _model_attribute(embedding_model, "max_seq_length")
+    return min(max_tokens, limit - 2) if limit else max_tokens
+
+
+def _iter_units(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Yields sentences/lines from a string or a stream of text pieces, holding back only
+    the trailing partial unit of each piece.
+    """
+    pieces = [source] if isinstance(source, str) else source
+    pending = ""
+    for piece in pieces:
+        pending += piece
+        boundary = max(pending.rfind("\n"), *(pending.rfind(end) for end in (". ", "! ", "? ")))
+        if boundary < 0 and len(pending) > _MAX_PENDING_CHARS:
+            boundary = pending.rfind(" ")
+        if boundary < 0:
+            continue
+        complete, pending = pending[:boundary + 1], pending[boundary + 1:]
+        for unit in _UNIT_SPLIT_RE.split(complete):
+            if unit.strip():
+                yield unit.strip()
+    for unit in _UNIT_SPLIT_RE.split(pending):
+        if unit.strip():
+            yield unit.strip()
+
+
+def _split_long_unit(unit: str, tokens: int, max_tokens: int, count_tokens: Callable[[str], int]) -> Iterator[tuple]:
+    # A single sentence over the limit is cut into word windows of about max_tokens
+    words = unit.split()
+    step = max(1, len(words) * max_tokens // tokens)
+    for start in range(0, len(words), step):
+        part = " ".join(words[start:start + step])
+        yield part, count_tokens(part)
+
+
+def iter_chunks(
+    source: Union[str, Iterable[str]],
+    max_tokens: int = EMBED_CHUNK_TOKENS,
+    overlap_tokens: int = EMBED_CHUNK_OVERLAP_TOKENS,
+    count_tokens: Callable[[str], int] = None
+) -> Iterator[str]:
+    """
+    Lazily packs sentences into chunks of at most max_tokens, repeating up to
+    overlap_tokens of trailing sentences at the start of the next chunk.
+    """
+    count_tokens = count_tokens or get_token_counter()
+    current: List[tuple] = []
+    current_tokens = 0
+
+    for unit in _iter_units(source):
+        tokens = count_tokens(unit)
+        parts = _split_long_unit(unit, tokens, max_tokens, count_tokens) if tokens > max_tokens else [(unit, tokens)]
+        for part, part_tokens in parts:
+            if current and current_tokens + part_tokens > max_tokens:
+                yield " ".join(text for text, _ in current)
+                # Carry the trailing sentences that fit in the overlap budget
+                tail = []
+                tail_tokens = 0
+                for text, text_tokens in reversed(current):
+                    if tail_tokens + text_tokens > overlap_tokens or tail_tokens + text_tokens + part_tokens > max_tokens:
+                        break
+                    tail.insert(0, (text, text_tokens))
+                    tail_tokens += text_tokens
+                current, current_tokens = tail, tail_tokens
+            current.append((part, part_tokens))
+            current_tokens += part_tokens
+
+    if current:
+        yield " ".join(text for text, _ in current)
+
+
+def iter_document_batches(
+    source: Union[str, Iterable[str]],
+    metadata: dict = None,
+    embedding_model=None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    max_tokens: int = EMBED_CHUNK_TOKENS,
+    overlap_tokens: int = EMBED_CHUNK_OVERLAP_TOKENS
+) -> Iterator[List[Document]]:
+    """
+    Streams token-sized chunks of source as batches of LangChain Documents, ready to be
+    embedded batch by batch (e.g. VectorStore.upsert_document_stream).
+
+    Args:
+        source: Text, or an iterable of text pieces (pages, file lines, ...)
+        metadata: Metadata copied onto every Document
+        embedding_model: Embedder whose tokenizer and input limit size the chunks
+        batch_size: Documents per yielded batch
+    """
+    count_tokens = get_token_counter(embedding_model)
+    max_tokens = _max_chunk_tokens(embedding_model, max_tokens)
+
+    batch = []
+    for chunk in iter_chunks(source, max_tokens, overlap_tokens, count_tokens):
+        batch.append(Document(page_content=chunk, metadata=dict(metadata or {})))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def split_text_into_documents(text: str, metadata: dict = None, embedding_model=None) -> List[Document]:
     """
     Splits a long string of text into chunks and wraps them as LangChain Documents.
-    
+
     Args:
         text (str): Raw text from a company website
         metadata (dict): Optional metadata like company_name, source_url
-    
+        embedding_model: Optional embedder whose tokenizer sizes the chunks
+
     Returns:
         List[Document]: Chunked and wrapped as LangChain Document objects
     """
-    if not metadata:
-        metadata = {}
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        separators=["\n\n", "\n", ".", " "]
-    )
-
-    chunks = splitter.split_text(text)
-
-    documents = [
-        Document(page_content=chunk, metadata=metadata)
-        for chunk in chunks
-    ]
-
-    return documents
+    return list(chain.from_iterable(iter_document_batches(text, metadata, embedding_model)))
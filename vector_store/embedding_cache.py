@@ -0,0 +1,328 @@
+"""
+Persistent, content-addressed cache of chunk embeddings.
+
+Vectors are keyed by (embedding model, hash of the whitespace-normalized chunk text)
+and stored as float16 rows of a memory-mapped file per model, with a SQLite table
+mapping keys to rows. Re-ingesting a mostly unchanged site then costs hashing plus
+embedding of the changed chunks only. The total size is bounded by LRU eviction;
+rows of evicted vectors are reused by later writes.
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "cache/embeddings")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Rows are allocated in blocks so the vector file is not resized on every write
+_GROW_ROWS = 4096
+# Evicted rows are only reused after this long, so a reader that looked up the row
+# just before the eviction (possibly in another process) still reads the old vector
+_ROW_REUSE_DELAY_SECONDS = 60
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so formatting-only changes keep their cached embedding."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    SQLite key table plus one float16 memmap of vectors per embedding model.
+    """
+
+    def __init__(self, cache_dir: str = EMBEDDING_CACHE_DIR, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._vectors = {}  # model → np.memmap
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, "keys.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_keys (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                last_accessed REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (model, key)
+            )
+        """)
+        # Caches created before eviction existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embedding_keys)")}
+        if "last_accessed" not in columns:
+            self._conn.execute("ALTER TABLE embedding_keys ADD COLUMN last_accessed REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_keys_lru ON embedding_keys (last_accessed)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_models (
+                model TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                rows INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_free_rows (
+                model TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                freed_at REAL NOT NULL,
+                PRIMARY KEY (model, row)
+            )
+        """)
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    def _vector_path(self, model: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(model.encode("utf-8")).hexdigest()[:16] + ".f16")
+
+    def _map(self, model: str, dim: int, rows: int) -> np.memmap:
+        """Returns a mapping of the model's vector file covering at least rows rows."""
+        mapped = self._vectors.get(model)
+        if mapped is not None and mapped.shape[0] >= rows:
+            return mapped
+
+        path = self._vector_path(model)
+        capacity = os.path.getsize(path) // (dim * 2) if os.path.exists(path) else 0
+        if capacity < rows:
+            capacity = rows + _GROW_ROWS
+        with open(path, "ab") as f:
+            if f.tell() < capacity * dim * 2:
+                f.truncate(capacity * dim * 2)
+
+        mapped = np.memmap(path, dtype=np.float16, mode="r+", shape=(capacity, dim))
+        self._vectors[model] = mapped
+        return mapped
+
+    def get_many(self, model: str, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Returns the cached vector of every key, None where missing."""
+        found = [None] * len(keys)
+        with self._lock:
+            try:
+                meta = self._conn.execute("SELECT dim, rows FROM embedding_models WHERE model = ?", (model,)).fetchone()
+                if meta:
+                    rows = {}
+                    for start in range(0, len(keys), 500):
+                        batch = keys[start:start + 500]
+                        rows.update(self._conn.execute(
+                            f"SELECT key, row FROM embedding_keys WHERE model = ? AND key IN ({','.join('?' * len(batch))})",
+                            (model, *batch)
+                        ).fetchall())
+                    if rows:
+                        vectors = self._map(model, meta[0], max(rows.values()) + 1)
+                        for i, key in enumerate(keys):
+                            if key in rows:
+                                found[i] = np.asarray(vectors[rows[key]], dtype=np.float32)
+                        hit_keys = list(rows)
+                        now = time.time()
+                        for start in range(0, len(hit_keys), 500):
+                            batch = hit_keys[start:start + 500]
+                            self._conn.execute(
+                                f"UPDATE embedding_keys SET last_accessed = ? WHERE model = ? AND key IN ({','.join('?' * len(batch))})",
+                                (now, model, *batch)
+                            )
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Embedding cache read failed: {e}")
+
+            hits = sum(vector is not None for vector in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def set_many(self, model: str, keys: List[str], vectors: np.ndarray):
+        """Stores vectors (one row per key); keys that are already cached are skipped."""
+        if not keys:
+            return
+        dim = vectors.shape[1]
+        with self._lock:
+            try:
+                # BEGIN IMMEDIATE serializes row allocation across processes sharing the cache
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    meta = self._conn.execute("SELECT dim, rows FROM embedding_models WHERE model = ?", (model,)).fetchone()
+                    if meta and meta[0] != dim:
+                        raise ValueError(f"cached dimension {meta[0]} != {dim} for {model}")
+                    next_row = meta[1] if meta else 0
+
+                    new = {}
+                    for key, vector in zip(keys, vectors):
+                        if key in new:
+                            continue
+                        if self._conn.execute("SELECT 1 FROM embedding_keys WHERE model = ? AND key = ?", (model, key)).fetchone():
+                            continue
+                        new[key] = vector
+                    if not new:
+                        self._conn.execute("COMMIT")
+                        return
+
+                    # Reuse rows freed by eviction before growing the file
+                    now = time.time()
+                    free = [row for (row,) in self._conn.execute(
+                        "SELECT row FROM embedding_free_rows WHERE model = ? AND freed_at < ? ORDER BY row LIMIT ?",
+                        (model, now - _ROW_REUSE_DELAY_SECONDS, len(new))
+                    )]
+                    self._conn.executemany("DELETE FROM embedding_free_rows WHERE model = ? AND row = ?", [(model, row) for row in free])
+                    rows = free + list(range(next_row, next_row + len(new) - len(free)))
+                    next_row += len(new) - len(free)
+
+                    mapped = self._map(model, dim, next_row)
+                    mapped[rows] = np.asarray(list(new.values()), dtype=np.float16)
+                    mapped.flush()
+
+                    self._conn.executemany(
+                        "INSERT INTO embedding_keys (model, key, row, last_accessed) VALUES (?, ?, ?, ?)",
+                        [(model, key, row, now) for key, row in zip(new, rows)]
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO embedding_models (model, dim, rows) VALUES (?, ?, ?)",
+                        (model, dim, next_row)
+                    )
+                    self._evict()
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logger.warning(f"⚠️ Embedding cache write failed: {e}")
+
+    def _entry_counts(self) -> dict:
+        """model → (dim, live entries)"""
+        return {
+            model: (dim, entries) for model, dim, entries in self._conn.execute("""
+                SELECT m.model, m.dim, COUNT(k.key) FROM embedding_models m
+                LEFT JOIN embedding_keys k ON k.model = m.model GROUP BY m.model
+            """)
+        }
+
+    def _evict(self):
+        # Least recently used vectors go until the live entries fit in max_bytes; their rows are freed for reuse
+        counts = self._entry_counts()
+        total = sum(dim * 2 * entries for dim, entries in counts.values())
+        if total <= self.max_bytes:
+            return
+
+        freed = 0
+        victims = []
+        for model, key, row in self._conn.execute("SELECT model, key, row FROM embedding_keys ORDER BY last_accessed"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((model, key, row))
+            freed += counts[model][0] * 2
+
+        now = time.time()
+        self._conn.executemany("DELETE FROM embedding_keys WHERE model = ? AND key = ?", [(model, key) for model, key, _ in victims])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embedding_free_rows (model, row, freed_at) VALUES (?, ?, ?)",
+            [(model, row, now) for model, _, row in victims]
+        )
+        self.evictions += len(victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = self._entry_counts()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "max_bytes": self.max_bytes,
+            "models": {model: {"dim": dim, "entries": entries, "size_bytes": entries * dim * 2} for model, (dim, entries) in counts.items()}
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain embedding model so embed_documents only computes uncached texts.
+    Queries (embed_query, embed_queries) are never cached. Every vector is returned
+    float16-rounded, so cache hits, misses and queries rank identically.
+    """
+
+    def __init__(self, model: Embeddings, cache: EmbeddingCache, model_name: Optional[str] = None):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name or getattr(model, "model_name", None) or type(model).__name__
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        keys = [self.cache.make_key(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, keys)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Embed each distinct missing text once
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            text_by_key = {keys[i]: texts[i] for i in missing}
+            computed = np.asarray(self.model.embed_documents([text_by_key[key] for key in unique]), dtype=np.float32)
+            computed = computed.astype(np.float16).astype(np.float32)
+            self.cache.set_many(self.model_name, unique, computed)
+
+            by_key = dict(zip(unique, computed))
+            for i in missing:
+                vectors[i] = by_key[keys[i]]
+
+        return [vector.tolist() for vector in vectors]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds queries in one batch, bypassing the cache: queries are mostly one-off and
+        would only evict chunk vectors. Rounded like cached vectors so both rank alike.
+        """
+        if not texts:
+            return []
+        # The wrapped sentence embedders embed queries and documents the same way
+        vectors = np.asarray(self.model.embed_documents(texts), dtype=np.float32)
+        return vectors.astype(np.float16).astype(np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's attributes (model_name, client, ...)
+        if "model" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.__dict__["model"], name)
+
+
+# Shared cache instance (None when disabled or the cache directory cannot be opened)
+embedding_cache: Optional[EmbeddingCache] = None
+if EMBEDDING_CACHE_ENABLED:
+    try:
+        embedding_cache = EmbeddingCache()
+    except Exception as e:
+        logger.warning(f"⚠️ Embedding cache disabled: {e}")
+
+
+def embed_queries(model: Embeddings, queries: List[str]) -> np.ndarray:
+    """
+    Query vectors of any embedding model as one float32 matrix: batched and uncached
+    for CachedEmbeddings, one embed_query call per query otherwise.
+    """
+    batch = getattr(model, "embed_queries", None)
+    vectors = batch(queries) if batch is not None else [model.embed_query(query) for query in queries]
+    return np.asarray(vectors, dtype=np.float32).reshape(len(queries), -1)
+
+
+def with_embedding_cache(model: Optional[Embeddings]) -> Optional[Embeddings]:
+    """Wraps an embedding model with the shared cache when it is enabled."""
+    if model is None or embedding_cache is None or isinstance(model, CachedEmbeddings):
+        return model
+    return CachedEmbeddings(model, embedding_cache)
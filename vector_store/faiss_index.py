@@ -1,41 +1,328 @@
 import os
+import json
 import faiss
-import pickle
-from typing import List, Tuple
+import hashlib
+import threading
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_core.documents import Document
+from vector_store.embedding_cache import embed_queries, with_embedding_cache
+from vector_store.index_storage import (
+    embedding_signature, is_legacy, is_saved, load_vector_db, make_writable, save_vector_db, saved_embedding_signature
+)
+from vector_store.index_types import IndexConfig, apply_search_params, build_faiss_index, supports_removal
+from vector_store.bm25 import BM25Index
+from vector_store.fusion import reciprocal_rank_fusion
 
 # Optional path to save/load FAISS DB
 FAISS_DB_PATH = "vector_store/faiss_index"
 
-class VectorStore:
-    def __init__(self):
+# Append-only log of upserts/deletes applied since the last full snapshot
+PENDING_OPS_FILE = "pending_ops.jsonl"
+
+# Compact once this many tombstones (or logged operations) have piled up
+COMPACT_TOMBSTONE_THRESHOLD = int(os.getenv("VECTOR_COMPACT_TOMBSTONES", "200"))
+COMPACT_OPS_THRESHOLD = int(os.getenv("VECTOR_COMPACT_OPS", "1000"))
+
+# Hybrid search fuses this many dense and lexical candidates per requested result
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "4"))
+
+# Dense searches of hybrid queries run here while the lexical search runs on the caller's thread
+_hybrid_executor = ThreadPoolExecutor(max_workers=int(os.getenv("HYBRID_SEARCH_WORKERS", "4")), thread_name_prefix="hybrid-search")
+
+def document_id(doc: Document) -> str:
+    """
+    Stable id of a chunk: hash of its source URL and content, or of its content alone
+    for chunks marked content_keyed (content already unique, e.g. after ingest-time dedup).
+    """
+    metadata = doc.metadata or {}
+    source = "" if metadata.get("content_keyed") else metadata.get("source_url", "")
+    return hashlib.sha256(f"{source}\n{doc.page_content}".encode("utf-8")).hexdigest()[:32]
+
+# Sentinel: build a new embedding model instead of sharing one
+_NEW_EMBEDDING_MODEL = object()
+
+# Sentence embedding model shared by every backend
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# "pytorch" (sentence-transformers) or "onnx" (int8-quantized ONNX Runtime export of the same model)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "pytorch")
+
+def _create_pytorch_embeddings():
+    # Use HuggingFace embeddings with same token as LLM
+    hf_token = os.getenv("HF_TOKEN")  # Same token as LLM
+
+    if hf_token and hf_token not in ["hf_your_hugging_face_token_here", "your_hugging_face_token_here"]:
+        # Use HuggingFace with token
+        embedding_model = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={'token': hf_token}
+        )
+        print("✅ HuggingFace embeddings initialized with HF_TOKEN")
+    else:
+        # Fallback to local model without token
+        print("⚠️ HF_TOKEN not found, using local embeddings")
+        embedding_model = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME
+        )
+        print("✅ HuggingFace embeddings initialized locally")
+    return embedding_model
+
+def _create_onnx_embeddings():
+    from vector_store.onnx_embeddings import OnnxEmbeddings
+    embedding_model = OnnxEmbeddings(EMBEDDING_MODEL_NAME)
+    print("✅ Quantized ONNX embeddings initialized")
+    return embedding_model
+
+EMBEDDING_BACKENDS = {
+    "pytorch": _create_pytorch_embeddings,
+    "onnx": _create_onnx_embeddings
+}
+
+def create_embedding_model(backend: str = None):
+    """
+    Creates the embedding model of the configured backend (falling back to PyTorch
+    if the ONNX backend cannot be loaded), or returns None if none can be loaded.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    try:
         try:
-            # Use HuggingFace embeddings with same token as LLM
-            hf_token = os.getenv("HF_TOKEN")  # Same token as LLM
-            
-            if hf_token and hf_token not in ["hf_your_hugging_face_token_here", "your_hugging_face_token_here"]:
-                # Use HuggingFace with token
-                self.embedding_model = HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/all-MiniLM-L6-v2",
-                    model_kwargs={'token': hf_token}
-                )
-                print("✅ HuggingFace embeddings initialized with HF_TOKEN")
-            else:
-                # Fallback to local model without token
-                print("⚠️ HF_TOKEN not found, using local embeddings")
-                self.embedding_model = HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/all-MiniLM-L6-v2"
-                )
-                print("✅ HuggingFace embeddings initialized locally")
-                
+            embedding_model = EMBEDDING_BACKENDS[backend]()
         except Exception as e:
-            print(f"Warning: Could not initialize HuggingFace embeddings: {e}")
-            print("Embeddings will use fallback content only")
-            self.embedding_model = None
+            if backend == "pytorch":
+                raise
+            print(f"Warning: Could not initialize {backend} embeddings: {e}. Falling back to PyTorch.")
+            embedding_model = _create_pytorch_embeddings()
+
+        # Unchanged chunks reuse their cached vectors instead of being re-embedded
+        return with_embedding_cache(embedding_model)
+
+    except Exception as e:
+        print(f"Warning: Could not initialize HuggingFace embeddings: {e}")
+        print("Embeddings will use fallback content only")
+        return None
+
+class _ReadWriteLock:
+    """
+    Many concurrent readers or one writer; waiting writers block new readers so a
+    steady stream of searches cannot starve an update. Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+class VectorStore:
+    def __init__(self, index_path: str = FAISS_DB_PATH, embedding_model=_NEW_EMBEDDING_MODEL, index_config: Optional[IndexConfig] = None):
+        """
+        Args:
+            index_path: Directory the FAISS index is saved to / loaded from
+            embedding_model: Shared embedding model (several stores can reuse one); a new one is created by default
+            index_config: FAISS index type and search parameters (exact flat search by default);
+                a changed type takes effect on the next build_index
+        """
+        self.index_path = index_path
+        self.embedding_model = create_embedding_model() if embedding_model is _NEW_EMBEDDING_MODEL else embedding_model
+        self.index_config = index_config or IndexConfig()
         
         self.vector_db = None
+        # True while the FAISS index is memory-mapped from disk (read-only until copied)
+        self._mmapped = False
+
+        # Precomputed results for fixed queries, valid for one index_version only
+        self.index_version = 0
+        self._static_queries: Dict[str, int] = {}
+        self._static_results: Dict[str, Tuple[int, List[Document], np.ndarray]] = {}
+        # Post-processed results of static queries (e.g. the selected prompt context), same lifetime
+        self._static_selections: Dict[tuple, Tuple[int, object]] = {}
+        self._static_lock = threading.Lock()
+        self._memory_bytes = 0
+
+        # Incremental updates: deleted ids hidden from search until the next compaction
+        self._tombstones: set = set()
+        self._pending_ops = 0
+        self._write_lock = threading.RLock()
+        # Nesting depth of _batched_changes, and whether a change inside it still needs a refresh
+        self._batch_depth = 0
+        self._refresh_pending = False
+        # Searches read the live index under read(); in-place changes to it (added vectors,
+        # removed ids, tombstones) happen under write(), taken inside _write_lock
+        self._index_lock = _ReadWriteLock()
+        # At most one background compaction at a time
+        self._compacting = False
+        self._compacting_lock = threading.Lock()
+
+        # BM25 index over the live documents, rebuilt lazily when index_version moves
+        self._lexical_index = None
+        self._lexical_version = -1
+        self._lexical_lock = threading.Lock()
+        # doc_id → position in the FAISS index, rebuilt when the id mapping changes
+        self._positions: Tuple[int, int, Dict[str, int]] = (0, -1, {})
+
+    def register_static_queries(self, queries: Dict[str, int]):
+        """
+        Registers queries that are asked on every request (query → largest k used).
+        Their results are computed once per index version and then served from memory.
+        """
+        with self._static_lock:
+            for query, k in queries.items():
+                self._static_queries[query] = max(k, self._static_queries.get(query, 0))
+        if self.vector_db:
+            self._precompute_static_queries()
+
+    def warm_up(self):
+        """
+        Loads the index from disk (if not loaded yet) and precomputes the static queries.
+        """
+        if not self.embedding_model:
+            return
+        if not self.vector_db:
+            self._load_index()
+        else:
+            self._precompute_static_queries()
+
+    def _precompute_static_queries(self):
+        with self._static_lock:
+            queries = dict(self._static_queries)
+            version = self.index_version
+        if not queries or not self.vector_db:
+            return
+
+        results = {}
+        try:
+            query_list = list(queries)
+            vectors = self._embed_queries(query_list)
+            batch = self._batch_similarity_search(query_list, max(queries.values()), vectors)
+            for query, docs, vector in zip(query_list, batch, vectors):
+                results[query] = (queries[query], docs[:queries[query]], vector)
+        except Exception as e:
+            print(f"Warning: Could not precompute static queries: {e}")
+            return
+
+        with self._static_lock:
+            # Discard if the index was rebuilt while we were searching
+            if version == self.index_version:
+                self._static_results = results
+        print(f"✅ Precomputed retrieval for {len(results)} static queries (index v{version})")
+
+    def static_selection(self, query: str, key) -> Optional[object]:
+        """
+        A post-processed result of a static query stored by store_static_selection,
+        or None if there is none for the current index version.
+        """
+        with self._static_lock:
+            entry = self._static_selections.get((query, key))
+            if entry is not None and entry[0] == self.index_version:
+                return entry[1]
+        return None
+
+    def store_static_selection(self, query: str, key, version: int, value):
+        """
+        Keeps a value derived from a static query's results at index_version version
+        (read before the search); values of other queries or outdated versions are dropped.
+        """
+        with self._static_lock:
+            if query in self._static_queries and version == self.index_version:
+                self._static_selections[(query, key)] = (version, value)
+
+    def _set_index(self, vector_db):
+        # A new index starts without tombstones; both are swapped in together
+        with self._index_lock.write(), self._static_lock:
+            self.vector_db = vector_db
+            self._mmapped = False
+            self._tombstones = set()
+        self._index_changed()
+
+    def _index_changed(self):
+        """Bumps the index version after any change and refreshes the precomputed queries."""
+        with self._static_lock:
+            self.index_version += 1
+            self._static_results = {}
+            self._static_selections = {}
+        if self._batch_depth:
+            # Inside _batched_changes: the refresh runs once when the batch ends
+            self._refresh_pending = True
+            return
+        self._refresh_after_change()
+
+    def _refresh_after_change(self):
+        vector_db = self.vector_db
+        if not vector_db:
+            return
+        # Approximate resident size: vectors plus document text
+        size = vector_db.index.ntotal * vector_db.index.d * 4
+        size += sum(len(doc.page_content) for doc in getattr(vector_db.docstore, "_dict", {}).values())
+        with self._static_lock:
+            self._memory_bytes = size
+        self._precompute_static_queries()
+
+    @contextmanager
+    def _batched_changes(self):
+        """Holds the write lock over several changes and refreshes derived state once at the end."""
+        with self._write_lock:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._refresh_pending:
+                    self._refresh_pending = False
+                    self._refresh_after_change()
+
+    def is_loaded(self) -> bool:
+        return self.vector_db is not None
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the loaded index (0 when not loaded)."""
+        return self._memory_bytes if self.vector_db else 0
+
+    def unload(self):
+        """
+        Drops the in-memory index; the next search reloads it from disk.
+        """
+        with self._write_lock, self._index_lock.write(), self._static_lock:
+            self.vector_db = None
+            self._static_results = {}
+            self._static_selections = {}
+            self._tombstones = set()
+            self._mmapped = False
+            self._lexical_index = None
 
     def build_index(self, documents: List[Document]):
         """
@@ -45,8 +332,27 @@ class VectorStore:
             print("Warning: No embedding model available. Skipping index building.")
             return
             
-        self.vector_db = FAISS.from_documents(documents, self.embedding_model)
-        self._save_index()
+        documents = self._with_ids(documents)
+        with self._write_lock:
+            self._set_index(self._new_vector_db(list(documents.values())))
+            self._save_index()
+
+    def _new_vector_db(self, documents: List[Document], vectors=None, ids: Optional[List[str]] = None) -> FAISS:
+        """
+        Builds a LangChain FAISS store over documents (keyed by their doc_id unless ids
+        are given) using the configured index type; vectors are embedded unless given.
+        """
+        if vectors is None:
+            vectors = self.embedding_model.embed_documents([doc.page_content for doc in documents])
+        if ids is None:
+            ids = [doc.metadata["doc_id"] for doc in documents]
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(documents), -1)
+        return FAISS(
+            self.embedding_model,
+            build_faiss_index(vectors, self.index_config),
+            InMemoryDocstore(dict(zip(ids, documents))),
+            dict(enumerate(ids))
+        )
 
     def search(self, query: str, k: int = 5) -> List[Document]:
         """
@@ -72,12 +378,461 @@ class VectorStore:
         if not self.vector_db:
             return self._get_fallback_content(k)
 
+        # Hot path: fixed queries answered from the precomputed results
+        static = self._static_results.get(query)
+        if static is not None and k <= static[0]:
+            return static[1][:k]
+
         try:
-            return self.vector_db.similarity_search(query, k=k)
+            return self._batch_similarity_search([query], k)[0]
         except Exception as e:
             print(f"Warning: Vector search failed: {e}. Using fallback content.")
             return self._get_fallback_content(k)
     
+    def search_many(self, queries: List[str], k: int = 5) -> List[List[Document]]:
+        """
+        Searches the top-k documents for several queries at once: one embedding
+        batch and one FAISS search over the query matrix.
+        """
+        if not queries:
+            return []
+
+        if not self.embedding_model:
+            return [self.search(query, k) for query in queries]
+
+        if not self.vector_db:
+            try:
+                self._load_index()
+            except:
+                print("Warning: Could not load vector database. Using fallback content.")
+                return [self._get_fallback_content(k) for _ in queries]
+
+        # Precomputed static queries are answered from memory; only the rest are embedded
+        results: List[List[Document]] = [None] * len(queries)
+        missing = []
+        for i, query in enumerate(queries):
+            static = self._static_results.get(query)
+            if static is not None and k <= static[0]:
+                results[i] = static[1][:k]
+            else:
+                missing.append(i)
+
+        if missing:
+            try:
+                batch = self._batch_similarity_search([queries[i] for i in missing], k)
+            except Exception as e:
+                print(f"Warning: Batch vector search failed: {e}. Using fallback content.")
+                batch = [self._get_fallback_content(k) for _ in missing]
+            for i, docs in zip(missing, batch):
+                results[i] = docs
+
+        return results
+
+    def _ensure_searchable(self) -> bool:
+        if not self.embedding_model:
+            return False
+        if not self.vector_db:
+            try:
+                self._load_index()
+            except:
+                print("Warning: Could not load vector database. Using fallback content.")
+                return False
+        return True
+
+    def _get_lexical_index(self) -> BM25Index:
+        with self._lexical_lock:
+            if self._lexical_index is None or self._lexical_version != self.index_version:
+                version = self.index_version
+                index = BM25Index()
+                with self._index_lock.read():
+                    if self.vector_db:
+                        for doc_id in self._live_ids():
+                            doc = self.vector_db.docstore.search(doc_id)
+                            if isinstance(doc, Document):
+                                index.add(doc_id, doc.page_content)
+                self._lexical_index, self._lexical_version = index, version
+            return self._lexical_index
+
+    def lexical_search(self, query: str, k: int = 5) -> List[Document]:
+        """
+        BM25 keyword search over the same chunks as the dense index.
+        """
+        if not self._ensure_searchable():
+            return self._get_fallback_content(k)
+        hits = self._get_lexical_index().search(query, k)
+        docs = []
+        with self._index_lock.read():
+            if not self.vector_db:
+                return docs
+            for doc_id, _ in hits:
+                doc = self.vector_db.docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    docs.append(doc)
+        return docs
+
+    def hybrid_search_many(self, queries: List[str], k: int = 5) -> List[List[Document]]:
+        """
+        Dense (FAISS) and lexical (BM25) search run concurrently, fused per query
+        with reciprocal-rank fusion. Catches exact names that embeddings blur.
+        """
+        if not queries:
+            return []
+        if not self._ensure_searchable():
+            return [self._get_fallback_content(k) for _ in queries]
+        return self._hybrid_search(queries, k)
+
+    def _hybrid_search(self, queries: List[str], k: int, vectors: Optional[np.ndarray] = None) -> List[List[Document]]:
+        candidates = k * HYBRID_CANDIDATE_FACTOR
+        dense_future = _hybrid_executor.submit(self._batch_similarity_search, queries, candidates, vectors)
+        try:
+            lexical = [self.lexical_search(query, candidates) for query in queries]
+        except Exception as e:
+            print(f"Warning: Lexical search failed: {e}. Using dense results only.")
+            lexical = [[] for _ in queries]
+        try:
+            dense = dense_future.result()
+        except Exception as e:
+            print(f"Warning: Vector search failed: {e}. Using lexical results only.")
+            dense = [[] for _ in queries]
+
+        def key(doc: Document):
+            return doc.metadata.get("doc_id") or doc.page_content
+
+        return [
+            reciprocal_rank_fusion([dense_docs, lexical_docs], k, key=key) or self._get_fallback_content(k)
+            for dense_docs, lexical_docs in zip(dense, lexical)
+        ]
+
+    def search_many_with_vectors(self, queries: List[str], k: int = 5, hybrid: bool = False) -> List[Tuple[List[Document], Optional[np.ndarray], Optional[np.ndarray]]]:
+        """
+        search_many (or hybrid_search_many) that also returns, per query, the query vector
+        and the stored vectors of the returned documents, so callers re-ranking the results
+        need not embed anything again. Vectors are None where not available.
+        """
+        if not queries:
+            return []
+        if not self._ensure_searchable():
+            return [(self._get_fallback_content(k), None, None) for _ in queries]
+
+        results: List[List[Document]] = [None] * len(queries)
+        query_vectors: List[Optional[np.ndarray]] = [None] * len(queries)
+        for i, query in enumerate(queries):
+            static = self._static_results.get(query)
+            if static is None:
+                continue
+            # Static queries reuse their precomputed vector (and results, for dense searches)
+            query_vectors[i] = static[2]
+            if not hybrid and k <= static[0]:
+                results[i] = static[1][:k]
+
+        try:
+            unembedded = [i for i, vector in enumerate(query_vectors) if vector is None]
+            if unembedded:
+                for i, vector in zip(unembedded, self._embed_queries([queries[i] for i in unembedded])):
+                    query_vectors[i] = vector
+            missing = [i for i, docs in enumerate(results) if docs is None]
+            if missing:
+                matrix = np.vstack([query_vectors[i] for i in missing])
+                search = self._hybrid_search if hybrid else self._batch_similarity_search
+                for i, docs in zip(missing, search([queries[i] for i in missing], k, matrix)):
+                    results[i] = docs
+        except Exception as e:
+            print(f"Warning: Vector search failed: {e}. Using fallback content.")
+            return [(docs if docs is not None else self._get_fallback_content(k), None, None) for docs in results]
+
+        return [(docs, vector, self._document_vectors(docs)) for docs, vector in zip(results, query_vectors)]
+
+    def hybrid_search(self, query: str, k: int = 5) -> List[Document]:
+        return self.hybrid_search_many([query], k)[0]
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        # Queries bypass the embedding cache, which is kept for chunks
+        return embed_queries(self.embedding_model, queries)
+
+    def _batch_similarity_search(self, queries: List[str], k: int, vectors: Optional[np.ndarray] = None) -> List[List[Document]]:
+        """
+        Embeds all queries in one batch (unless their vectors are given) and runs a single
+        FAISS search over the matrix.
+        """
+        if vectors is None:
+            vectors = self._embed_queries(queries)
+        # Normalized in place below: never alter the caller's vectors
+        vectors = np.array(vectors, dtype=np.float32)
+
+        results = []
+        with self._index_lock.read():
+            vector_db = self.vector_db
+            tombstones = self._tombstones
+            if getattr(vector_db, "_normalize_L2", False):
+                faiss.normalize_L2(vectors)
+
+            # Over-fetch so deleted-but-not-yet-compacted chunks can be skipped
+            _, indices = vector_db.index.search(vectors, k + len(tombstones))
+
+            for row in indices:
+                docs = []
+                for idx in row:
+                    if idx == -1 or len(docs) == k:
+                        continue
+                    doc_id = vector_db.index_to_docstore_id.get(idx)
+                    if doc_id is None or doc_id in tombstones:
+                        continue
+                    doc = vector_db.docstore.search(doc_id)
+                    if isinstance(doc, Document):
+                        docs.append(doc)
+                results.append(docs)
+        return results
+
+    def _document_vectors(self, docs: List[Document]) -> Optional[np.ndarray]:
+        """
+        The stored vectors of docs, reconstructed from the FAISS index, or None if any of
+        them is not indexed or the index type cannot reconstruct vectors.
+        """
+        if not docs:
+            return None
+        with self._index_lock.read():
+            vector_db = self.vector_db
+            if vector_db is None:
+                return None
+            mapping = vector_db.index_to_docstore_id
+            # add_embeddings extends the mapping in place, delete replaces it
+            mapping_id, size, positions = self._positions
+            if mapping_id != id(mapping) or size != len(mapping):
+                positions = {doc_id: idx for idx, doc_id in mapping.items()}
+                self._positions = (id(mapping), len(mapping), positions)
+            try:
+                return np.vstack([vector_db.index.reconstruct(positions[doc.metadata["doc_id"]]) for doc in docs])
+            except (KeyError, RuntimeError):
+                return None
+
+    # ---------- Incremental updates ----------
+
+    @staticmethod
+    def _with_ids(documents: Iterable[Document]) -> Dict[str, Document]:
+        """Keys documents by their stable id (duplicates collapse into one)."""
+        keyed = {}
+        for doc in documents:
+            doc_id = document_id(doc)
+            keyed[doc_id] = Document(page_content=doc.page_content, metadata={**(doc.metadata or {}), "doc_id": doc_id})
+        return keyed
+
+    def _ensure_loaded_for_write(self):
+        if not self.vector_db:
+            try:
+                self._load_index()
+            except ValueError:
+                pass  # No index on disk yet; the first write creates it
+
+    def _live_ids(self) -> set:
+        return set(self.vector_db.index_to_docstore_id.values()) - self._tombstones if self.vector_db else set()
+
+    def add_documents(self, documents: List[Document]) -> int:
+        """
+        Appends documents whose id is not indexed yet; only those are embedded.
+        Returns the number of chunks added.
+        """
+        if not self.embedding_model:
+            print("Warning: No embedding model available. Skipping index update.")
+            return 0
+
+        with self._write_lock:
+            self._ensure_loaded_for_write()
+            keyed = self._with_ids(documents)
+            live = self._live_ids()
+            new = {doc_id: doc for doc_id, doc in keyed.items() if doc_id not in live}
+            if not new:
+                return 0
+
+            revived = [doc_id for doc_id in new if doc_id in self._tombstones]
+            if revived:
+                # Re-added before compaction: un-delete instead of indexing a duplicate
+                with self._index_lock.write():
+                    self._tombstones.difference_update(revived)
+                self._append_ops([{"op": "undelete", "ids": revived}])
+                for doc_id in revived:
+                    del new[doc_id]
+
+            if new:
+                ids = list(new)
+                texts = [new[doc_id].page_content for doc_id in ids]
+                metadatas = [new[doc_id].metadata for doc_id in ids]
+                vectors = self.embedding_model.embed_documents(texts)
+
+                if self.vector_db:
+                    with self._index_lock.write():
+                        self._make_writable()
+                        self.vector_db.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+                    self._index_changed()
+                else:
+                    self._set_index(self._new_vector_db([new[doc_id] for doc_id in ids], vectors))
+                    self._save_index()
+                    return len(ids) + len(revived)
+
+                self._append_ops([
+                    {"op": "add", "id": doc_id, "text": text, "metadata": metadata, "vector": list(map(float, vector))}
+                    for doc_id, text, metadata, vector in zip(ids, texts, metadatas, vectors)
+                ])
+            else:
+                self._index_changed()
+
+            return len(new) + len(revived)
+
+    def delete_documents(self, ids: Iterable[str]) -> int:
+        """
+        Tombstones documents by id: hidden from search immediately, physically removed
+        by the next (background) compaction. Returns the number of documents deleted.
+        """
+        with self._write_lock:
+            self._ensure_loaded_for_write()
+            live = self._live_ids()
+            doomed = [doc_id for doc_id in set(ids) if doc_id in live]
+            if not doomed:
+                return 0
+            with self._index_lock.write():
+                self._tombstones.update(doomed)
+            self._append_ops([{"op": "delete", "ids": doomed}])
+            self._index_changed()
+            return len(doomed)
+
+    def upsert_documents(self, documents: List[Document]) -> Dict[str, int]:
+        """
+        Synchronizes the chunks of every source_url present in documents: new or changed
+        chunks are embedded and added, chunks of those sources that disappeared are deleted,
+        unchanged chunks are left alone. Sources not in documents are untouched.
+        """
+        return self.upsert_document_stream([documents])
+
+    def upsert_document_stream(self, batches: Iterable[List[Document]]) -> Dict[str, int]:
+        """
+        upsert_documents over lazily produced batches: each batch is embedded and added as
+        it arrives, and only chunk ids are kept until stale chunks are deleted at the end.
+        Precomputed static queries are refreshed once, after the whole stream.
+        """
+        with self._batched_changes():
+            self._ensure_loaded_for_write()
+            seen_ids = set()
+            sources = set()
+            added = 0
+            for batch in batches:
+                keyed = self._with_ids(batch)
+                new = {doc_id: doc for doc_id, doc in keyed.items() if doc_id not in seen_ids}
+                seen_ids.update(keyed)
+                sources.update(doc.metadata.get("source_url") for doc in keyed.values())
+                added += self.add_documents(list(new.values()))
+
+            stale = []
+            if self.vector_db:
+                for doc_id in self._live_ids() - seen_ids:
+                    doc = self.vector_db.docstore.search(doc_id)
+                    if isinstance(doc, Document) and doc.metadata.get("source_url") in sources:
+                        stale.append(doc_id)
+            removed = self.delete_documents(stale)
+
+        return {"chunks": len(seen_ids), "added": added, "removed": removed, "unchanged": len(seen_ids) - added}
+
+    def _append_ops(self, ops: List[dict]):
+        """Persists incremental changes by appending them to the pending-ops log."""
+        os.makedirs(self.index_path, exist_ok=True)
+        with open(os.path.join(self.index_path, PENDING_OPS_FILE), "a", encoding="utf-8") as log:
+            for op in ops:
+                log.write(json.dumps(op) + "\n")
+        self._pending_ops += len(ops)
+
+        if len(self._tombstones) >= COMPACT_TOMBSTONE_THRESHOLD or self._pending_ops >= COMPACT_OPS_THRESHOLD:
+            self.compact_in_background()
+
+    def _replay_ops(self):
+        """Re-applies the pending-ops log on top of the last snapshot after loading."""
+        log_path = os.path.join(self.index_path, PENDING_OPS_FILE)
+        if not os.path.exists(log_path):
+            return
+
+        adds = []
+        tombstones = set(self._tombstones)
+        with open(log_path, encoding="utf-8") as log:
+            for line in log:
+                if not line.strip():
+                    continue
+                op = json.loads(line)
+                self._pending_ops += 1
+                if op["op"] == "add":
+                    adds.append(op)
+                elif op["op"] == "delete":
+                    tombstones.update(op["ids"])
+                elif op["op"] == "undelete":
+                    tombstones.difference_update(op["ids"])
+
+        existing = set(self.vector_db.index_to_docstore_id.values())
+        adds = [op for op in adds if op["id"] not in existing]
+        with self._index_lock.write():
+            self._tombstones = tombstones
+            if adds:
+                self._make_writable()
+                self.vector_db.add_embeddings(
+                    [(op["text"], op["vector"]) for op in adds],
+                    metadatas=[op["metadata"] for op in adds],
+                    ids=[op["id"] for op in adds]
+                )
+
+    def compact(self):
+        """
+        Physically removes tombstoned documents, writes a fresh snapshot and clears the ops log.
+        """
+        with self._write_lock:
+            if not self.vector_db:
+                return
+            indexed = set(self.vector_db.index_to_docstore_id.values())
+            doomed = [doc_id for doc_id in self._tombstones if doc_id in indexed]
+            if doomed and supports_removal(self.vector_db.index):
+                with self._index_lock.write():
+                    self._make_writable()
+                    self.vector_db.delete(doomed)
+                    self._tombstones = set()
+            elif doomed:
+                # Approximate indexes are rebuilt aside and swapped in; the embedding cache makes re-embedding cheap
+                self._rebuild_live_documents()
+            else:
+                with self._index_lock.write():
+                    self._tombstones = set()
+            self._save_index()
+
+            log_path = os.path.join(self.index_path, PENDING_OPS_FILE)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            self._pending_ops = 0
+            self._index_changed()
+            print(f"✅ Compacted vector index {self.index_path} ({len(doomed)} deleted chunks removed)")
+
+    def is_compacting(self) -> bool:
+        return self._compacting
+
+    def _rebuild_live_documents(self):
+        """Re-embeds the live (non-tombstoned) documents into a new index and swaps it in."""
+        ids = [doc_id for doc_id in self.vector_db.index_to_docstore_id.values() if doc_id not in self._tombstones]
+        docs = [self.vector_db.docstore.search(doc_id) for doc_id in ids]
+        rebuilt = self._new_vector_db(docs, ids=ids)
+        with self._index_lock.write(), self._static_lock:
+            self.vector_db = rebuilt
+            self._mmapped = False
+            self._tombstones = set()
+
+    def compact_in_background(self):
+        with self._compacting_lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Warning: Vector index compaction failed: {e}")
+            finally:
+                with self._compacting_lock:
+                    self._compacting = False
+
+        threading.Thread(target=run, name="vector-compaction", daemon=True).start()
+
     def _get_fallback_content(self, k: int = 5) -> List[Document]:
         """Return fallback content when vector search is not available"""
         fallback_docs = [
@@ -89,22 +844,60 @@ class VectorStore:
         ]
         return fallback_docs[:k]
 
+    def _make_writable(self):
+        if self._mmapped:
+            make_writable(self.vector_db)
+            self._mmapped = False
+
     def _save_index(self):
         """
-        Saves FAISS index and document store to disk.
+        Saves FAISS index and document store to disk (a full snapshot: the ops log is reset).
         """
         if self.vector_db:
-            self.vector_db.save_local(FAISS_DB_PATH)
+            save_vector_db(self.vector_db, self.index_path)
+            log_path = os.path.join(self.index_path, PENDING_OPS_FILE)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            self._pending_ops = 0
 
     def _load_index(self):
         """
-        Loads existing FAISS index from disk.
+        Loads existing FAISS index from disk: the index is memory-mapped and documents
+        are read lazily by id.
         """
-        if os.path.exists(FAISS_DB_PATH):
-            self.vector_db = FAISS.load_local(
-                FAISS_DB_PATH,
-                self.embedding_model,
-                allow_dangerous_deserialization=True
-            )
+        if is_saved(self.index_path) or is_legacy(self.index_path):
+            with self._write_lock:
+                # Concurrent first searches: only the first one loads and replays the ops log
+                if self.vector_db:
+                    return
+                stale_model = None
+                if is_saved(self.index_path):
+                    saved = saved_embedding_signature(self.index_path)
+                    if saved is not None and saved != embedding_signature(self.embedding_model):
+                        stale_model = saved["embedding_model"]
+                    vector_db, mmapped = load_vector_db(self.index_path, self.embedding_model)
+                else:
+                    # One-time migration of an index written by save_local (pickled docstore)
+                    print(f"⚠️ Migrating legacy pickled index at {self.index_path}")
+                    vector_db = FAISS.load_local(
+                        self.index_path,
+                        self.embedding_model,
+                        allow_dangerous_deserialization=True
+                    )
+                    save_vector_db(vector_db, self.index_path)
+                    mmapped = False
+                apply_search_params(vector_db.index, self.index_config)
+                with self._index_lock.write(), self._static_lock:
+                    self.vector_db = vector_db
+                    self._mmapped = mmapped
+                    self._tombstones = set()
+                self._pending_ops = 0
+                self._replay_ops()
+                if stale_model:
+                    # Vectors of another model are not comparable with this model's queries
+                    print(f"⚠️ {self.index_path} was embedded with {stale_model}, re-embedding with {embedding_signature(self.embedding_model)['embedding_model']}")
+                    self._rebuild_live_documents()
+                    self._save_index()
+                self._index_changed()
         else:
             raise ValueError("FAISS index not found. Please build it first.")
@@ -0,0 +1,32 @@
+"""
+Rank fusion of several retrievers' result lists.
+"""
+from typing import Callable, Hashable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Standard RRF damping constant: keeps a single retriever's top hit from dominating
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[T]],
+    k: int,
+    key: Callable[[T], Hashable] = lambda item: item,
+    rrf_k: int = RRF_K
+) -> List[T]:
+    """
+    Merges ranked lists by summing 1 / (rrf_k + rank) per item across lists and
+    returns the top k. Ties keep the order in which items were first seen.
+    """
+    scores = {}
+    items = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            items.setdefault(item_key, item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (rrf_k + rank)
+
+    order = {item_key: i for i, item_key in enumerate(items)}
+    best = sorted(scores, key=lambda item_key: (-scores[item_key], order[item_key]))[:k]
+    return [items[item_key] for item_key in best]
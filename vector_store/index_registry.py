@@ -0,0 +1,233 @@
+"""
+Registry of namespaced vector indexes.
+
+Each namespace (the BeaconAI knowledge base, every company domain) has its own index
+directory, so ingesting one never overwrites another. Stores are created and loaded
+lazily, and loaded indexes are kept under a memory budget by unloading the least
+recently used (or idle) namespaces; they reload from disk on their next search.
+"""
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+from vector_store.faiss_index import FAISS_DB_PATH
+
+# The BeaconAI knowledge base keeps the original index location
+BEACONAI_NAMESPACE = "beaconai"
+NAMESPACE_DB_ROOT = os.getenv("VECTOR_NAMESPACE_ROOT", "vector_store/namespaces")
+NAMESPACE_MEMORY_BUDGET_BYTES = int(os.getenv("VECTOR_NAMESPACE_MEMORY_MB", "512")) * 1024 * 1024
+NAMESPACE_IDLE_SECONDS = int(os.getenv("VECTOR_NAMESPACE_IDLE_SECONDS", "1800"))
+
+
+def company_namespace(url: str) -> str:
+    """
+    Derives a stable, filesystem-safe namespace from a company website URL.
+    """
+    host = urlparse(url if "://" in url else f"https://{url}").netloc.lower()
+    host = host.split("@")[-1].split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return "company_" + re.sub(r"[^a-z0-9.-]", "_", host)
+
+
+class IndexRegistry:
+    def __init__(
+        self,
+        store_factory: Callable[[str, str], object],
+        root: str = NAMESPACE_DB_ROOT,
+        memory_budget_bytes: int = NAMESPACE_MEMORY_BUDGET_BYTES,
+        idle_seconds: int = NAMESPACE_IDLE_SECONDS,
+        pinned: tuple = (BEACONAI_NAMESPACE,)
+    ):
+        """
+        Args:
+            store_factory: Creates a store from (index directory, namespace) (VectorStore or SimpleVectorStore)
+            root: Directory holding one index directory per namespace
+            memory_budget_bytes: Upper bound on the total size of loaded indexes
+            idle_seconds: Loaded namespaces unused for this long are unloaded
+            pinned: Namespaces exempt from idle unloading (still subject to the memory budget)
+        """
+        self.store_factory = store_factory
+        self.root = root
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_seconds = idle_seconds
+        self.pinned = set(pinned)
+
+        self._stores: "OrderedDict[str, object]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        # Calls currently using each namespace's store, and namespaces being unloaded
+        self._in_use: Dict[str, int] = {}
+        self._unloading: set = set()
+        self._unloaded = threading.Condition(self._lock)
+
+    def index_path(self, namespace: str) -> str:
+        if namespace == BEACONAI_NAMESPACE:
+            return FAISS_DB_PATH
+        return os.path.join(self.root, namespace)
+
+    def get(self, namespace: str):
+        """
+        Returns the store of a namespace, creating it (unloaded) on first use.
+        """
+        with self._lock:
+            return self._get_locked(namespace)
+
+    def _get_locked(self, namespace: str):
+        store = self._stores.get(namespace)
+        if store is None:
+            store = self.store_factory(self.index_path(namespace), namespace)
+            self._stores[namespace] = store
+            self._build_locks[namespace] = threading.Lock()
+        self._stores.move_to_end(namespace)
+        self._last_used[namespace] = time.time()
+        return store
+
+    @contextmanager
+    def _using(self, namespace: str):
+        """
+        The store of a namespace, protected from budget unloading while the block runs
+        (waits for an unload already under way to finish first).
+        """
+        with self._lock:
+            while namespace in self._unloading:
+                self._unloaded.wait()
+            store = self._get_locked(namespace)
+            self._in_use[namespace] = self._in_use.get(namespace, 0) + 1
+        try:
+            yield store
+        finally:
+            with self._lock:
+                self._in_use[namespace] -= 1
+
+    def build_index(self, namespace: str, documents):
+        """
+        Rebuilds one namespace's index. Builds of different namespaces run concurrently;
+        builds of the same namespace are serialized.
+        """
+        with self._using(namespace) as store, self._build_locks[namespace]:
+            store.build_index(documents)
+        self._enforce_budget(keep=namespace)
+
+    def upsert_documents(self, namespace: str, documents) -> dict:
+        """
+        Incrementally updates one namespace: only new or changed chunks are embedded,
+        chunks that disappeared from the re-ingested sources are deleted.
+        """
+        return self.upsert_document_stream(namespace, [documents])
+
+    def upsert_document_stream(self, namespace: str, batches) -> dict:
+        """
+        upsert_documents over lazily produced batches of documents (see iter_document_batches).
+        """
+        with self._using(namespace) as store, self._build_locks[namespace]:
+            stats = store.upsert_document_stream(batches)
+        self._enforce_budget(keep=namespace)
+        return stats
+
+    def search(self, namespace: str, query: str, k: int = 5):
+        with self._using(namespace) as store:
+            results = store.search(query, k=k)
+        self._enforce_budget(keep=namespace)
+        return results
+
+    def search_many(self, namespace: str, queries: List[str], k: int = 5):
+        with self._using(namespace) as store:
+            results = store.search_many(queries, k=k)
+        self._enforce_budget(keep=namespace)
+        return results
+
+    def hybrid_search_many(self, namespace: str, queries: List[str], k: int = 5):
+        """
+        Dense + lexical search fused by reciprocal rank; stores without a dense index
+        (SimpleVectorStore) answer with their keyword search alone.
+        """
+        with self._using(namespace) as store:
+            search_many = getattr(store, "hybrid_search_many", store.search_many)
+            results = search_many(queries, k=k)
+        self._enforce_budget(keep=namespace)
+        return results
+
+    def search_many_with_vectors(self, namespace: str, queries: List[str], k: int = 5, hybrid: bool = False):
+        """
+        (documents, query vector, document vectors) per query; stores that keep no
+        vectors (SimpleVectorStore) answer with their plain search and None vectors.
+        """
+        with self._using(namespace) as store:
+            if hasattr(store, "search_many_with_vectors"):
+                results = store.search_many_with_vectors(queries, k=k, hybrid=hybrid)
+            else:
+                search_many = getattr(store, "hybrid_search_many", store.search_many) if hybrid else store.search_many
+                results = [(docs, None, None) for docs in search_many(queries, k=k)]
+        self._enforce_budget(keep=namespace)
+        return results
+
+    def namespaces(self) -> List[str]:
+        """
+        Lists namespaces that have an index on disk or are currently registered.
+        """
+        names = set(self._stores)
+        if os.path.exists(FAISS_DB_PATH):
+            names.add(BEACONAI_NAMESPACE)
+        if os.path.isdir(self.root):
+            names.update(entry for entry in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, entry)))
+        return sorted(names)
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = {
+                name: store.memory_bytes()
+                for name, store in self._stores.items()
+                if hasattr(store, "memory_bytes") and store.is_loaded()
+            }
+        return {
+            "loaded": loaded,
+            "loaded_bytes": sum(loaded.values()),
+            "memory_budget_bytes": self.memory_budget_bytes
+        }
+
+    def _enforce_budget(self, keep: str):
+        """
+        Unloads idle namespaces, then least recently used ones until under the memory budget.
+        Only persistent stores (those that can reload from disk) are ever unloaded, and never
+        while they are searched, rebuilt or compacted. Victims are picked under the registry
+        lock and unloaded after releasing it.
+        """
+        now = time.time()
+        victims = []
+        with self._lock:
+            loaded = [
+                name for name, store in self._stores.items()
+                if hasattr(store, "unload") and store.is_loaded()
+            ]  # least recently used first
+            total = sum(self._stores[name].memory_bytes() for name in loaded)
+
+            for name in loaded:
+                store = self._stores[name]
+                if name == keep or self._in_use.get(name) or getattr(store, "is_compacting", lambda: False)():
+                    continue
+                idle = name not in self.pinned and now - self._last_used.get(name, 0) > self.idle_seconds
+                if not idle and total <= self.memory_budget_bytes:
+                    continue
+                # Never unload a namespace in the middle of a rebuild
+                if not self._build_locks[name].acquire(blocking=False):
+                    continue
+                total -= store.memory_bytes()
+                self._unloading.add(name)
+                victims.append((name, store, idle))
+
+        for name, store, idle in victims:
+            try:
+                store.unload()
+                print(f"♻️ Unloaded vector namespace '{name}' ({'idle' if idle else 'memory budget'})")
+            finally:
+                self._build_locks[name].release()
+                with self._lock:
+                    self._unloading.discard(name)
+                    self._unloaded.notify_all()
@@ -0,0 +1,191 @@
+"""
+Pickle-free, memory-mappable persistence for FAISS vector stores.
+
+An index directory holds:
+  index.faiss    FAISS index, memory-mapped on load so workers share page-cached bytes
+  docs.jsonl     one JSON record (id, text, metadata) per document
+  docs.offsets   int64 byte offsets of the records (n + 1 entries), memory-mapped
+  manifest.json  format version, FAISS wrapper settings and the embedding model of the vectors
+
+Documents are read lazily by id, so loading an index costs a few mmaps instead of
+unpickling the whole docstore into every worker's heap.
+"""
+import os
+import json
+import mmap
+from typing import Dict, List, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+
+STORAGE_FORMAT_VERSION = 1
+
+INDEX_FILE = "index.faiss"
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "docs.offsets"
+MANIFEST_FILE = "manifest.json"
+
+# Memory-map the flat vector codes where this FAISS build supports it
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+class LazyDocstore(Docstore, AddableMixin):
+    """
+    Read-only view of docs.jsonl plus an in-memory overlay for documents added
+    or deleted since the index was loaded.
+    """
+
+    def __init__(self, index_path: str, ids: List[str]):
+        with open(os.path.join(index_path, DOCS_FILE), "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(f.name) else None
+        self._offsets = np.load(os.path.join(index_path, OFFSETS_FILE), mmap_mode="r")
+        self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+
+        # Only documents added after loading are resident
+        self._dict: Dict[str, Document] = {}
+        self._deleted = set()
+
+    def _read(self, position: int) -> Document:
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        record = json.loads(self._mmap[start:end])
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self._dict:
+            return self._dict[search]
+        if search in self._deleted or search not in self._positions:
+            return f"ID {search} not found."
+        return self._read(self._positions[search])
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        overlapping = {doc_id for doc_id in texts if isinstance(self.search(doc_id), Document)}
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._deleted.difference_update(texts)
+        self._dict.update(texts)
+
+    def delete(self, ids: List) -> None:
+        for doc_id in ids:
+            self._dict.pop(doc_id, None)
+            if doc_id in self._positions:
+                self._deleted.add(doc_id)
+
+
+def embedding_signature(embedding_model) -> Dict[str, str]:
+    """
+    Backend and model name of an embedding model: vectors of two different signatures
+    live in different spaces and must not share an index.
+    """
+    return {
+        "embedding_backend": getattr(embedding_model, "backend", None) or "pytorch",
+        "embedding_model": getattr(embedding_model, "model_name", None) or type(embedding_model).__name__
+    }
+
+
+def saved_embedding_signature(index_path: str) -> Optional[Dict[str, str]]:
+    """The signature recorded in a saved index's manifest (None for indexes saved before it was)."""
+    with open(os.path.join(index_path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if "embedding_model" not in manifest:
+        return None
+    return {key: manifest.get(key) for key in ("embedding_backend", "embedding_model")}
+
+
+def is_saved(index_path: str) -> bool:
+    return os.path.exists(os.path.join(index_path, MANIFEST_FILE))
+
+
+def is_legacy(index_path: str) -> bool:
+    """True for directories written by FAISS.save_local (pickled docstore)."""
+    return not is_saved(index_path) and os.path.exists(os.path.join(index_path, "index.pkl"))
+
+
+def _replace(tmp_path: str, path: str):
+    # Atomic swap: workers that still map the old file keep reading the old inode
+    os.replace(tmp_path, path)
+
+
+def save_vector_db(vector_db: FAISS, index_path: str):
+    """
+    Writes the index, documents and manifest. Files are written next to the old ones
+    and swapped in, manifest last, so concurrent readers never see a partial index.
+    """
+    os.makedirs(index_path, exist_ok=True)
+
+    ids = [vector_db.index_to_docstore_id[i] for i in range(vector_db.index.ntotal)]
+    offsets = [0]
+    with open(os.path.join(index_path, DOCS_FILE + ".tmp"), "wb") as f:
+        for doc_id in ids:
+            doc = vector_db.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Document {doc_id} missing from docstore")
+            record = json.dumps({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False, default=str)
+            f.write(record.encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+
+    with open(os.path.join(index_path, OFFSETS_FILE + ".tmp"), "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+    faiss.write_index(vector_db.index, os.path.join(index_path, INDEX_FILE + ".tmp"))
+
+    manifest = {
+        "format": STORAGE_FORMAT_VERSION,
+        "normalize_L2": bool(getattr(vector_db, "_normalize_L2", False)),
+        "distance_strategy": str(getattr(vector_db.distance_strategy, "value", vector_db.distance_strategy)),
+        **embedding_signature(vector_db.embedding_function),
+        "ids": ids
+    }
+    with open(os.path.join(index_path, MANIFEST_FILE + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    for name in (INDEX_FILE, DOCS_FILE, OFFSETS_FILE, MANIFEST_FILE):
+        _replace(os.path.join(index_path, name + ".tmp"), os.path.join(index_path, name))
+
+    # A pickled docstore left by save_local no longer matches index.faiss
+    legacy_docstore = os.path.join(index_path, "index.pkl")
+    if os.path.exists(legacy_docstore):
+        os.remove(legacy_docstore)
+
+
+def load_vector_db(index_path: str, embedding_model, mmap_index: bool = True) -> Tuple[FAISS, bool]:
+    """
+    Opens a saved index without unpickling anything.
+
+    Returns:
+        (vector store, whether the FAISS index is memory-mapped and must be copied before writes)
+    """
+    with open(os.path.join(index_path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != STORAGE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported vector index format: {manifest.get('format')}")
+
+    index_file = os.path.join(index_path, INDEX_FILE)
+    mmapped = False
+    index: Optional[faiss.Index] = None
+    if mmap_index:
+        try:
+            index = faiss.read_index(index_file, _MMAP_FLAGS)
+            mmapped = True
+        except RuntimeError as e:
+            print(f"Warning: Could not memory-map {index_file}, reading it into memory: {e}")
+    if index is None:
+        index = faiss.read_index(index_file)
+
+    vector_db = FAISS(
+        embedding_model,
+        index,
+        LazyDocstore(index_path, manifest["ids"]),
+        dict(enumerate(manifest["ids"])),
+        normalize_L2=manifest["normalize_L2"],
+        distance_strategy=DistanceStrategy(manifest["distance_strategy"])
+    )
+    return vector_db, mmapped
+
+
+def make_writable(vector_db: FAISS):
+    """Replaces a memory-mapped (read-only) FAISS index with an in-memory copy."""
+    # clone_index would keep viewing the mapped codes; a serialize round trip owns them
+    vector_db.index = faiss.deserialize_index(faiss.serialize_index(vector_db.index))
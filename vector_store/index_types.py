@@ -0,0 +1,168 @@
+"""
+Approximate FAISS index types selectable per namespace.
+
+  flat      exact search (the default, what FAISS.from_documents builds)
+  ivf_flat  inverted lists over full vectors; nprobe lists are scanned per query
+  hnsw      graph index; efSearch trades latency for recall
+  ivf_pq    inverted lists over product-quantized codes; smallest memory footprint
+
+Types are chosen with VECTOR_INDEX_TYPE (all namespaces) or VECTOR_INDEX_TYPES, e.g.
+"beaconai=hnsw,company_*=flat". Trained indexes fall back to a simpler type when the
+corpus is too small to train them.
+"""
+import os
+import json
+import fnmatch
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+VECTOR_INDEX_TYPES = os.getenv("VECTOR_INDEX_TYPES", "")
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+VECTOR_INDEX_EF_SEARCH = int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64"))
+
+# FAISS recommends at least ~39 training points per IVF centroid
+_MIN_POINTS_PER_LIST = 39
+
+
+class IndexConfig:
+    def __init__(
+        self,
+        kind: str = "flat",
+        nlist: Optional[int] = None,
+        nprobe: int = VECTOR_INDEX_NPROBE,
+        hnsw_m: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = VECTOR_INDEX_EF_SEARCH,
+        pq_m: Optional[int] = None,
+        pq_bits: int = 8,
+        train_sample: int = 100_000
+    ):
+        """
+        Args:
+            kind: One of INDEX_TYPES
+            nlist: IVF centroids (default about 4·sqrt(n))
+            nprobe: IVF lists scanned per query
+            hnsw_m: HNSW neighbours per node
+            ef_construction / ef_search: HNSW candidate list sizes at build / query time
+            pq_m: PQ sub-quantizers (default: 8 dimensions each)
+            pq_bits: Bits per PQ code
+            train_sample: Maximum vectors used to train IVF/PQ
+        """
+        if kind not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{kind}', expected one of {INDEX_TYPES}")
+        self.kind = kind
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+        self.train_sample = train_sample
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndexConfig":
+        return cls(**data)
+
+    def __repr__(self):
+        return f"IndexConfig({json.dumps(self.to_dict())})"
+
+
+def index_config_for(namespace: str) -> IndexConfig:
+    """
+    Resolves the index type of a namespace from VECTOR_INDEX_TYPES (first matching
+    glob wins), falling back to VECTOR_INDEX_TYPE.
+    """
+    for rule in filter(None, (part.strip() for part in VECTOR_INDEX_TYPES.split(","))):
+        pattern, _, kind = rule.partition("=")
+        if fnmatch.fnmatch(namespace, pattern.strip()):
+            return IndexConfig(kind.strip())
+    return IndexConfig(VECTOR_INDEX_TYPE)
+
+
+def _pq_subquantizers(dim: int, requested: Optional[int]) -> int:
+    # Sub-quantizers must divide the dimension
+    target = requested or max(1, dim // 8)
+    return max(m for m in range(1, target + 1) if dim % m == 0)
+
+
+def build_faiss_index(vectors: np.ndarray, config: IndexConfig) -> faiss.Index:
+    """
+    Creates (and trains, if needed) an index of the configured type and adds vectors.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    kind = config.kind
+
+    nlist = config.nlist or max(1, int(4 * np.sqrt(n)))
+    nlist = min(nlist, n // _MIN_POINTS_PER_LIST)
+    if kind == "ivf_pq" and n < _MIN_POINTS_PER_LIST * (1 << config.pq_bits):
+        print(f"⚠️ {n} vectors are too few to train IVF-PQ, using IVF-Flat")
+        kind = "ivf_flat"
+    if kind in ("ivf_flat", "ivf_pq") and nlist < 2:
+        print(f"⚠️ {n} vectors are too few to train an IVF index, using exact search")
+        kind = "flat"
+
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    else:
+        quantizer = faiss.IndexFlatL2(dim)
+        if kind == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim, config.pq_m), config.pq_bits)
+
+        # Train on a random sample; assignment quality saturates well before the full corpus
+        sample = vectors
+        if n > config.train_sample:
+            sample = vectors[np.random.default_rng(0).choice(n, config.train_sample, replace=False)]
+        index.train(sample)
+
+    if n:
+        index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig):
+    """Sets the query-time knobs (nprobe / efSearch) on an index."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(config.nprobe, ivf.nlist)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.ef_search
+
+
+def index_kind(index: faiss.Index) -> str:
+    """Names the type of a built index (which may differ from the configured one)."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf_flat"
+    return "flat"
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """
+    Only flat indexes renumber their ids on removal the way LangChain's FAISS.delete
+    expects; the others are rebuilt to drop documents.
+    """
+    return isinstance(index, faiss.IndexFlat)
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Serialized size of an index, a close proxy for its resident size."""
+    return int(faiss.serialize_index(index).nbytes)
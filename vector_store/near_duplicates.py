@@ -0,0 +1,133 @@
+"""
+Exact and near-duplicate detection for text chunks.
+
+Chunks are compared on word shingles: MinHash signatures estimate the Jaccard
+similarity of two shingle sets without comparing the sets themselves, and LSH
+banding of the signatures finds candidate pairs without comparing every chunk to
+every other one.
+"""
+import re
+import zlib
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard almost always share a band
+LSH_BANDS = 16
+_LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# Mersenne prime: (a * h + b) stays below 2**63 for 32-bit shingle hashes
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lowercased words separated by single spaces; formatting and punctuation are ignored."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized text: equal for exact duplicates up to formatting."""
+    return hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Stable 32-bit hashes of the word n-grams of a text (the whole text if shorter)."""
+    words = normalize(text).split()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set: Set[int]) -> Optional[np.ndarray]:
+    """MinHash signature of a shingle set (None for empty text)."""
+    if not shingle_set:
+        return None
+    hashes = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def estimated_jaccard(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    if a is None or b is None:
+        return 0.0
+    return float(np.mean(a == b))
+
+
+class NearDuplicateFilter:
+    """
+    Keeps the first of every group of exact or near-duplicate texts, in input order.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity of shingles at or above which texts are near-duplicates
+        """
+        self.threshold = threshold
+        self.kept = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.dropped_chars = 0
+        self._hashes: Set[str] = set()
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def _bands(self, signature: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+        for band in range(LSH_BANDS):
+            yield band, signature[band * _LSH_ROWS:(band + 1) * _LSH_ROWS].tobytes()
+
+    def _is_near_duplicate(self, signature: np.ndarray) -> bool:
+        candidates = {i for key in self._bands(signature) for i in self._buckets.get(key, ())}
+        return any(estimated_jaccard(self._signatures[i], signature) >= self.threshold for i in candidates)
+
+    def add(self, text: str) -> bool:
+        """Returns True (and remembers the text) if it is not a duplicate of an earlier one."""
+        digest = content_hash(text)
+        if digest in self._hashes:
+            self.exact_duplicates += 1
+            self.dropped_chars += len(text)
+            return False
+
+        signature = minhash(shingles(text))
+        if signature is not None and self._is_near_duplicate(signature):
+            self.near_duplicates += 1
+            self.dropped_chars += len(text)
+            return False
+
+        self._hashes.add(digest)
+        if signature is not None:
+            for key in self._bands(signature):
+                self._buckets.setdefault(key, []).append(len(self._signatures))
+            self._signatures.append(signature)
+        self.kept += 1
+        return True
+
+    def filter(self, texts: List[str]) -> List[str]:
+        return [text for text in texts if self.add(text)]
+
+    def stats(self) -> dict:
+        seen = self.kept + self.exact_duplicates + self.near_duplicates
+        return {
+            "kept": self.kept,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dropped_ratio": round((seen - self.kept) / seen, 3) if seen else 0.0,
+            "dropped_chars": self.dropped_chars
+        }
+
+    def filter_batches(self, batches: Iterable[list]) -> Iterator[list]:
+        """
+        Drops duplicate Documents from a stream of batches (ingest-time dedup between
+        chunking and embedding); emptied batches are skipped.
+        """
+        for batch in batches:
+            kept = [doc for doc in batch if self.add(doc.page_content)]
+            if kept:
+                yield kept
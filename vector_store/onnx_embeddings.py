@@ -0,0 +1,111 @@
+"""
+int8-quantized ONNX Runtime backend for the sentence-transformers MiniLM embedder.
+
+The model is exported to ONNX once (with optimum), dynamically quantized to int8 and
+cached on disk; inference then runs on onnxruntime's CPU kernels without PyTorch.
+Pooling matches sentence-transformers: attention-masked mean of the token embeddings
+followed by L2 normalization.
+"""
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import onnxruntime
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "cache/onnx")
+ONNX_BATCH_SIZE = int(os.getenv("ONNX_BATCH_SIZE", "32"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets onnxruntime pick
+
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def export_quantized_model(model_name: str, output_dir: str) -> str:
+    """
+    Exports model_name to ONNX and writes a dynamically int8-quantized copy.
+    Returns the path of the quantized model.
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"⏳ Exporting {model_name} to ONNX in {output_dir}...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    quantized_path = os.path.join(output_dir, _QUANTIZED_FILE)
+    quantize_dynamic(os.path.join(output_dir, "model.onnx"), quantized_path, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized ONNX model written to {quantized_path}")
+    return quantized_path
+
+
+class OnnxEmbeddings(Embeddings):
+    # Recorded in index manifests next to model_name
+    backend = "onnx"
+
+    def __init__(self, model_name: str, model_dir: str = None, max_seq_length: int = 256, batch_size: int = ONNX_BATCH_SIZE):
+        """
+        Args:
+            model_name: HuggingFace id of the sentence-transformers model
+            model_dir: Where the exported/quantized model is cached (one directory per model)
+            max_seq_length: Inputs are truncated to this many tokens (the model's limit)
+            batch_size: Texts per inference call
+        """
+        if not ONNX_AVAILABLE:
+            raise ImportError("onnxruntime and transformers are required for the ONNX embedding backend")
+
+        self.base_model_name = model_name
+        # Distinct name: cached vectors of the two backends must not be mixed
+        self.model_name = f"{model_name}#onnx-int8"
+        self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+
+        model_dir = model_dir or os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+        model_path = os.path.join(model_dir, _QUANTIZED_FILE)
+        if not os.path.exists(model_path):
+            model_path = export_quantized_model(model_name, model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {node.name for node in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        inputs = {name: np.asarray(value, dtype=np.int64) for name, value in encoded.items() if name in self._input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then unit length (sentence-transformers' Normalize layer)
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Sorting by length keeps padding per batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            vectors = self._embed_batch([texts[i] for i in batch])
+            for i, vector in zip(batch, vectors):
+                results[i] = vector.tolist()
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,64 @@
+"""
+Short-lived in-memory index over a single company's scraped website.
+
+Built once per report so each CARE question can pull only its most relevant
+passages instead of the full scrape.
+"""
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from vector_store.embedding_cache import embed_queries
+from vector_store.simple_store import SimpleVectorStore
+
+
+class CompanyContextIndex:
+    def __init__(self, documents: List[Document], embedding_model=None):
+        """
+        Args:
+            documents: Chunked company website content
+            embedding_model: LangChain embeddings; keyword search is used when None
+        """
+        self.chunks = [doc.page_content for doc in documents]
+        self.embedding_model = embedding_model
+        self.matrix = None
+        self.keyword_store = None
+
+        if not self.chunks:
+            return
+
+        if embedding_model is not None:
+            try:
+                self.matrix = self._normalize(np.asarray(embedding_model.embed_documents(self.chunks), dtype=np.float32))
+                return
+            except Exception as e:
+                print(f"Warning: Could not embed company context, using keyword search: {e}")
+
+        self.keyword_store = SimpleVectorStore()
+        self.keyword_store.build_index(documents)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def search_many(self, queries: List[str], k: int = 4) -> List[List[str]]:
+        """
+        Returns the top-k chunks for every query, searched as one batch.
+        """
+        if not queries:
+            return []
+
+        # Nothing to select from: every query gets the whole (small) site
+        if len(self.chunks) <= k:
+            return [list(self.chunks) for _ in queries]
+
+        if self.matrix is not None:
+            query_matrix = self._normalize(embed_queries(self.embedding_model, queries))
+            scores = query_matrix @ self.matrix.T
+            top = np.argsort(-scores, axis=1)[:, :k]
+            return [[self.chunks[i] for i in row] for row in top]
+
+        return [self.keyword_store.search(query, k=k) or self.chunks[:k] for query in queries]
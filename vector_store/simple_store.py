@@ -4,30 +4,54 @@ Simple fallback vector store that doesn't require HuggingFace
 import os
 from typing import List
 
+from vector_store.bm25 import BM25Index
+
 class SimpleVectorStore:
     def __init__(self):
-        # Simple keyword-based search as fallback
+        # BM25 keyword search as fallback
         self.documents = []
-        
+        self.sources = []
+        self.index = BM25Index()
+
     def build_index(self, documents):
-        """Store documents for simple keyword search"""
+        """Store documents and build the BM25 posting lists once"""
         self.documents = [doc.page_content if hasattr(doc, 'page_content') else str(doc) for doc in documents]
-        
+        self.sources = [self._source(doc) for doc in documents]
+        self.index = BM25Index()
+        self.index.add_many(enumerate(self.documents))
+
+    @staticmethod
+    def _source(doc):
+        metadata = getattr(doc, 'metadata', None) or {}
+        return metadata.get("source_url")
+
+    def upsert_documents(self, documents) -> dict:
+        """Replace the documents of every source_url present in documents"""
+        new_sources = {self._source(doc) for doc in documents}
+        kept = [(text, source) for text, source in zip(self.documents, self.sources) if source not in new_sources]
+        existing = {text for text, source in zip(self.documents, self.sources) if source in new_sources}
+        new_texts = [doc.page_content if hasattr(doc, 'page_content') else str(doc) for doc in documents]
+
+        self.documents = [text for text, _ in kept] + new_texts
+        self.sources = [source for _, source in kept] + [self._source(doc) for doc in documents]
+        # Positions shift when documents are replaced, so the postings are rebuilt
+        self.index = BM25Index()
+        self.index.add_many(enumerate(self.documents))
+
+        added = len(set(new_texts) - existing)
+        return {"added": added, "removed": len(existing - set(new_texts)), "unchanged": len(new_texts) - added}
+
+    def upsert_document_stream(self, batches) -> dict:
+        """upsert_documents over batches of documents"""
+        documents = [doc for batch in batches for doc in batch]
+        return {"chunks": len(documents), **self.upsert_documents(documents)}
+
     def search(self, query: str, k: int = 5) -> List[str]:
-        """Simple keyword-based search"""
+        """BM25 keyword search"""
         if not self.documents:
             return []
-            
-        # Simple keyword matching
-        query_words = query.lower().split()
-        scored_docs = []
-        
-        for doc in self.documents:
-            doc_lower = doc.lower()
-            score = sum(1 for word in query_words if word in doc_lower)
-            if score > 0:
-                scored_docs.append((score, doc))
-        
-        # Sort by score and return top k
-        scored_docs.sort(key=lambda x: x[0], reverse=True)
-        return [doc for _, doc in scored_docs[:k]]
\ No newline at end of file
+        return [self.documents[position] for position, _ in self.index.search(query, k)]
+
+    def search_many(self, queries: List[str], k: int = 5) -> List[List[str]]:
+        """Keyword search for several queries"""
+        return [self.search(query, k) for query in queries]